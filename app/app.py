@@ -45,6 +45,7 @@ class TranslationThread(QThread):
     """자막 번역을 위한 스레드"""
     update_progress = pyqtSignal(int, int)
     update_status = pyqtSignal(str)
+    subtitle_preview = pyqtSignal(str)
     finished_signal = pyqtSignal(bool, str)
 
     def __init__(self, input_file, output_file, config):
@@ -60,41 +61,11 @@ class TranslationThread(QThread):
             self.update_status.emit(f"파일 '{self.input_file}'을(를) 번역합니다...")
             translator = SubtitleTranslator(self.config)
             
-            # 원본 translate 메소드를 저장
-            original_translate = translator.translate
+            # 배치가 끝날 때마다 진행 상황 업데이트
+            translator.progress_callback = lambda current, total: self.update_progress.emit(current, total)
             
-            # batches 변수를 추적하기 위한 래퍼 함수
-            def translate_wrapper(input_file, output_file):
-                # 입력 파일 읽기 및 검증
-                srt_content = translator.file_handler.read_srt_file(input_file)
-                
-                if not translator.file_handler.validate_srt_format(srt_content):
-                    translator.logger.error("유효하지 않은 SRT 파일 형식입니다.")
-                    raise ValueError("유효하지 않은 SRT 파일 형식입니다.")
-                
-                # 자막 분할 및 배치 생성
-                subtitles = translator.processor.split_subtitles(srt_content)
-                translator.logger.info(f"총 {len(subtitles)}개의 자막을 찾았습니다.")
-                
-                batches = translator.processor.create_batches(subtitles, translator.config.batch_size)
-                translator.logger.info(f"자막을 {len(batches)}개의 배치로 나누었습니다.")
-                
-                # 진행 상황 업데이트를 위한 콜백 함수
-                original_translate_batch_task = translator._translate_batch_task
-                
-                def progress_hook(args):
-                    batch_index, translated_batch, input_tokens, output_tokens = original_translate_batch_task(args)
-                    self.update_progress.emit(batch_index + 1, len(batches))
-                    return batch_index, translated_batch, input_tokens, output_tokens
-                
-                # 원본 함수 대체
-                translator._translate_batch_task = progress_hook
-                
-                # 원본 translate 함수 호출
-                return original_translate(input_file, output_file)
-            
-            # translate 메소드를 래퍼로 대체
-            translator.translate = translate_wrapper
+            # 스트리밍 모드에서는 완성된 자막을 바로 미리보기로 전달
+            translator.subtitle_callback = lambda start_number, subtitle: self.subtitle_preview.emit(subtitle)
             
             stats = translator.translate(self.input_file, self.output_file)
             self.update_status.emit(f"번역 완료! 결과가 {self.output_file}에 저장되었습니다.")
@@ -107,6 +78,8 @@ class TranslationThread(QThread):
             - 입력 토큰: {stats['input_tokens']}
             - 출력 토큰: {stats['output_tokens']}
             - 총 비용: ${stats['total_cost']:.4f}
+            - 캐시 적중/미적중: {stats['cache_hits']}/{stats['cache_misses']}
+            - 이전 작업에서 복구한 자막 수: {stats['resumed_subtitles']}
             """
             
             self.finished_signal.emit(True, summary)
@@ -1027,6 +1000,9 @@ class SubtitleTranslatorApp(QMainWindow):
                 "batch_size": self.config.batch_size,
                 "max_tokens": self.config.max_tokens,
                 "max_workers": self.config.max_workers,
+                "batching_mode": self.config.batching_mode,
+                "max_batch_cues": self.config.max_batch_cues,
+                "token_budgets": self.config.token_budgets,
                 "input_token_cost": self.config.input_token_cost,
                 "output_token_cost": self.config.output_token_cost,
                 "download_directory": self.download_directory
@@ -1117,6 +1093,7 @@ class SubtitleTranslatorApp(QMainWindow):
         self.translator_thread = TranslationThread(input_file, output_file, self.config)
         self.translator_thread.update_progress.connect(self.update_progress)
         self.translator_thread.update_status.connect(self.update_status)
+        self.translator_thread.subtitle_preview.connect(self.log_output.append)
         self.translator_thread.finished_signal.connect(self.translation_finished)
         self.translator_thread.start()
         
@@ -33,7 +33,7 @@ DATA_FILES = [
 # py2app 옵션
 PY2APP_OPTIONS = {
     'argv_emulation': True,
-    'packages': ['PyQt6', 'anthropic', 'tqdm'],
+    'packages': ['PyQt6', 'anthropic', 'tqdm', 'numpy'],
     'includes': ['subprocess', 'threading', 're', 'sys', 'os', 'json', 'time', 'logging'],
     'iconfile': 'icon.icns',  # 아이콘 파일 (생성 후 주석 해제)
     'plist': {
@@ -59,5 +59,6 @@ setup(
         'PyQt6',
         'anthropic',
         'tqdm',
+        'numpy',
     ],
 )
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Batch API 로컬 스텁 서버
+
+네트워크나 API 키 없이 --batch-api 모드를 시험하기 위한 간단한 HTTP 서버입니다.
+Anthropic Message Batches API와 OpenAI Files/Batch API 중 번역기가 사용하는
+엔드포인트만 흉내 내며, 요청한 자막을 그대로 <korean_subtitles> 태그로 감싸 돌려줍니다.
+구조화 응답 요청(Claude tools / OpenAI response_format)에는 "id|본문" 줄을
+{"subtitles": [{"id", "text"}]} 형식으로 바꿔 도구 호출 또는 JSON으로 돌려줍니다.
+
+사용 예:
+    python batch_stub_server.py --port 8765
+
+    config.json:
+    "api_base_urls": {"claude": "http://127.0.0.1:8765", "openai": "http://127.0.0.1:8765/v1"}
+"""
+
+import argparse
+import email.parser
+import email.policy
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+class BatchStubState:
+    """제출된 배치 작업과 업로드된 파일을 메모리에 보관"""
+
+    def __init__(self, processing_seconds: float):
+        """
+        Args:
+            processing_seconds: 작업이 완료 상태가 되기까지 걸리는 시간(초)
+        """
+        self.processing_seconds = processing_seconds
+        self.lock = threading.RLock()
+        self.batches: Dict[str, Dict] = {}
+        self.files: Dict[str, bytes] = {}
+
+    def new_id(self, prefix: str) -> str:
+        return f"{prefix}{uuid.uuid4().hex[:24]}"
+
+    def is_done(self, batch: Dict) -> bool:
+        return time.time() - batch["created"] >= self.processing_seconds
+
+
+def translate_content(content: str) -> str:
+    """번역 대신 사용자 메시지의 자막을 그대로 태그로 감싸 반환"""
+    return f"<korean_subtitles>\n{content.strip()}\n</korean_subtitles>"
+
+
+def structured_content(content: str) -> Dict:
+    """번역 대신 "id|본문" 줄을 구조화 응답 형식의 객체로 변환"""
+    items = []
+    for line in content.strip().splitlines():
+        cue_id, sep, text = line.partition("|")
+        if sep and cue_id.strip().isdigit():
+            items.append({"id": int(cue_id), "text": text.strip()})
+    return {"subtitles": items}
+
+
+def user_content(messages: List[Dict]) -> str:
+    """메시지 목록에서 마지막 사용자 메시지의 텍스트 추출"""
+    for message in reversed(messages):
+        if message.get("role") != "user":
+            continue
+        content = message.get("content", "")
+        if isinstance(content, list):
+            return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        return content
+    return ""
+
+
+class BatchStubHandler(BaseHTTPRequestHandler):
+    """Anthropic/OpenAI 배치 엔드포인트 처리"""
+
+    state: BatchStubState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, data: Dict, status: int = 200) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self._send_bytes(body, "application/json", status)
+
+    def _send_bytes(self, body: bytes, content_type: str, status: int = 200) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _not_found(self) -> None:
+        self._send_json({"error": {"type": "not_found_error", "message": self.path}}, 404)
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path == "/v1/messages/batches":
+            self._anthropic_create()
+        elif path == "/v1/files":
+            self._openai_upload()
+        elif path == "/v1/batches":
+            self._openai_create()
+        else:
+            self._not_found()
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        match = re.fullmatch(r"/v1/messages/batches/([^/]+)(/results)?", path)
+        if match:
+            if match.group(2):
+                self._anthropic_results(match.group(1))
+            else:
+                self._anthropic_retrieve(match.group(1))
+            return
+
+        match = re.fullmatch(r"/v1/batches/([^/]+)", path)
+        if match:
+            self._openai_retrieve(match.group(1))
+            return
+
+        match = re.fullmatch(r"/v1/files/([^/]+)/content", path)
+        if match:
+            self._openai_file_content(match.group(1))
+            return
+
+        self._not_found()
+
+    # Anthropic Message Batches API
+
+    def _anthropic_batch(self, batch: Dict) -> Dict:
+        done = self.state.is_done(batch)
+        total = len(batch["requests"])
+        host = self.headers.get("Host", "127.0.0.1")
+        return {
+            "id": batch["id"],
+            "type": "message_batch",
+            "processing_status": "ended" if done else "in_progress",
+            "request_counts": {
+                "processing": 0 if done else total,
+                "succeeded": total if done else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0
+            },
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(batch["created"])),
+            "expires_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(batch["created"] + 86400)),
+            "ended_at": None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"http://{host}/v1/messages/batches/{batch['id']}/results" if done else None
+        }
+
+    def _anthropic_create(self):
+        data = json.loads(self._read_body())
+        batch = {"id": self.state.new_id("msgbatch_"), "created": time.time(), "requests": data["requests"]}
+        with self.state.lock:
+            self.state.batches[batch["id"]] = batch
+        self._send_json(self._anthropic_batch(batch))
+
+    def _anthropic_retrieve(self, batch_id: str):
+        batch = self.state.batches.get(batch_id)
+        if not batch:
+            return self._not_found()
+        self._send_json(self._anthropic_batch(batch))
+
+    def _anthropic_results(self, batch_id: str):
+        batch = self.state.batches.get(batch_id)
+        if not batch or not self.state.is_done(batch):
+            return self._not_found()
+
+        lines = []
+        for request in batch["requests"]:
+            params = request["params"]
+            content = user_content(params.get("messages", []))
+            text = translate_content(content)
+            blocks = [{"type": "text", "text": text}]
+            stop_reason = "end_turn"
+            if params.get("tools"):
+                blocks = [{"type": "tool_use", "id": self.state.new_id("toolu_"),
+                           "name": params["tools"][0]["name"], "input": structured_content(content)}]
+                stop_reason = "tool_use"
+            lines.append(json.dumps({
+                "custom_id": request["custom_id"],
+                "result": {
+                    "type": "succeeded",
+                    "message": {
+                        "id": self.state.new_id("msg_"),
+                        "type": "message",
+                        "role": "assistant",
+                        "model": params.get("model", ""),
+                        "content": blocks,
+                        "stop_reason": stop_reason,
+                        "stop_sequence": None,
+                        "usage": {"input_tokens": len(content) // 4,
+                                  "output_tokens": len(text) // 4}
+                    }
+                }
+            }, ensure_ascii=False))
+        self._send_bytes("\n".join(lines).encode('utf-8'), "application/x-jsonl")
+
+    # OpenAI Files / Batch API
+
+    def _openai_upload(self):
+        content_type = self.headers.get("Content-Type", "")
+        raw = f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + self._read_body()
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(raw)
+
+        file_bytes, filename, purpose = b"", "upload.jsonl", ""
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name == "file":
+                file_bytes = part.get_payload(decode=True)
+                filename = part.get_filename() or filename
+            elif name == "purpose":
+                purpose = part.get_content().strip()
+
+        file_id = self._store_file(file_bytes)
+        self._send_json({
+            "id": file_id,
+            "object": "file",
+            "bytes": len(file_bytes),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed"
+        })
+
+    def _store_file(self, data: bytes) -> str:
+        file_id = self.state.new_id("file-")
+        with self.state.lock:
+            self.state.files[file_id] = data
+        return file_id
+
+    def _openai_batch(self, batch: Dict) -> Dict:
+        done = self.state.is_done(batch)
+        if done and not batch.get("output_file_id"):
+            batch["output_file_id"] = self._store_file(self._openai_output(batch))
+        total = len(batch["requests"])
+        return {
+            "id": batch["id"],
+            "object": "batch",
+            "endpoint": batch["endpoint"],
+            "input_file_id": batch["input_file_id"],
+            "completion_window": "24h",
+            "status": "completed" if done else "in_progress",
+            "output_file_id": batch.get("output_file_id"),
+            "error_file_id": None,
+            "created_at": int(batch["created"]),
+            "request_counts": {"total": total, "completed": total if done else 0, "failed": 0}
+        }
+
+    def _openai_output(self, batch: Dict) -> bytes:
+        lines = []
+        for request in batch["requests"]:
+            body = request["body"]
+            content = user_content(body.get("messages", []))
+            text = translate_content(content)
+            if body.get("response_format"):
+                text = json.dumps(structured_content(content), ensure_ascii=False)
+            lines.append(json.dumps({
+                "id": self.state.new_id("batch_req_"),
+                "custom_id": request["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "request_id": self.state.new_id("req_"),
+                    "body": {
+                        "id": self.state.new_id("chatcmpl-"),
+                        "object": "chat.completion",
+                        "model": body.get("model", ""),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": text},
+                            "finish_reason": "stop"
+                        }],
+                        "usage": {"prompt_tokens": len(content) // 4, "completion_tokens": len(text) // 4,
+                                  "total_tokens": (len(content) + len(text)) // 4}
+                    }
+                },
+                "error": None
+            }, ensure_ascii=False))
+        return "\n".join(lines).encode('utf-8')
+
+    def _openai_create(self):
+        data = json.loads(self._read_body())
+        input_bytes = self.state.files.get(data.get("input_file_id"))
+        if input_bytes is None:
+            return self._not_found()
+
+        requests = [json.loads(line) for line in input_bytes.decode('utf-8').splitlines() if line.strip()]
+        batch = {
+            "id": self.state.new_id("batch_"),
+            "created": time.time(),
+            "endpoint": data.get("endpoint"),
+            "input_file_id": data["input_file_id"],
+            "requests": requests
+        }
+        with self.state.lock:
+            self.state.batches[batch["id"]] = batch
+        self._send_json(self._openai_batch(batch))
+
+    def _openai_retrieve(self, batch_id: str):
+        batch = self.state.batches.get(batch_id)
+        if not batch:
+            return self._not_found()
+        with self.state.lock:
+            data = self._openai_batch(batch)
+        self._send_json(data)
+
+    def _openai_file_content(self, file_id: str):
+        data = self.state.files.get(file_id)
+        if data is None:
+            return self._not_found()
+        self._send_bytes(data, "application/octet-stream")
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8765,
+                  processing_seconds: float = 2.0) -> ThreadingHTTPServer:
+    """
+    스텁 서버 생성 (port=0이면 빈 포트를 자동 선택)
+
+    Args:
+        host: 바인딩할 주소
+        port: 바인딩할 포트
+        processing_seconds: 배치 작업이 완료되기까지 걸리는 시간(초)
+
+    Returns:
+        시작 전의 HTTP 서버 객체 (serve_forever()로 실행)
+    """
+    handler = type("Handler", (BatchStubHandler,), {"state": BatchStubState(processing_seconds)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch API 로컬 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1", help="바인딩할 주소 (기본값: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="바인딩할 포트 (기본값: 8765)")
+    parser.add_argument("--delay", type=float, default=2.0, help="배치 작업 완료까지 걸리는 시간(초) (기본값: 2)")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.delay)
+    host, port = server.server_address[:2]
+    print(f"Batch API 스텁 서버 실행 중: http://{host}:{port}")
+    print(f'  "api_base_urls": {{"claude": "http://{host}:{port}", "openai": "http://{host}:{port}/v1"}}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
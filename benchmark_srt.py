@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+SRT 파싱/직렬화/시간 조정 벤치마크
+
+합성 SRT 파일(BOM, CRLF 줄바꿈, 여러 줄 빈 줄, 시간 중복 포함)을 만들어 SubtitleProcessor의
+parse_srt와 format_srt, 파일 스트리밍 파싱(iter_srt_chunks + iter_cues), TimingEngine의 시간
+중복 조정을 반복 실행하고 초당 처리한 자막 수를 출력합니다. 파서나 자막 레코드, 시간 조정을 바꿀 때 전후 속도를 비교하는 용도입니다.
+
+사용 예:
+    python benchmark_srt.py --cues 100000 --repeat 5
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from subtitle import SubtitleCue, SubtitleFileHandler, SubtitleProcessor, TimingEngine
+
+
+def generate_srt(count: int) -> str:
+    """
+    벤치마크용 합성 SRT 내용 생성
+
+    Args:
+        count: 자막 수
+
+    Returns:
+        BOM과 CRLF 줄바꿈을 포함한 SRT 내용
+    """
+    blocks = []
+    for index in range(1, count + 1):
+        start_ms = index * 2000
+        # 일곱 번째 자막마다 다음 자막과 겹치게 해 시간 중복 조정도 함께 측정
+        end_ms = start_ms + (2600 if index % 7 == 0 else 1500)
+        cue = SubtitleCue(index, start_ms, end_ms,
+                          f"Line number {index} of the lecture.\nSecond line {index}.")
+        blocks.append(cue.to_srt())
+    # 블록 사이 빈 줄을 하나 더 넣어 여러 줄 빈 줄도 함께 측정
+    return '\ufeff' + '\n\n\n'.join(blocks).replace('\n', '\r\n') + '\r\n'
+
+
+def measure(func, repeat: int) -> float:
+    """
+    함수를 반복 실행하고 가장 빠른 실행 시간(초)을 반환
+
+    Args:
+        func: 측정할 함수
+        repeat: 반복 횟수
+
+    Returns:
+        가장 빠른 실행 시간(초)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SRT 파싱/직렬화/시간 조정 벤치마크")
+    parser.add_argument("--cues", type=int, default=100000, help="합성 자막 수 (기본값: 100000)")
+    parser.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수, 가장 빠른 값을 사용 (기본값: 5)")
+    args = parser.parse_args()
+
+    processor = SubtitleProcessor()
+    content = generate_srt(args.cues)
+    cues = processor.parse_srt(content)
+    if len(cues) != args.cues:
+        raise SystemExit(f"파싱된 자막 수가 다릅니다: {len(cues)} != {args.cues}")
+
+    print(f"자막 {args.cues}개, {len(content.encode('utf-8')) / 1024 / 1024:.1f}MB, {args.repeat}회 중 최고 기록")
+    timing = TimingEngine.from_cues(cues)
+
+    def repair():
+        TimingEngine(timing.starts, timing.ends).repair_overlaps(processor.OVERLAP_GAP_MS, processor.MIN_DURATION_MS)
+
+    # 스트리밍 파싱은 실제 번역과 같이 파일을 메모리 매핑으로 읽음
+    file_handler = SubtitleFileHandler()
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix='.srt', delete=False) as file:
+        file.write(content)
+
+    def stream_parse():
+        for _ in processor.iter_cues(file_handler.iter_srt_chunks(file.name)):
+            pass
+
+    try:
+        for name, func in (("parse_srt", lambda: processor.parse_srt(content)),
+                           ("stream_parse", stream_parse),
+                           ("format_srt", lambda: processor.format_srt(cues)),
+                           ("repair_overlaps", repair)):
+            elapsed = measure(func, args.repeat)
+            print(f"  {name:<15} {elapsed * 1000:8.1f}ms  {args.cues / elapsed:12,.0f} 자막/초")
+    finally:
+        os.remove(file.name)
+
+
+if __name__ == "__main__":
+    main()
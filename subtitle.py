@@ -6,16 +6,40 @@ import sys
 import time
 import json
 import argparse
+import hashlib
+import sqlite3
+import asyncio
 import logging
+import math
+import heapq
+import mmap
+import re
+import glob
+import copy
+import random
+import email.utils
+import urllib.parse
+import contextvars
+from array import array
 import anthropic
 import openai
-from typing import List, Dict, Tuple, Optional
-from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from collections import OrderedDict, deque
+from typing import List, Dict, Tuple, Optional, Callable, Iterable, Iterator
 from tqdm import tqdm
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# 현재 배치 작업의 프롬프트 캐시 읽기/쓰기 토큰 집계 (배치 작업 코루틴마다 따로 설정됨)
+_prompt_cache_usage: contextvars.ContextVar = contextvars.ContextVar("prompt_cache_usage", default=None)
+
+# 현재 배치 작업에서 보조 헤지 모델이 번역한 원본 자막 (id(자막) -> 번역한 (제공업체, 모델, 프롬프트 해시))
+_hedge_answers: contextvars.ContextVar = contextvars.ContextVar("hedge_answers", default=None)
+
+# 현재 배치 작업이 속한 번역 작업 (요청 코루틴이 파일별 통계를 기록할 곳)
+_current_job: contextvars.ContextVar = contextvars.ContextVar("current_job", default=None)
+
 class SubtitleTranslationConfig:
     """자막 번역 관련 설정을 관리하는 클래스"""
     
@@ -24,6 +48,28 @@ class SubtitleTranslationConfig:
     DEFAULT_BATCH_SIZE = 5
     DEFAULT_MAX_TOKENS = 8000
     DEFAULT_MAX_WORKERS = 3
+    DEFAULT_BATCHING_MODE = "tokens"
+    DEFAULT_BATCH_INPUT_TOKENS = 1500
+    DEFAULT_BATCH_OUTPUT_TOKENS = 3000
+    DEFAULT_MAX_BATCH_CUES = 100
+    DEFAULT_CONCURRENCY_FLOOR = 1
+    DEFAULT_CONCURRENCY_CEILING = 64
+    DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".subtitle_translator", "translation_cache.sqlite3")
+    DEFAULT_CACHE_MAX_MB = 200
+    DEFAULT_CACHE_MEMORY_ENTRIES = 10000
+    DEFAULT_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".subtitle_translator", "jobs")
+    DEFAULT_THROUGHPUT_FILE = os.path.join(os.path.expanduser("~"), ".subtitle_translator", "throughput.json")
+    DEFAULT_HEDGE_PERCENTILE = 95
+    DEFAULT_RETRY_BUDGETS = {"rate_limit": 8, "server": 4, "timeout": 3, "parse": 2, "size": 0, "other": 2}
+    DEFAULT_RETRY_BASE_DELAY = 1.0
+    DEFAULT_RETRY_MAX_DELAY = 60.0
+    DEFAULT_HEDGE_MIN_SAMPLES = 20
+    DEFAULT_ROUTING_THRESHOLD = 0.25
+    # 제공업체별 기본 빠른 모델과 1M 토큰당 (입력, 출력) 요금
+    DEFAULT_FAST_MODELS = {
+        "claude": ("claude-3-5-haiku-20241022", 0.8, 4.0),
+        "openai": ("gpt-4o-mini", 0.15, 0.6)
+    }
     DEFAULT_CONFIG_FILE = "config.json"
     
     def __init__(self, config_file: Optional[str] = None):
@@ -34,9 +80,100 @@ class SubtitleTranslationConfig:
         self.max_tokens = self.DEFAULT_MAX_TOKENS
         self.max_workers = self.DEFAULT_MAX_WORKERS
         
+        # 배치 구성 설정 ("tokens": 토큰 예산 기반, "count": 고정 개수 기반)
+        self.batching_mode = self.DEFAULT_BATCHING_MODE
+        self.max_batch_cues = self.DEFAULT_MAX_BATCH_CUES
+        # 제공업체/모델별 배치 토큰 예산 (예: {"claude": {"input_tokens": 1500, "output_tokens": 3000}})
+        self.token_budgets = {}
+        
+        # 적응형 동시성 제어 설정 (max_workers는 초기값으로 사용)
+        self.adaptive_concurrency = True
+        self.concurrency_floor = self.DEFAULT_CONCURRENCY_FLOOR
+        self.concurrency_ceiling = self.DEFAULT_CONCURRENCY_CEILING
+        
+        # 응답 스트리밍 여부 (완성된 자막 블록을 도착 즉시 전달)
+        self.streaming = False
+        
+        # 요청/응답 형식 ("srt": SRT 블록 그대로, "compact": 번호와 시간 정보 없이 "id|본문" 줄만 주고받음,
+        # "json": compact 형식으로 보내고 도구 호출/JSON 스키마로 {id, text} 배열을 받음)
+        self.wire_format = "srt"
+        
+        # 제공업체/모델별 분당 요청/토큰 한도 (예: {"claude": {"rpm": 50, "itpm": 30000, "otpm": 8000}})
+        self.rate_limits = {}
+        
+        # 파일 내 중복 자막 제거 여부 (같은 본문은 한 번만 번역)
+        self.dedup = True
+        
+        # 번역 메모리 캐시 설정
+        self.cache_enabled = True
+        self.cache_file = self.DEFAULT_CACHE_FILE
+        self.cache_max_mb = self.DEFAULT_CACHE_MAX_MB
+        self.cache_memory_entries = self.DEFAULT_CACHE_MEMORY_ENTRIES
+        
+        # 중단된 작업 재개용 배치 기록 설정
+        self.resume = True
+        self.journal_dir = self.DEFAULT_JOURNAL_DIR
+        
+        # 모델별 응답 속도 기록 파일 (--estimate의 소요 시간 예측에 사용)
+        self.throughput_file = self.DEFAULT_THROUGHPUT_FILE
+        
+        # Batch API 설정 (요금 배율, 상태 확인 간격(초))
+        self.batch_api_discount = 0.5
+        self.batch_poll_interval = 10
+        self.batch_poll_max_interval = 300
+        
+        # 오류 종류별 재시도 횟수 (rate_limit: 429, server: 5xx/과부하, timeout: 시간 초과/연결 오류,
+        # parse: 응답 형식 오류, size: 요청이 너무 큼(413 등), other: 그 외) 및 재시도 대기 시간 범위(초)
+        self.retry_budgets = dict(self.DEFAULT_RETRY_BUDGETS)
+        self.retry_base_delay = self.DEFAULT_RETRY_BASE_DELAY
+        self.retry_max_delay = self.DEFAULT_RETRY_MAX_DELAY
+        
+        # 응답 검증 후 누락/손상된 자막만 다시 요청하는 횟수
+        self.repair_attempts = 2
+        
+        # 헤지 요청 설정 (지연 시간이 최근 분포의 백분위수를 넘은 배치에 중복 요청을 보냄)
+        # hedge_provider/hedge_model을 지정하면 중복 요청을 다른 제공업체/모델로 보냄 (None이면 같은 모델)
+        self.hedge_enabled = False
+        self.hedge_percentile = self.DEFAULT_HEDGE_PERCENTILE
+        self.hedge_min_samples = self.DEFAULT_HEDGE_MIN_SAMPLES
+        self.hedge_provider = None
+        self.hedge_model = None
+        
+        # 난이도 라우팅 설정 (난이도 점수가 routing_threshold 미만인 쉬운 자막은 빠른 모델로 번역)
+        # fast_provider/fast_model/fast_*_token_cost가 None이면 제공업체별 기본 빠른 모델과 요금 사용
+        self.routing_enabled = False
+        self.routing_threshold = self.DEFAULT_ROUTING_THRESHOLD
+        self.fast_provider = None
+        self.fast_model = None
+        self.fast_input_token_cost = None
+        self.fast_output_token_cost = None
+        
+        # 제공업체별 API 주소 재정의 (프록시나 로컬 테스트 서버용, 예: {"claude": "http://127.0.0.1:8765"})
+        self.api_base_urls = {}
+        
+        # 자막 시간 일괄 조정 (번역 전에 원본 자막 전체에 적용, 0/None이면 사용 안 함)
+        # timing_offset_ms만큼 옮긴 뒤 source_fps -> target_fps 프레임 속도 변환 배율을 곱하고,
+        # 시간 중복을 조정한 다음 min_duration_ms보다 짧은 자막을 늘리고 close_gap_ms 이하 간격을 메움
+        self.timing_offset_ms = 0
+        self.source_fps = None
+        self.target_fps = None
+        self.min_duration_ms = 0
+        self.close_gap_ms = 0
+        
+        # 프롬프트 캐시 설정 (시스템 프롬프트 + 용어집 + 스타일 예시를 캐시 최소 길이 이상으로 고정)
+        # prompt_cache_min_tokens가 None이면 제공업체/모델별 최소 길이 사용
+        self.prompt_cache = True
+        self.prompt_cache_min_tokens = None
+        
+        # 용어집 (원문 용어 -> 번역어, 예: {"large language model": "대규모 언어 모델"})
+        self.glossary = {}
+        
         # 기본 비용 설정 (Claude)
         self.input_token_cost = 3 / 1_000_000  # 1M 토큰당 $3
         self.output_token_cost = 3.75 / 1_000_000  # 1M 토큰당 $3.75
+        # 프롬프트 캐시 읽기/쓰기 토큰의 입력 토큰 대비 요금 배율
+        self.cache_read_cost_ratio = 0.1
+        self.cache_write_cost_ratio = 1.25
         
         # 명령줄 인자 처리
         self.parser = self._create_argument_parser()
@@ -53,12 +190,29 @@ class SubtitleTranslationConfig:
     def _create_argument_parser(self) -> argparse.ArgumentParser:
         """명령줄 인자 파서 생성"""
         parser = argparse.ArgumentParser(description="SRT 자막 번역 도구")
-        parser.add_argument("input_file", help="번역할 SRT 파일 경로")
-        parser.add_argument("-o", "--output", help="번역된 SRT 파일의 출력 경로")
+        parser.add_argument("input_files", nargs="+", metavar="input", help="번역할 SRT 파일, 디렉토리 또는 glob 패턴 (여러 개 지정 가능)")
+        parser.add_argument("-o", "--output", help="번역된 SRT 파일의 출력 경로 (입력 파일이 여러 개이면 출력 디렉토리)")
         parser.add_argument("-p", "--provider", choices=["claude", "openai"], help=f"사용할 AI 제공업체 (기본값: {self.DEFAULT_PROVIDER})")
         parser.add_argument("-m", "--model", help=f"사용할 모델 (기본값: {self.DEFAULT_MODEL})")
-        parser.add_argument("-b", "--batch-size", type=int, help=f"자막 배치 크기 (기본값: {self.DEFAULT_BATCH_SIZE})")
-        parser.add_argument("-w", "--workers", type=int, help=f"병렬 작업자 수 (기본값: {self.DEFAULT_MAX_WORKERS})")
+        parser.add_argument("-b", "--batch-size", type=int, help=f"자막 배치 크기, 지정하면 개수 기반 배치 사용 (기본값: {self.DEFAULT_BATCH_SIZE})")
+        parser.add_argument("--batching", choices=["tokens", "count"], help=f"배치 구성 방식 (기본값: {self.DEFAULT_BATCHING_MODE})")
+        parser.add_argument("-w", "--workers", type=int, help=f"동시 번역 요청 수 (기본값: {self.DEFAULT_MAX_WORKERS})")
+        parser.add_argument("--no-adaptive", action="store_true", help="동시 요청 수 자동 조정을 끄고 -w 값으로 고정")
+        parser.add_argument("--stream", action="store_true", help="응답을 스트리밍으로 받아 완성된 자막부터 처리")
+        parser.add_argument("--compact", action="store_true", help="번호와 시간 정보 없이 \"id|본문\" 줄만 주고받아 출력 토큰 절약")
+        parser.add_argument("--structured", action="store_true", help="도구 호출/JSON 스키마로 {id, text} 배열을 받아 태그 추출 실패 방지")
+        parser.add_argument("--no-dedup", action="store_true", help="파일 내 중복 자막도 각각 번역")
+        parser.add_argument("--no-cache", action="store_true", help="번역 메모리 캐시를 사용하지 않음 (기본값: 번역한 자막을 ~/.subtitle_translator/translation_cache.sqlite3에 저장)")
+        parser.add_argument("--no-resume", action="store_true", help="중단된 이전 작업을 이어받지 않고 처음부터 번역")
+        parser.add_argument("--batch-api", action="store_true", help="실시간 API 대신 저렴한 비동기 Batch API로 번역 (결과까지 최대 24시간)")
+        parser.add_argument("--hedge", action="store_true", help="응답이 늦은 배치에 중복 요청을 보내 먼저 도착한 결과 사용")
+        parser.add_argument("--route", action="store_true", help="쉬운 자막(짧은 감탄사, 효과음 등)은 빠르고 저렴한 모델로 번역")
+        parser.add_argument("--offset", type=int, metavar="MS", help="모든 자막 시간을 밀리초 단위로 이동 (음수면 앞당김)")
+        parser.add_argument("--fps", metavar="SOURCE:TARGET", help="프레임 속도 변환에 맞춰 자막 시간 배율 조정 (예: 23.976:25)")
+        parser.add_argument("--min-duration", type=int, metavar="MS", help="이 길이보다 짧은 자막을 다음 자막 직전까지 늘림")
+        parser.add_argument("--close-gaps", type=int, metavar="MS", help="이 길이 이하의 자막 사이 간격을 앞 자막을 늘려 메움")
+        parser.add_argument("--range", metavar="START-END", help="시간 구간(예: 40:00-45:00) 또는 자막 번호 구간(예: 120-180)만 번역해 출력 파일에 끼워 넣음")
+        parser.add_argument("--estimate", action="store_true", help="요청을 보내지 않고 예상 비용, 요청 수, 소요 시간만 출력")
         parser.add_argument("-c", "--config", help=f"설정 파일 경로 (기본값: {self.DEFAULT_CONFIG_FILE})")
         parser.add_argument("--gen-config", action="store_true", help="현재 설정으로 기본 설정 파일 생성 후 종료")
         return parser
@@ -75,8 +229,54 @@ class SubtitleTranslationConfig:
             self.batch_size = config.get('batch_size', self.batch_size)
             self.max_tokens = config.get('max_tokens', self.max_tokens)
             self.max_workers = config.get('max_workers', self.max_workers)
+            self.batching_mode = config.get('batching_mode', self.batching_mode)
+            self.max_batch_cues = config.get('max_batch_cues', self.max_batch_cues)
+            self.token_budgets = config.get('token_budgets', self.token_budgets)
+            self.adaptive_concurrency = config.get('adaptive_concurrency', self.adaptive_concurrency)
+            self.concurrency_floor = config.get('concurrency_floor', self.concurrency_floor)
+            self.concurrency_ceiling = config.get('concurrency_ceiling', self.concurrency_ceiling)
+            self.rate_limits = config.get('rate_limits', self.rate_limits)
+            self.streaming = config.get('streaming', self.streaming)
+            self.wire_format = config.get('wire_format', self.wire_format)
+            self.dedup = config.get('dedup', self.dedup)
+            self.cache_enabled = config.get('cache_enabled', self.cache_enabled)
+            self.cache_file = config.get('cache_file', self.cache_file)
+            self.cache_max_mb = config.get('cache_max_mb', self.cache_max_mb)
+            self.cache_memory_entries = config.get('cache_memory_entries', self.cache_memory_entries)
+            self.resume = config.get('resume', self.resume)
+            self.journal_dir = config.get('journal_dir', self.journal_dir)
+            self.throughput_file = config.get('throughput_file', self.throughput_file)
+            self.batch_api_discount = config.get('batch_api_discount', self.batch_api_discount)
+            self.batch_poll_interval = config.get('batch_poll_interval', self.batch_poll_interval)
+            self.batch_poll_max_interval = config.get('batch_poll_max_interval', self.batch_poll_max_interval)
+            self.api_base_urls = config.get('api_base_urls', self.api_base_urls)
+            self.timing_offset_ms = config.get('timing_offset_ms', self.timing_offset_ms)
+            self.source_fps = config.get('source_fps', self.source_fps)
+            self.target_fps = config.get('target_fps', self.target_fps)
+            self.min_duration_ms = config.get('min_duration_ms', self.min_duration_ms)
+            self.close_gap_ms = config.get('close_gap_ms', self.close_gap_ms)
+            self.retry_budgets = {**self.retry_budgets, **config.get('retry_budgets', {})}
+            self.retry_base_delay = config.get('retry_base_delay', self.retry_base_delay)
+            self.retry_max_delay = config.get('retry_max_delay', self.retry_max_delay)
+            self.repair_attempts = config.get('repair_attempts', self.repair_attempts)
+            self.hedge_enabled = config.get('hedge_enabled', self.hedge_enabled)
+            self.hedge_percentile = config.get('hedge_percentile', self.hedge_percentile)
+            self.hedge_min_samples = config.get('hedge_min_samples', self.hedge_min_samples)
+            self.hedge_provider = config.get('hedge_provider', self.hedge_provider)
+            self.hedge_model = config.get('hedge_model', self.hedge_model)
+            self.routing_enabled = config.get('routing_enabled', self.routing_enabled)
+            self.routing_threshold = config.get('routing_threshold', self.routing_threshold)
+            self.fast_provider = config.get('fast_provider', self.fast_provider)
+            self.fast_model = config.get('fast_model', self.fast_model)
+            self.fast_input_token_cost = config.get('fast_input_token_cost', self.fast_input_token_cost)
+            self.fast_output_token_cost = config.get('fast_output_token_cost', self.fast_output_token_cost)
+            self.prompt_cache = config.get('prompt_cache', self.prompt_cache)
+            self.prompt_cache_min_tokens = config.get('prompt_cache_min_tokens', self.prompt_cache_min_tokens)
+            self.glossary = config.get('glossary', self.glossary)
             self.input_token_cost = config.get('input_token_cost', self.input_token_cost)
             self.output_token_cost = config.get('output_token_cost', self.output_token_cost)
+            self.cache_read_cost_ratio = config.get('cache_read_cost_ratio', self.cache_read_cost_ratio)
+            self.cache_write_cost_ratio = config.get('cache_write_cost_ratio', self.cache_write_cost_ratio)
             
             # provider에 따른 기본 모델 설정
             self._update_model_defaults()
@@ -89,15 +289,19 @@ class SubtitleTranslationConfig:
         if self.provider == "openai":
             if self.model == self.DEFAULT_MODEL:  # 기본 Claude 모델인 경우
                 self.model = "gpt-4o"
-            # OpenAI 가격 설정 (GPT-4o 기준)
+            # OpenAI 가격 설정 (GPT-4o 기준, 캐시된 입력은 50% 할인, 캐시 쓰기 요금 없음)
             self.input_token_cost = 2.5 / 1_000_000  # 1M 토큰당 $2.5
             self.output_token_cost = 10 / 1_000_000  # 1M 토큰당 $10
+            self.cache_read_cost_ratio = 0.5
+            self.cache_write_cost_ratio = 1.0
         elif self.provider == "claude":
             if "gpt" in self.model.lower():  # OpenAI 모델인 경우
                 self.model = self.DEFAULT_MODEL
-            # Claude 가격 설정
+            # Claude 가격 설정 (캐시 읽기 0.1배, 5분 캐시 쓰기 1.25배)
             self.input_token_cost = 3 / 1_000_000  # 1M 토큰당 $3
             self.output_token_cost = 3.75 / 1_000_000  # 1M 토큰당 $3.75
+            self.cache_read_cost_ratio = 0.1
+            self.cache_write_cost_ratio = 1.25
     
     def parse_args(self) -> argparse.Namespace:
         """명령줄 인자 파싱 및 설정 업데이트"""
@@ -113,12 +317,95 @@ class SubtitleTranslationConfig:
             self._update_model_defaults()  # provider 변경 시 기본값 업데이트
         if args.model:
             self.model = args.model
+        if args.batching:
+            self.batching_mode = args.batching
         if args.batch_size:
             self.batch_size = args.batch_size
+            # 개수를 직접 지정하면 개수 기반으로 묶음 (토큰 기반에서는 batch_size를 쓰지 않음)
+            if not args.batching:
+                self.batching_mode = "count"
+            elif self.batching_mode == "tokens":
+                logging.warning("--batching tokens에서는 배치를 토큰 예산으로 구성하므로 -b/--batch-size 값은 사용되지 않습니다.")
         if args.workers:
             self.max_workers = args.workers
+        if args.no_adaptive:
+            self.adaptive_concurrency = False
+        if args.stream:
+            self.streaming = True
+        if args.compact:
+            self.wire_format = "compact"
+        if args.structured:
+            self.wire_format = "json"
+        if args.no_dedup:
+            self.dedup = False
+        if args.no_cache:
+            self.cache_enabled = False
+        if args.no_resume:
+            self.resume = False
+        if args.hedge:
+            self.hedge_enabled = True
+        if args.route:
+            self.routing_enabled = True
+        if args.offset is not None:
+            self.timing_offset_ms = args.offset
+        if args.fps:
+            try:
+                source_fps, target_fps = (float(value) for value in args.fps.split(':'))
+            except ValueError:
+                self.parser.error(f"--fps는 SOURCE:TARGET 형식이어야 합니다: {args.fps}")
+            if source_fps <= 0 or target_fps <= 0:
+                self.parser.error(f"--fps 값은 0보다 커야 합니다: {args.fps}")
+            self.source_fps, self.target_fps = source_fps, target_fps
+        if args.min_duration is not None:
+            self.min_duration_ms = args.min_duration
+        if args.close_gaps is not None:
+            self.close_gap_ms = args.close_gaps
+        if args.range:
+            if args.batch_api or args.estimate:
+                self.parser.error("--range는 --batch-api, --estimate와 함께 쓸 수 없습니다.")
+            try:
+                args.range = SrtIndex.parse_range(args.range)
+            except ValueError as e:
+                self.parser.error(f"--range 형식이 올바르지 않습니다: {e}")
         
         return args
+    
+    def get_batch_token_budget(self) -> Tuple[int, int]:
+        """
+        현재 제공업체/모델에 해당하는 배치 토큰 예산을 반환
+        
+        모델 이름에 대한 설정이 제공업체 설정보다 우선합니다.
+        출력 예산은 max_tokens를 넘지 않도록 제한됩니다.
+        
+        Returns:
+            (입력 토큰 예산, 출력 토큰 예산)
+        """
+        budget = {}
+        budget.update(self.token_budgets.get(self.provider, {}))
+        budget.update(self.token_budgets.get(self.model, {}))
+        
+        input_budget = budget.get('input_tokens', self.DEFAULT_BATCH_INPUT_TOKENS)
+        output_budget = budget.get('output_tokens', self.DEFAULT_BATCH_OUTPUT_TOKENS)
+        
+        # 응답이 max_tokens에서 잘리지 않도록 여유를 둠
+        if self.max_tokens > 0:
+            output_budget = min(output_budget, int(self.max_tokens * 0.8))
+            
+        return input_budget, output_budget
+    
+    def get_rate_limits(self) -> Dict[str, int]:
+        """
+        현재 제공업체/모델에 해당하는 분당 한도를 반환
+        
+        모델 이름에 대한 설정이 제공업체 설정보다 우선합니다.
+        
+        Returns:
+            한도 딕셔너리 (rpm: 요청 수, tpm: 전체 토큰, itpm: 입력 토큰, otpm: 출력 토큰)
+        """
+        limits = {}
+        limits.update(self.rate_limits.get(self.provider, {}))
+        limits.update(self.rate_limits.get(self.model, {}))
+        return limits
 
 
 class SubtitleFileHandler:
@@ -127,6 +414,9 @@ class SubtitleFileHandler:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
+    # 메모리 매핑한 파일에서 한 번에 디코딩하는 크기 (조각은 이 크기 뒤의 첫 줄바꿈에서 끝남)
+    READ_CHUNK_BYTES = 1 << 20
+    
     def read_srt_file(self, file_path: str) -> str:
         """
         지정된 경로에서 SRT 파일을 읽어 내용을 문자열로 반환
@@ -158,6 +448,102 @@ class SubtitleFileHandler:
             self.logger.error(f"파일 읽기 중 예상치 못한 오류: {e}")
             raise
     
+    def iter_srt_chunks(self, file_path: str) -> Iterator[str]:
+        """
+        SRT 파일을 메모리 매핑으로 열어 줄 경계에서 나눈 내용 조각을 차례로 반환
+        
+        read_srt_file과 같이 UTF-8로 읽고 CRLF/CR 줄바꿈을 LF로 바꾸지만 파일 전체를 한
+        문자열로 만들지 않으므로, 매우 큰 파일이나 여러 파일을 이어 붙인 파일도 일정한
+        메모리로 읽을 수 있습니다. 조각은 항상 줄바꿈 바로 뒤에서 끝나므로 멀티바이트
+        문자나 CRLF가 조각 사이에서 잘리지 않습니다(CR 줄바꿈만 쓰는 파일은 한 조각이 됨).
+        
+        Args:
+            file_path: 읽을 SRT 파일 경로
+            
+        Returns:
+            파일 내용 조각 생성기
+            
+        Raises:
+            FileNotFoundError: 파일이 존재하지 않는 경우
+            PermissionError: 파일 접근 권한이 없는 경우
+            UnicodeDecodeError: 파일 인코딩 문제가 있는 경우
+        """
+        try:
+            with open(file_path, 'rb') as file:
+                # 빈 파일은 메모리 매핑할 수 없음
+                if os.fstat(file.fileno()).st_size == 0:
+                    return
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    start = 0
+                    size = len(mapped)
+                    while start < size:
+                        end = mapped.find(b'\n', min(start + self.READ_CHUNK_BYTES, size) - 1)
+                        end = size if end < 0 else end + 1
+                        chunk = mapped[start:end].decode('utf-8')
+                        yield chunk.replace('\r\n', '\n').replace('\r', '\n')
+                        start = end
+        except FileNotFoundError:
+            self.logger.error(f"파일을 찾을 수 없습니다: {file_path}")
+            raise
+        except PermissionError:
+            self.logger.error(f"파일 접근 권한이 없습니다: {file_path}")
+            raise
+        except UnicodeDecodeError:
+            self.logger.error(f"파일 인코딩 문제가 발생했습니다. UTF-8이 아닐 수 있습니다: {file_path}")
+            raise
+        except Exception as e:
+            self.logger.error(f"파일 읽기 중 예상치 못한 오류: {e}")
+            raise
+    
+    def find_srt_files(self, paths: List[str]) -> List[str]:
+        """
+        파일, 디렉토리, glob 패턴 목록을 번역할 SRT 파일 목록으로 확장
+        
+        디렉토리는 하위 디렉토리까지 검색하며, 디렉토리와 glob 패턴에서는
+        이미 번역된 출력 파일(*_ko.srt)을 제외합니다.
+        
+        Args:
+            paths: 파일 경로, 디렉토리 경로 또는 glob 패턴 목록
+            
+        Returns:
+            중복 없이 정렬된 SRT 파일 경로 목록
+        """
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                matches = glob.glob(os.path.join(glob.escape(path), '**', '*.srt'), recursive=True)
+                files.extend(match for match in matches if not match.endswith('_ko.srt'))
+            elif os.path.exists(path):
+                files.append(path)
+            else:
+                matches = [match for match in glob.glob(path, recursive=True)
+                           if os.path.isfile(match) and not match.endswith('_ko.srt')]
+                if not matches:
+                    self.logger.warning(f"일치하는 파일이 없습니다: {path}")
+                files.extend(matches)
+                
+        # 같은 파일이 여러 패턴에 걸려도 한 번만 번역
+        unique = {}
+        for file in files:
+            unique.setdefault(os.path.abspath(file), file)
+        return sorted(unique.values())
+    
+    @staticmethod
+    def make_output_path(input_file: str, output_dir: Optional[str] = None) -> str:
+        """
+        입력 파일 이름에 _ko를 붙인 출력 파일 경로 생성
+        
+        Args:
+            input_file: 입력 SRT 파일 경로
+            output_dir: 출력 디렉토리 (없으면 입력 파일과 같은 디렉토리)
+            
+        Returns:
+            출력 파일 경로
+        """
+        base, ext = os.path.splitext(os.path.basename(input_file))
+        output_dir = output_dir or os.path.dirname(os.path.abspath(input_file))
+        return os.path.join(output_dir, f"{base}_ko{ext}")
+    
     def write_srt_file(self, file_path: str, content: str) -> None:
         """
         주어진 내용을 SRT 파일로 저장
@@ -197,548 +583,4840 @@ class SubtitleFileHandler:
         Returns:
             형식이 유효하면 True, 그렇지 않으면 False
         """
-        if not content.strip():
-            return False
-            
-        lines = content.strip().split('\n')
-        if len(lines) < 4:  # 최소한 하나의 자막에는 번호, 시간, 내용, 빈 줄이 필요
-            return False
+        return self.validate_srt_stream([content])
+    
+    def validate_srt_stream(self, chunks: Iterable[str]) -> bool:
+        """
+        SRT 내용 조각을 앞에서부터 읽으며 형식이 유효한지 검증
+        
+        유효하다고 판단되는 즉시 멈추므로 파일의 앞부분만 읽습니다.
+        
+        Args:
+            chunks: 검증할 SRT 내용 조각 (iter_srt_chunks 등)
             
-        return True
+        Returns:
+            형식이 유효하면 True, 그렇지 않으면 False
+        """
+        head = ''
+        for chunk in chunks:
+            head = (head + chunk).lstrip()
+            if head.rstrip().count('\n') >= 3:  # 최소한 하나의 자막에는 번호, 시간, 내용, 빈 줄이 필요
+                return True
+        return False
 
 
-class SubtitleProcessor:
-    """자막 처리 로직을 담당하는 클래스"""
+class SubtitleCue:
+    """
+    자막 하나 (번호, 시작/종료 시각(밀리초 정수), 본문)
     
-    def __init__(self):
-        self.logger = logging.getLogger(__name__)
+    시각을 정수 밀리초로 보관하므로 파싱과 포맷을 반복해도 반올림 오차가 쌓이지 않습니다.
+    자막 수가 많은 파일에서도 메모리를 적게 쓰도록 __slots__를 사용합니다.
+    """
+    
+    __slots__ = ("index", "start_ms", "end_ms", "text")
+    
+    def __init__(self, index: int, start_ms: int, end_ms: int, text: str):
+        self.index = index
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.text = text
     
-    def split_subtitles(self, srt_content: str) -> List[str]:
+    def __repr__(self) -> str:
+        return f"SubtitleCue({self.index}, {self.start_ms}, {self.end_ms}, {self.text!r})"
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SubtitleCue):
+            return NotImplemented
+        return (self.index, self.start_ms, self.end_ms, self.text) == (other.index, other.start_ms, other.end_ms, other.text)
+    
+    @staticmethod
+    def format_timestamp(ms: int) -> str:
+        """밀리초를 시간 문자열(00:00:00,000)로 변환"""
+        seconds, milliseconds = divmod(max(0, ms), 1000)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+    
+    @property
+    def timing(self) -> str:
+        """시간 정보 줄 (00:00:00,000 --> 00:00:00,000)"""
+        return f"{self.format_timestamp(self.start_ms)} --> {self.format_timestamp(self.end_ms)}"
+    
+    def with_text(self, text: str) -> "SubtitleCue":
+        """번호와 시간 정보는 같고 본문만 바꾼 자막"""
+        return SubtitleCue(self.index, self.start_ms, self.end_ms, text)
+    
+    def to_srt(self, index: Optional[int] = None) -> str:
         """
-        SRT 내용을 개별 자막으로 분할
+        SRT 블록 문자열로 변환
         
         Args:
-            srt_content: 원본 SRT 내용
-            
-        Returns:
-            개별 자막 목록
+            index: 대신 쓸 자막 번호 (None이면 원래 번호)
         """
-        if not srt_content.strip():
-            self.logger.warning("빈 SRT 내용입니다.")
-            return []
-            
-        return srt_content.strip().split('\n\n')
+        return f"{self.index if index is None else index}\n{self.timing}\n{self.text}"
+
+
+class TokenEstimator:
+    """네트워크 호출 없이 텍스트의 토큰 수를 근사 계산하는 클래스"""
+    
+    # 문자 종류별로 토큰 분할 양상이 다르므로 조각 단위로 나누어 계산
+    _TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[\uac00-\ud7a3]+|\S")
+    
+    # 제공업체별 보정 계수 (Claude 토크나이저가 같은 텍스트를 약간 더 잘게 나눔)
+    PROVIDER_FACTORS = {
+        "claude": 1.15,
+        "openai": 1.0,
+    }
     
-    def create_batches(self, subtitles: List[str], batch_size: int) -> List[str]:
+    # 영어 자막 텍스트를 한국어로 번역했을 때의 토큰 증가 비율
+    KOREAN_OUTPUT_RATIOS = {
+        "claude": 2.0,
+        "openai": 1.4,
+    }
+    
+    # 응답의 태그 등 고정 오버헤드
+    RESPONSE_OVERHEAD_TOKENS = 20
+    
+    # 구조화 응답에서 자막 하나마다 붙는 JSON 문법({"id": .., "text": ".."},) 토큰
+    STRUCTURED_CUE_OVERHEAD_TOKENS = 8
+    
+    def __init__(self, provider: str = "claude", compact: bool = False, structured: bool = False):
+        self.provider = provider
+        self.compact = compact or structured
+        self.structured = structured
+        self.factor = self.PROVIDER_FACTORS.get(provider, 1.15)
+        self.output_ratio = self.KOREAN_OUTPUT_RATIOS.get(provider, 2.0)
+    
+    def count(self, text: str) -> int:
         """
-        자막 목록을 지정된 크기의 배치로 나눔
+        텍스트의 토큰 수를 추정
         
         Args:
-            subtitles: 자막 목록
-            batch_size: 배치 크기
+            text: 토큰 수를 셀 텍스트
             
         Returns:
-            배치 목록
+            추정 토큰 수
         """
-        if not subtitles:
-            return []
+        if not text:
+            return 0
             
-        return ['\n\n'.join(subtitles[i:i+batch_size]) for i in range(0, len(subtitles), batch_size)]
+        tokens = 0
+        for piece in self._TOKEN_PATTERN.findall(text):
+            first = piece[0]
+            if first.isascii() and first.isalpha():
+                # 영어 단어는 대략 4글자당 1토큰
+                tokens += math.ceil(len(piece) / 4)
+            elif first.isdigit():
+                # 숫자는 3자리 단위로 분할됨
+                tokens += math.ceil(len(piece) / 3)
+            elif '\uac00' <= first <= '\ud7a3':
+                # 한글 음절은 대략 음절당 1토큰
+                tokens += len(piece)
+            else:
+                tokens += 1
+                
+        return math.ceil(tokens * self.factor)
+    
+    def _header_tokens(self, cue: SubtitleCue) -> Tuple[int, int]:
+        """자막의 (머리 줄 토큰 수, 본문 토큰 수) (compact 형식은 번호와 구분자만 셈)"""
+        header = f"{cue.index}|" if self.compact else f"{cue.index}\n{cue.timing}"
+        return self.count(header), self.count(cue.text)
     
-    def renumber_subtitles(self, srt: str) -> str:
+    def estimate_subtitle_input(self, cue: SubtitleCue) -> int:
         """
-        번역된 자막의 번호를 1부터 순차적으로 다시 매김
+        자막 하나를 요청에 담았을 때의 입력 토큰 수를 추정
         
         Args:
-            srt: 재번호 매길 SRT 내용
+            cue: 원본 자막
             
         Returns:
-            재번호 매긴 SRT 내용
+            추정 입력 토큰 수
         """
-        if not srt.strip():
-            return ""
-            
-        subtitles = srt.strip().split('\n\n')
-        new_subtitles = []
-        counter = 1
+        header_tokens, text_tokens = self._header_tokens(cue)
+        return header_tokens + text_tokens + 1
     
-        for subtitle in subtitles:
-            lines = subtitle.strip().split('\n')
-            if len(lines) >= 2:  # 자막 번호와 시간 정보 등이 있어야 함
-                # 첫 번째 줄을 자막 번호로 대체
-                lines[0] = str(counter)
-                counter += 1
-                new_subtitles.append('\n'.join(lines))
-    
-        return '\n\n'.join(new_subtitles)
-        
-    def _parse_timestamp(self, timestamp: str) -> float:
+    def estimate_subtitle_output(self, cue: SubtitleCue) -> int:
         """
-        시간 문자열(00:00:00,000)을 초 단위 부동소수점으로 변환
+        자막 하나를 번역했을 때의 출력 토큰 수를 추정
+        
+        번호와 시간 정보 줄은 그대로 반복되고(compact 형식은 번호만, 구조화 응답은
+        번호와 JSON 문법), 본문만 한국어로 바뀐다고 가정합니다.
         
         Args:
-            timestamp: 시간 문자열 (00:00:00,000 형식)
+            cue: 원본 자막
             
         Returns:
-            초 단위 시간 (부동소수점)
+            추정 출력 토큰 수
         """
-        # 시간 형식: 00:00:00,000
-        hours, minutes, seconds = timestamp.split(':')
-        seconds, milliseconds = seconds.split(',')
-        
-        total_seconds = (int(hours) * 3600) + (int(minutes) * 60) + int(seconds) + (int(milliseconds) / 1000)
-        return total_seconds
-        
-    def _format_timestamp(self, seconds: float) -> str:
+        header_tokens, text_tokens = self._header_tokens(cue)
+        if self.structured:
+            header_tokens += self.STRUCTURED_CUE_OVERHEAD_TOKENS
+        return header_tokens + math.ceil(text_tokens * self.output_ratio) + 1
+
+
+class CueBatcher:
+    """
+    자막을 하나씩 받아 배치를 채우는 클래스
+    
+    다음 자막을 담으면 토큰 예산이나 최대 자막 수를 넘을 때 지금까지 담은 자막을
+    배치로 내보내므로, 자막 생성기를 끝까지 읽지 않고도 배치를 만들 수 있습니다.
+    """
+    
+    def __init__(self, estimator: Optional[TokenEstimator] = None, input_budget: Optional[int] = None,
+                 output_budget: Optional[int] = None, max_cues: Optional[int] = None):
+        """
+        Args:
+            estimator: 토큰 추정기 (None이면 자막 수로만 나눔)
+            input_budget: 배치당 입력 토큰 예산
+            output_budget: 배치당 예상 출력 토큰 예산
+            max_cues: 배치당 최대 자막 수 (None이면 제한 없음)
         """
-        초 단위 부동소수점을 시간 문자열(00:00:00,000)로 변환
+        self.estimator = estimator
+        self.input_budget = input_budget
+        self.output_budget = output_budget
+        self.max_cues = max_cues
+        self.current: List[SubtitleCue] = []
+        self._reset()
+    
+    def _reset(self) -> None:
+        """빈 배치로 다시 시작"""
+        self.current = []
+        self.current_input = 0
+        self.current_output = self.estimator.RESPONSE_OVERHEAD_TOKENS if self.estimator else 0
+    
+    def add(self, subtitle: SubtitleCue) -> Optional[List[SubtitleCue]]:
+        """
+        자막을 배치에 담음
         
         Args:
-            seconds: 초 단위 시간 (부동소수점)
+            subtitle: 담을 자막
             
         Returns:
-            시간 문자열 (00:00:00,000 형식)
+            이 자막을 담기 전에 가득 차서 내보낸 배치 (없으면 None)
         """
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        milliseconds = int((seconds - int(seconds)) * 1000)
+        input_tokens = output_tokens = 0
+        over_budget = False
+        if self.estimator:
+            input_tokens = self.estimator.estimate_subtitle_input(subtitle)
+            output_tokens = self.estimator.estimate_subtitle_output(subtitle)
+            over_budget = (self.current_input + input_tokens > self.input_budget or
+                           self.current_output + output_tokens > self.output_budget)
+        too_many = self.max_cues is not None and len(self.current) >= self.max_cues
         
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+        finished = None
+        if self.current and (over_budget or too_many):
+            finished = self.flush()
+            
+        self.current.append(subtitle)
+        self.current_input += input_tokens
+        self.current_output += output_tokens
+        return finished
+    
+    def flush(self) -> Optional[List[SubtitleCue]]:
+        """
+        담고 있는 자막을 배치로 내보냄
         
-    def check_timestamp_overlaps(self, srt: str) -> str:
+        Returns:
+            배치 (담은 자막이 없으면 None)
+        """
+        finished = self.current or None
+        self._reset()
+        return finished
+    
+    def batches(self, subtitles: Iterable[SubtitleCue]) -> Iterator[List[SubtitleCue]]:
         """
-        자막 시간이 중복되는지 확인하고 중복된 경우 조정
+        자막을 차례로 담으며 가득 찬 배치를 하나씩 반환
         
         Args:
-            srt: 검사할 SRT 내용
+            subtitles: 자막 목록 또는 생성기
             
         Returns:
-            시간 중복이 해결된, 조정된 SRT 내용
+            배치 생성기
         """
-        if not srt.strip():
-            return ""
-            
-        subtitles = srt.strip().split('\n\n')
-        adjusted_subtitles = []
-        
-        # 이전 자막의 종료 시간을 추적
-        prev_end_time = 0
-        
         for subtitle in subtitles:
-            lines = subtitle.strip().split('\n')
-            if len(lines) < 2:  # 최소한 자막 번호와 시간 정보가 필요
-                adjusted_subtitles.append(subtitle)
-                continue
-                
-            # 시간 정보 파싱
-            try:
-                time_line = lines[1]
-                start_time_str, end_time_str = time_line.split(' --> ')
-                
-                start_time = self._parse_timestamp(start_time_str)
-                end_time = self._parse_timestamp(end_time_str)
-                
-                # 시작 시간이 이전 자막 종료 시간보다 빠르면 조정
-                if start_time < prev_end_time:
-                    self.logger.warning(f"시간 중복 감지: 이전 종료 {self._format_timestamp(prev_end_time)}, 현재 시작 {start_time_str}")
-                    # 시작 시간을 이전 자막 종료 시간으로 설정 (50ms 여유)
-                    start_time = prev_end_time + 0.05
-                    
-                    # 종료 시간이 시작 시간보다 빠르면 시작 시간 + 1초로 설정
-                    if end_time <= start_time:
-                        end_time = start_time + 1.0
-                        
-                    # 시간 문자열 업데이트
-                    start_time_str = self._format_timestamp(start_time)
-                    end_time_str = self._format_timestamp(end_time)
-                    lines[1] = f"{start_time_str} --> {end_time_str}"
-                    
-                # 현재 자막의 종료 시간을 다음 자막의 비교를 위해 저장
-                prev_end_time = end_time
-                
-            except (ValueError, IndexError) as e:
-                self.logger.warning(f"자막 시간 파싱 중 오류: {e} - 원본 유지: {subtitle}")
-                
-            # 조정된 자막 추가
-            adjusted_subtitles.append('\n'.join(lines))
-            
-        return '\n\n'.join(adjusted_subtitles)
+            finished = self.add(subtitle)
+            if finished:
+                yield finished
+        finished = self.flush()
+        if finished:
+            yield finished
 
 
-class BaseTranslator:
-    """번역기 기본 클래스"""
+class SubtitleProcessor:
+    """자막 처리 로직을 담당하는 클래스"""
     
-    def __init__(self, config: SubtitleTranslationConfig):
-        self.config = config
+    # compact 형식에서 본문 줄바꿈을 나타내는 표시와 "id|본문" 줄 패턴
+    COMPACT_LINE_BREAK = '<br>'
+    _COMPACT_LINE = re.compile(r'^\s*(\d+)\s*\|(.*)$')
+    
+    # 블록 구분 (공백만 있는 줄 포함, 빈 줄 여러 개도 하나로 봄)과 시간 정보 줄 패턴
+    _BLANK_LINES = re.compile(r'\n[ \t]*(?:\n[ \t]*)+')
+    _TIMING_LINE = re.compile(r'^\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*'
+                              r'(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})')
+    
+    # 시간 중복을 조정할 때 이전 자막과 두는 간격과, 종료 시각이 앞설 때 정하는 최소 길이 (밀리초)
+    OVERLAP_GAP_MS = 50
+    MIN_DURATION_MS = 1000
+    
+    def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.system_prompt = self._load_system_prompt()
     
-    def _load_system_prompt(self) -> str:
-        """번역용 시스템 프롬프트 로드"""
-        return """You are an expert Korean subtitle translator.
-
-Translate English SRT subtitles into natural, complete Korean, preserving meaning and tone.
-
-Strict requirements:
-- Do NOT omit meaning or truncate endings. Each line must be a grammatically complete sentence or phrase appropriate for subtitles.
-- Preserve original SRT numbering and timestamps. Do not add, remove, split, or merge subtitle blocks.
-- Keep line length readable, but prioritize meaning and completeness over strict character limits.
-- Use consistent, natural Korean (standard polite style unless context clearly demands otherwise).
-- Keep proper punctuation. Do not drop endings like "…이다/합니다/예요" if they are needed for a complete sentence.
-
-Output format:
-- Return ONLY the SRT content between the tags below.
-
-<korean_subtitles>
-[SRT content: same numbering and timestamps as input, with Korean lines]
-</korean_subtitles>
-"""
+    @staticmethod
+    def normalize_newlines(content: str) -> str:
+        """BOM을 떼고 CRLF/CR 줄바꿈을 LF로 통일"""
+        if content.startswith('\ufeff'):
+            content = content[1:]
+        return content.replace('\r\n', '\n').replace('\r', '\n')
     
-    def translate_batch(self, batch: str, start_number: int) -> Tuple[str, int, int]:
-        """배치 번역 (하위 클래스에서 구현)"""
-        raise NotImplementedError("하위 클래스에서 구현해야 합니다")
-
-    def _extract_korean_subtitles(self, text: str) -> str:
+    @classmethod
+    def parse_timing(cls, line: str) -> Optional[Tuple[int, int]]:
         """
-        번역된 텍스트에서 <korean_subtitles> 블록을 추출합니다.
-        태그가 없으면 전체 응답을 그대로 반환합니다.
+        시간 정보 줄(00:00:00,000 --> 00:00:00,000)을 (시작, 종료) 밀리초로 변환
+        
+        Args:
+            line: 시간 정보 줄 (소수점 구분자 ','와 '.' 모두 허용, 뒤에 붙은 위치 정보는 무시)
+            
+        Returns:
+            (시작 밀리초, 종료 밀리초) (시간 정보 줄이 아니면 None)
         """
-        try:
-            start_token = '<korean_subtitles>'
-            end_token = '</korean_subtitles>'
-            content = text.split(start_token, 1)[1].split(end_token, 1)[0].strip()
-            return content + '\n\n'
-        except Exception:
-            self.logger.warning("번역된 텍스트에서 <korean_subtitles> 태그를 찾을 수 없습니다. 전체 응답을 반환합니다.")
-            return text + '\n\n'
-
-
-class ClaudeTranslator(BaseTranslator):
-    """Claude API를 이용한 번역 처리 클래스"""
+        match = cls._TIMING_LINE.match(line)
+        if not match:
+            return None
+        parts = match.groups()
+        return cls._to_ms(*parts[:4]), cls._to_ms(*parts[4:])
     
-    def __init__(self, config: SubtitleTranslationConfig):
-        super().__init__(config)
-        self.api_key = self._get_api_key()
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+    @staticmethod
+    def _to_ms(hours: str, minutes: str, seconds: str, fraction: str) -> int:
+        """시, 분, 초, 소수부 문자열을 밀리초로 변환 (소수부 "5"는 500밀리초)"""
+        return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, '0'))
     
-    def _get_api_key(self) -> str:
+    def parse_srt(self, content: str) -> List[SubtitleCue]:
         """
-        환경 변수에서 Claude API 키를 가져옴
+        SRT 내용을 자막 목록으로 파싱
         
-        Returns:
-            API 키
+        BOM, CRLF/CR 줄바꿈, 여러 줄의 빈 줄과 공백만 있는 줄을 허용합니다. 번호 줄이
+        빠진 블록은 앞 자막 다음 번호를 붙이고, 시간 정보가 없는 블록은 본문 안의
+        빈 줄 때문에 나뉜 것으로 보고 앞 자막 본문에 이어 붙입니다.
+        
+        Args:
+            content: SRT 내용
             
-        Raises:
-            ValueError: API 키가 설정되지 않은 경우
+        Returns:
+            자막 목록
         """
-        api_key = os.environ.get('ANTHROPIC_API_KEY')
-        if not api_key:
-            self.logger.error("환경 변수 'ANTHROPIC_API_KEY'가 설정되지 않았습니다.")
-            raise ValueError("환경 변수 'ANTHROPIC_API_KEY'가 설정되지 않았습니다. "
-                            "export ANTHROPIC_API_KEY=your_api_key 명령으로 API 키를 설정해주세요.")
-        return api_key
+        return list(self.iter_cues([content]))
     
-    def translate_batch(self, batch: str, start_number: int) -> Tuple[str, int, int]:
+    def iter_cues(self, chunks: Iterable[str], warn: bool = True) -> Iterator[SubtitleCue]:
         """
-        주어진 배치의 자막을 번역
+        SRT 내용 조각을 차례로 읽으며 자막을 하나씩 생성 (parse_srt의 스트리밍 버전)
+        
+        조각이 줄 경계에서 나뉘어 있으면 조각을 이어 붙인 내용을 parse_srt로 파싱한 것과
+        같은 자막을 냅니다. 아직 빈 줄이 나오지 않은 마지막 블록과, 다음 블록이 본문에
+        이어 붙을 수 있는 직전 자막 하나만 들고 있으므로 메모리 사용량이 파일 크기와
+        관계없이 일정합니다.
         
         Args:
-            batch: 번역할 자막 배치
-            start_number: 시작 자막 번호
+            chunks: SRT 내용 조각 (SubtitleFileHandler.iter_srt_chunks 등)
+            warn: False이면 형식 경고를 남기지 않음 (같은 파일을 다시 읽을 때)
             
         Returns:
-            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
-            
-        Raises:
-            Exception: 번역 중 오류가 발생한 경우
+            자막 생성기
         """
-        if not batch.strip():
-            return "", 0, 0
+        previous: Optional[SubtitleCue] = None
+        empty = True
+        merged = 0
+        for block in self._iter_blocks(chunks):
+            block = block.strip()
+            if not block:
+                continue
+            empty = False
+            parsed = self.parse_block(block)
+            if parsed is None:
+                if previous is not None:
+                    previous.text = '\n'.join(filter(None, (previous.text, block)))
+                    merged += 1
+                elif warn:
+                    self.logger.warning(f"시간 정보가 없는 블록을 건너뜁니다: {block[:100]!r}")
+                continue
+            if previous is not None:
+                yield previous
+            index, (start_ms, end_ms), text = parsed
+            if index is None:
+                index = previous.index + 1 if previous is not None else 1
+            previous = SubtitleCue(index, start_ms, end_ms, text)
             
-        try:
-            message = self.client.messages.create(
-                model=self.config.model,
-                max_tokens=self.config.max_tokens,
-                system=[{"type": "text", "text": self.system_prompt, "cache_control": {"type": "ephemeral"}}],
-                messages=[
-                    {"role": "user", "content": batch}
-                ]
-            )
-    
-            # 토큰 사용량 추출
-            usage = message.usage
-            input_tokens = usage.input_tokens
-            output_tokens = usage.output_tokens
+        if previous is not None:
+            yield previous
+        if not warn:
+            return
+        if empty:
+            self.logger.warning("빈 SRT 내용입니다.")
+        if merged:
+            self.logger.warning(f"시간 정보가 없는 블록 {merged}개를 앞 자막 본문에 이어 붙였습니다.")
     
-            translated_text = message.content[0].text
-            
-            # 자막 내용 추출
-            korean_subtitles = self._extract_korean_subtitles(translated_text)
-            return korean_subtitles, input_tokens, output_tokens
-                
-        except anthropic.APIError as e:
-            self.logger.error(f"Claude API 오류: {e}")
-            raise
+    @classmethod
+    def parse_block(cls, block: str) -> Optional[Tuple[Optional[int], Tuple[int, int], str]]:
+        """
+        앞뒤 공백을 뗀 SRT 블록 하나를 번호, 시간 정보, 본문으로 나눔
+        
+        Args:
+            block: 빈 줄로 나뉜 블록 (줄바꿈은 LF)
+            
+        Returns:
+            (번호, (시작 밀리초, 종료 밀리초), 본문) (번호 줄이 없으면 번호는 None,
+            시간 정보가 없는 블록이면 None)
+        """
+        lines = block.split('\n')
+        timing = cls.parse_timing(lines[0])
+        if timing is not None:
+            index = None
+            body = lines[1:]
+        elif len(lines) >= 2 and lines[0].strip().isdigit():
+            timing = cls.parse_timing(lines[1])
+            if timing is None:
+                return None
+            index = int(lines[0])
+            body = lines[2:]
+        else:
+            return None
+        return index, timing, '\n'.join(line.rstrip() for line in body).strip()
+    
+    @classmethod
+    def _iter_blocks(cls, chunks: Iterable[str]) -> Iterator[str]:
+        """줄 경계에서 나뉜 내용 조각을 빈 줄 기준의 블록으로 나눔 (조각 사이에 걸친 블록은 이어 붙임)"""
+        rest = ''
+        first = True
+        for chunk in chunks:
+            if first:
+                chunk = cls.normalize_newlines(chunk)
+                first = False
+            else:
+                chunk = chunk.replace('\r\n', '\n').replace('\r', '\n')
+            blocks = cls._BLANK_LINES.split(rest + chunk)
+            rest = blocks.pop()
+            yield from blocks
+        yield rest
+    
+    @staticmethod
+    def format_srt(cues: List[SubtitleCue]) -> str:
+        """
+        자막 목록을 SRT 내용으로 변환 (각 자막의 원래 번호 사용)
+        
+        Args:
+            cues: 자막 목록
+            
+        Returns:
+            SRT 내용
+        """
+        return '\n\n'.join(cue.to_srt() for cue in cues)
+    
+    def to_compact(self, batch: List[SubtitleCue]) -> str:
+        """
+        자막 배치를 번호와 시간 정보 없이 "id|본문" 줄로 변환 (본문의 줄바꿈은 <br>로 표시)
+        
+        Args:
+            batch: 자막 배치
+            
+        Returns:
+            compact 형식 텍스트
+        """
+        return '\n'.join(f"{cue.index}|{cue.text.strip().replace(chr(10), self.COMPACT_LINE_BREAK)}" for cue in batch)
+    
+    def from_compact(self, batch: List[SubtitleCue], translated: str) -> str:
+        """
+        "id|본문" 응답을 원본 배치의 번호와 시간 정보로 SRT로 되돌림
+        
+        id로 시작하지 않는 줄은 앞 자막 본문이 이어지는 것으로 보고, 원본에 없는
+        id나 본문이 빈 줄은 버립니다(검증 단계에서 누락 자막으로 다시 요청됨).
+        
+        Args:
+            batch: 원본 자막 배치
+            translated: compact 형식 응답
+            
+        Returns:
+            SRT 형식 번역 결과
+        """
+        cues_by_id = {str(cue.index): cue for cue in batch}
+            
+        entries: List[List[str]] = []
+        for line in self.normalize_newlines(translated).strip().split('\n'):
+            match = self._COMPACT_LINE.match(line)
+            if match:
+                entries.append([match.group(1), match.group(2).strip()])
+            elif entries and line.strip():
+                entries[-1][1] += '\n' + line.strip()
+                
+        blocks = []
+        for cue_id, text in entries:
+            text = text.replace(self.COMPACT_LINE_BREAK, '\n').strip()
+            if cue_id in cues_by_id and text:
+                blocks.append(cues_by_id[cue_id].with_text(text).to_srt())
+        return '\n\n'.join(blocks) + '\n\n'
+    
+    def match_translated_blocks(self, source_subtitles: List[SubtitleCue],
+                                translated: str) -> Tuple[List[Optional[SubtitleCue]], int]:
+        """
+        번역된 응답을 원본 자막과 대조하여 자막별 번역으로 맞춤
+        
+        응답 블록은 자막 번호로 원본에 대응시키고, 번호가 맞지 않으면 블록 수가
+        같을 때만 순서대로 대응시킵니다. 번호와 시간 정보는 항상 원본 것으로
+        되돌리며, 응답에 없거나 본문이 비어 있는 자막은 None으로 표시합니다.
+        
+        Args:
+            source_subtitles: 배치에 담긴 원본 자막 목록
+            translated: 번역된 배치 (SRT 형식 응답)
+            
+        Returns:
+            (원본 순서에 맞춘 번역된 자막 목록 (누락/손상은 None), 시간 정보를 복원한 자막 수)
+        """
+        # 응답 블록을 (번호, 시간 정보, 본문)으로 분해 (번호나 시간 줄이 빠진 블록도 허용)
+        parsed = []
+        for block in self._BLANK_LINES.split(self.normalize_newlines(translated).strip()):
+            if not block.strip():
+                continue
+            lines = block.strip().split('\n')
+            number = "" if '-->' in lines[0] else lines.pop(0).strip()
+            timing = self.parse_timing(lines.pop(0)) if lines and '-->' in lines[0] else None
+            parsed.append((number, timing, '\n'.join(lines).strip()))
+        
+        index_by_number = {str(cue.index): i for i, cue in enumerate(source_subtitles)}
+        
+        numbers = [number for number, _, _ in parsed]
+        if len(set(numbers)) == len(numbers) and all(number in index_by_number for number in numbers):
+            assigned = {index_by_number[entry[0]]: entry for entry in parsed}
+        elif len(parsed) == len(source_subtitles):
+            assigned = dict(enumerate(parsed))
+        else:
+            assigned = {}
+            for entry in parsed:
+                index = index_by_number.get(entry[0])
+                if index is not None and index not in assigned:
+                    assigned[index] = entry
+        
+        cues: List[Optional[SubtitleCue]] = []
+        restored = 0
+        for i, cue in enumerate(source_subtitles):
+            entry = assigned.get(i)
+            if entry is None or not entry[2]:
+                cues.append(None)
+                continue
+            if entry[1] != (cue.start_ms, cue.end_ms):
+                restored += 1
+            cues.append(cue.with_text(entry[2]))
+            
+        return cues, restored
+    
+    def create_batches(self, subtitles: Iterable[SubtitleCue], batch_size: int) -> Iterator[List[SubtitleCue]]:
+        """
+        자막을 지정된 크기의 배치로 나눔
+        
+        Args:
+            subtitles: 자막 목록 또는 생성기
+            batch_size: 배치 크기
+            
+        Returns:
+            배치 생성기
+        """
+        return CueBatcher(max_cues=batch_size).batches(subtitles)
+    
+    def create_token_batches(self, subtitles: Iterable[SubtitleCue], estimator: TokenEstimator,
+                             input_budget: int, output_budget: int,
+                             max_cues: Optional[int] = None) -> Iterator[List[SubtitleCue]]:
+        """
+        자막을 토큰 예산에 맞춰 배치로 나눔
+        
+        짧은 자막은 한 배치에 많이 담고, 긴 자막은 적게 담아 요청 수를 줄이면서
+        응답이 max_tokens에서 잘리지 않도록 합니다. 예산을 넘는 자막 하나는
+        단독 배치로 보냅니다.
+        
+        Args:
+            subtitles: 자막 목록 또는 생성기
+            estimator: 토큰 추정기
+            input_budget: 배치당 입력 토큰 예산
+            output_budget: 배치당 예상 출력 토큰 예산
+            max_cues: 배치당 최대 자막 수 (None이면 제한 없음)
+            
+        Returns:
+            배치 생성기
+        """
+        return CueBatcher(estimator, input_budget, output_budget, max_cues).batches(subtitles)
+    
+    def adjust_cue_timing(self, cue: SubtitleCue, prev_end_ms: int) -> Tuple[SubtitleCue, bool]:
+        """
+        자막 하나의 시작 시간이 이전 자막의 종료 시간과 겹치면 조정
+        
+        Args:
+            cue: 자막 (수정하지 않음)
+            prev_end_ms: 이전 자막의 종료 시간 (밀리초)
+            
+        Returns:
+            (조정된 자막 (겹치지 않으면 원래 자막), 조정 여부)
+        """
+        if cue.start_ms >= prev_end_ms:
+            return cue, False
+            
+        # 자막마다 경고하지 않고 조정한 수만 세어 마지막에 한 번 보고
+        self.logger.debug(f"시간 중복 감지: 이전 종료 {SubtitleCue.format_timestamp(prev_end_ms)}, "
+                          f"현재 시작 {SubtitleCue.format_timestamp(cue.start_ms)}")
+        # 시작 시간을 이전 자막 종료 시간 뒤로 옮기고, 종료 시간이 앞서면 최소 길이를 보장
+        start_ms = prev_end_ms + self.OVERLAP_GAP_MS
+        end_ms = cue.end_ms if cue.end_ms > start_ms else start_ms + self.MIN_DURATION_MS
+        return SubtitleCue(cue.index, start_ms, end_ms, cue.text), True
+
+
+class TimingEngine:
+    """
+    자막 시작/종료 시간을 int64 배열로 모아 파일 전체의 시간을 한꺼번에 조정하는 클래스
+    
+    자막마다 Python 루프를 돌지 않고 NumPy 배열 연산으로 처리하므로 수백만 개 자막도
+    빠르게 조정할 수 있습니다. 각 조정 메서드는 바뀐 자막 수를 반환하고, 조정 결과는
+    apply()로 자막 목록에 반영합니다.
+    """
+    
+    # apply()에서 한 번에 파이썬 정수로 바꾸는 자막 수
+    APPLY_BLOCK = 65536
+    
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        """
+        Args:
+            starts: 자막 시작 시간 배열 (밀리초)
+            ends: 자막 종료 시간 배열 (밀리초)
+        """
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+    
+    @classmethod
+    def from_cues(cls, cues: List[SubtitleCue]) -> "TimingEngine":
+        """자막 목록의 시간 정보로 생성"""
+        return cls(np.fromiter((cue.start_ms for cue in cues), dtype=np.int64, count=len(cues)),
+                   np.fromiter((cue.end_ms for cue in cues), dtype=np.int64, count=len(cues)))
+    
+    def apply(self, cues: Iterable[SubtitleCue]) -> Iterator[SubtitleCue]:
+        """
+        조정된 시간을 자막에 차례로 반영
+        
+        Args:
+            cues: 엔진을 만든 자막 목록, 또는 같은 파일을 다시 읽은 자막 생성기 (수정하지 않음)
+            
+        Returns:
+            시간이 바뀐 자막만 새로 만든 자막 생성기
+        """
+        # 배열 전체를 한꺼번에 파이썬 정수 목록으로 바꾸지 않도록 구간별로 변환
+        cues = iter(cues)
+        for offset in range(0, len(self.starts), self.APPLY_BLOCK):
+            starts = self.starts[offset:offset + self.APPLY_BLOCK].tolist()
+            ends = self.ends[offset:offset + self.APPLY_BLOCK].tolist()
+            for start_ms, end_ms, cue in zip(starts, ends, cues):
+                if cue.start_ms == start_ms and cue.end_ms == end_ms:
+                    yield cue
+                else:
+                    yield SubtitleCue(cue.index, start_ms, end_ms, cue.text)
+    
+    def offset(self, offset_ms: int) -> int:
+        """
+        모든 자막 시간을 옮김 (0보다 앞으로 가는 시간은 0으로 맞춤)
+        
+        Args:
+            offset_ms: 이동할 시간 (밀리초, 음수면 앞당김)
+        
+        Returns:
+            시간이 바뀐 자막 수
+        """
+        if not offset_ms:
+            return 0
+        starts = np.maximum(self.starts + offset_ms, 0)
+        ends = np.maximum(self.ends + offset_ms, 0)
+        changed = int(np.count_nonzero((starts != self.starts) | (ends != self.ends)))
+        self.starts, self.ends = starts, ends
+        return changed
+    
+    def scale(self, factor: float) -> int:
+        """
+        모든 자막 시간에 배율을 곱함 (프레임 속도 변환 등, 밀리초 단위로 반올림)
+        
+        Args:
+            factor: 시간 배율 (예: 23.976fps 자막을 25fps 영상에 맞추면 23.976 / 25)
+        
+        Returns:
+            시간이 바뀐 자막 수
+        """
+        if factor == 1:
+            return 0
+        starts = np.rint(self.starts * factor).astype(np.int64)
+        ends = np.rint(self.ends * factor).astype(np.int64)
+        changed = int(np.count_nonzero((starts != self.starts) | (ends != self.ends)))
+        self.starts, self.ends = starts, ends
+        return changed
+    
+    def repair_overlaps(self, gap_ms: int, min_duration_ms: int) -> int:
+        """
+        시작 시간이 이전 자막 종료 시간보다 앞선 자막을 조정
+        
+        SubtitleProcessor.adjust_cue_timing을 앞에서부터 차례로 적용한 것과 같은 결과를 냅니다.
+        겹친 자막의 시작 시간은 이전 자막 종료 시간 + gap_ms로 옮기고, 종료 시간이 그보다
+        앞서면 min_duration_ms만큼 늘립니다.
+        
+        종료 시간까지 늘어난 자막은 다음 자막과 다시 겹칠 수 있어 조정이 연쇄됩니다. 원래
+        종료 시간을 유지하는 자막(구간 머리)에서 시작한 연쇄 구간 안의 종료 시간은 머리의
+        종료 시간에서 step = gap_ms + min_duration_ms씩 늘어나므로, 연쇄는 "머리 종료 시간 -
+        step × 머리 위치"가 "종료 시간을 유지할 수 있는 한계 - step × (위치 - 1)" 이상이 되는
+        첫 자막에서 끝납니다. 원래 시간으로 연쇄를 시작할 수 있는 자막마다 이 위치를 최댓값
+        세그먼트 트리로 함께 찾고, 0번 자막에서 이어지는 머리만 포인터 두 배 건너뛰기로 골라
+        종료 시간을 한꺼번에 계산합니다.
+        
+        연쇄를 시작할 수 있는 자막이 k개일 때 O(n + k log n)입니다. 자막 100만 개 기준으로
+        겹침이 없으면 수십 밀리초, 모든 자막이 하나 또는 여러 연쇄로 이어진 최악의 경우에도
+        0.2초 안팎이 걸립니다.
+        
+        Args:
+            gap_ms: 조정된 자막과 이전 자막 사이 간격 (밀리초)
+            min_duration_ms: 종료 시간이 시작 시간보다 앞설 때 보장하는 길이 (밀리초)
+        
+        Returns:
+            조정된 자막 수
+        """
+        count = len(self.starts)
+        if count < 2:
+            return 0
+        
+        starts, ends = self.starts, self.ends
+        step = gap_ms + min_duration_ms
+        positions = np.arange(count, dtype=np.int64)
+        # 연쇄 구간 머리의 값 (머리 종료 시간 - step × 위치)과, 이전 값이 이 이하이면 종료 시간을
+        # 유지하는 한계 (이전 자막 종료 시간이 max(시작, 종료 - gap_ms - 1) 이하이면 유지)
+        head_values = ends - step * positions
+        limits = np.maximum(starts, ends - gap_ms - 1) - step * (positions - 1)
+        
+        # 원래 시간으로 다음 자막까지 늘리는 자막만 연쇄를 시작하며, 그런 자막 바로 다음 자막은
+        # 종료 시간을 유지할 수 없으므로 연쇄 구간의 머리가 될 수 없음
+        adjusted_ends = ends.copy()
+        extending = np.append(head_values[:-1] > limits[1:], False)
+        heads = np.flatnonzero(extending & ~np.append(False, extending[:-1]))
+        if len(heads):
+            heads_end = self._first_at_least(limits, heads + 1, head_values[heads])
+            
+            # 0번 자막에서 이어지는 머리만 남김 (다른 연쇄 구간 안에 들어간 머리는 종료 시간을 유지하지 못함)
+            successors = np.append(np.searchsorted(heads, heads_end), len(heads))
+            reached = np.zeros(len(heads) + 1, dtype=bool)
+            reached[0] = True
+            while True:
+                reached[successors[np.flatnonzero(reached)]] = True
+                if successors[0] == len(heads):
+                    break
+                successors = successors[successors]
+            heads, heads_end = heads[reached[:-1]], heads_end[reached[:-1]]
+            
+            lengths = heads_end - heads - 1
+            offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            adjusted_ends[np.repeat(heads, lengths) + offsets + 1] = (
+                np.repeat(ends[heads], lengths) + step * (offsets + 1))
+        
+        prev_ends = np.concatenate(([0], adjusted_ends[:-1]))
+        overlapping = starts < prev_ends
+        self.starts = np.where(overlapping, prev_ends + gap_ms, starts)
+        self.ends = adjusted_ends
+        return int(np.count_nonzero(overlapping))
+    
+    @staticmethod
+    def _first_at_least(values: np.ndarray, positions: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """
+        위치마다 그 위치부터 values가 목표 이상인 첫 위치를 최댓값 세그먼트 트리로 함께 찾음
+        
+        Args:
+            values: 찾을 배열
+            positions: 찾기 시작할 위치 배열
+            targets: 위치별 목표 값 배열
+            
+        Returns:
+            찾은 위치 배열 (없으면 len(values))
+        """
+        # 끝에 항상 목표 이상인 값을 하나 이상 덧붙여 모든 탐색이 멈추게 함
+        size = 1 << len(values).bit_length()
+        level = np.full(size, np.iinfo(np.int64).max, dtype=np.int64)
+        level[:len(values)] = values
+        levels = [level]
+        while len(level) > 1:
+            level = np.maximum(level[0::2], level[1::2])
+            levels.append(level)
+        tree = np.concatenate(levels)
+        level_offsets = np.cumsum([0] + [len(level) for level in levels])
+        top = len(levels) - 1
+        
+        # 목표 이상인 값이 있는 노드를 찾을 때까지 오른쪽으로 가며, 왼쪽 자식이 되면 부모로 올라감
+        found_nodes = np.empty(len(positions), dtype=np.int64)
+        found_depths = np.empty(len(positions), dtype=np.int64)
+        queries = np.arange(len(positions))
+        nodes = positions.astype(np.int64)
+        depths = np.zeros(len(positions), dtype=np.int64)
+        remaining = targets
+        while len(queries):
+            below = tree[level_offsets[depths] + nodes] < remaining
+            found = ~below
+            found_nodes[queries[found]] = nodes[found]
+            found_depths[queries[found]] = depths[found]
+            queries, nodes, depths, remaining = queries[below], nodes[below] + 1, depths[below], remaining[below]
+            climb = np.minimum(np.log2(nodes & -nodes).astype(np.int64), top - depths)
+            nodes >>= climb
+            depths += climb
+        
+        # 찾은 노드에서 목표 이상인 값이 있는 가장 왼쪽 자식으로 내려감
+        nodes, depths = found_nodes, found_depths
+        for depth in range(top, 0, -1):
+            descending = np.flatnonzero(depths == depth)
+            if len(descending) == 0:
+                continue
+            children = nodes[descending] * 2
+            children += tree[level_offsets[depth - 1] + children] < targets[descending]
+            nodes[descending] = children
+            depths[descending] = depth - 1
+        return nodes
+    
+    def enforce_min_duration(self, min_duration_ms: int, gap_ms: int) -> int:
+        """
+        min_duration_ms보다 짧은 자막의 종료 시간을 늘림 (다음 자막 시작 gap_ms 전까지만)
+        
+        Args:
+            min_duration_ms: 최소 자막 길이 (밀리초)
+            gap_ms: 다음 자막과 남겨 둘 간격 (밀리초)
+        
+        Returns:
+            종료 시간이 바뀐 자막 수
+        """
+        if min_duration_ms <= 0 or len(self.starts) == 0:
+            return 0
+        limits = np.append(self.starts[1:] - gap_ms, np.iinfo(np.int64).max)
+        targets = np.minimum(self.starts + min_duration_ms, limits)
+        ends = np.where(self.ends - self.starts < min_duration_ms, np.maximum(self.ends, targets), self.ends)
+        changed = int(np.count_nonzero(ends != self.ends))
+        self.ends = ends
+        return changed
+    
+    def close_gaps(self, max_gap_ms: int) -> int:
+        """
+        다음 자막과의 간격이 max_gap_ms 이하인 자막의 종료 시간을 다음 자막 시작 시간까지 늘림
+        
+        Args:
+            max_gap_ms: 메울 최대 간격 (밀리초)
+        
+        Returns:
+            종료 시간이 바뀐 자막 수
+        """
+        if max_gap_ms <= 0 or len(self.starts) < 2:
+            return 0
+        next_starts = self.starts[1:]
+        gaps = next_starts - self.ends[:-1]
+        closing = (gaps > 0) & (gaps <= max_gap_ms)
+        self.ends = np.append(np.where(closing, next_starts, self.ends[:-1]), self.ends[-1])
+        return int(np.count_nonzero(closing))
+
+
+class SrtIndex:
+    """
+    SRT 파일의 자막 위치별 바이트 오프셋, 번호, 시작 시간 색인
+    
+    파일을 한 번 훑어 만든 색인을 파일 옆(<파일>.idx)에 저장해 두고, 시간이나 자막 번호로
+    이진 탐색해 필요한 구간의 바이트만 읽을 수 있게 합니다. 저장할 때의 파일 크기와 수정
+    시각이 지금과 다르면 색인을 다시 만듭니다. 자막 위치는 SubtitleProcessor.iter_cues가
+    만드는 자막 순서와 같습니다(시간 정보가 없는 블록은 앞 자막에 합쳐지므로 색인에 없음).
+    """
+    
+    SUFFIX = ".idx"
+    VERSION = 1
+    
+    # 빈 줄(공백만 있는 줄 포함) 블록 구분자를 바이트에서 찾는 패턴 (CRLF, CR, LF 줄바꿈 모두 처리)
+    _NEWLINE = rb'(?:\r\n|\r(?!\n)|\n)[ \t]*'
+    _SEPARATOR = re.compile(_NEWLINE + rb'(?:' + _NEWLINE + rb')+')
+    _BOM = '\ufeff'.encode('utf-8')
+    
+    # --range 시간 값 ([[시:]분:]초[.밀리초])
+    _RANGE_TIME = re.compile(r'\s*(?:(?:(\d+):)?(\d+):)?(\d+)(?:[,.](\d{1,3}))?\s*')
+    
+    def __init__(self, offsets: np.ndarray, numbers: np.ndarray, starts: np.ndarray,
+                 size: int = 0, mtime_ns: int = 0):
+        """
+        Args:
+            offsets: 자막 블록 시작 바이트 오프셋 배열
+            numbers: 자막 번호 배열 (번호 줄이 없는 자막은 앞 자막 번호 + 1)
+            starts: 자막 시작 시간 배열 (밀리초)
+            size: 색인을 만든 파일 크기 (바이트)
+            mtime_ns: 색인을 만든 파일 수정 시각 (나노초)
+        """
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.numbers = np.asarray(numbers, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.size = size
+        self.mtime_ns = mtime_ns
+        
+        # 시간이나 번호 순서가 어긋난 자막이 있어도 이진 탐색할 수 있도록 앞에서부터의 최댓값으로 탐색
+        self._start_bounds = np.maximum.accumulate(self.starts)
+        self._number_bounds = np.maximum.accumulate(self.numbers)
+    
+    def __len__(self) -> int:
+        return len(self.offsets)
+    
+    @classmethod
+    def build(cls, file_path: str) -> "SrtIndex":
+        """
+        파일을 메모리 매핑으로 한 번 훑어 색인 생성
+        
+        Args:
+            file_path: SRT 파일 경로
+            
+        Returns:
+            생성된 색인
+        """
+        offsets, numbers, starts = array('q'), array('q'), array('q')
+        with open(file_path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            # 빈 파일은 메모리 매핑할 수 없음
+            if stat.st_size:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for offset, end in cls._iter_block_spans(mapped):
+                        block = mapped[offset:end].decode('utf-8').replace('\r\n', '\n').replace('\r', '\n').strip()
+                        parsed = SubtitleProcessor.parse_block(block) if block else None
+                        if parsed is None:
+                            continue
+                        number, (start_ms, _), _ = parsed
+                        if number is None:
+                            number = numbers[-1] + 1 if numbers else 1
+                        offsets.append(offset)
+                        numbers.append(number)
+                        starts.append(start_ms)
+                        
+        return cls(np.frombuffer(offsets, dtype=np.int64), np.frombuffer(numbers, dtype=np.int64),
+                   np.frombuffer(starts, dtype=np.int64), stat.st_size, stat.st_mtime_ns)
+    
+    @classmethod
+    def _iter_block_spans(cls, mapped: mmap.mmap) -> Iterator[Tuple[int, int]]:
+        """빈 줄로 나뉜 블록의 (시작, 끝) 바이트 위치를 차례로 반환 (BOM 제외)"""
+        offset = len(cls._BOM) if mapped[:len(cls._BOM)] == cls._BOM else 0
+        for separator in cls._SEPARATOR.finditer(mapped, offset):
+            yield offset, separator.start()
+            offset = separator.end()
+        yield offset, len(mapped)
+    
+    @classmethod
+    def load(cls, file_path: str) -> "SrtIndex":
+        """
+        파일 옆에 저장된 색인을 읽음 (없거나 파일이 바뀌었으면 새로 만들어 저장)
+        
+        Args:
+            file_path: SRT 파일 경로
+            
+        Returns:
+            파일의 색인
+        """
+        logger = logging.getLogger(__name__)
+        index_path = file_path + cls.SUFFIX
+        stat = os.stat(file_path)
+        try:
+            with np.load(index_path) as data:
+                version, size, mtime_ns = data['meta'].tolist()
+                if (version, size, mtime_ns) == (cls.VERSION, stat.st_size, stat.st_mtime_ns):
+                    return cls(data['offsets'], data['numbers'], data['starts'], size, mtime_ns)
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            self.logger.error(f"번역 중 오류 발생: {e}")
-            raise
+            # 손상된 색인은 다시 만들면 되므로 번역을 멈추지 않음
+            logger.warning(f"색인 파일을 읽을 수 없어 다시 만듭니다: {index_path} ({e})")
+            
+        index = cls.build(file_path)
+        try:
+            index.save(index_path)
+        except OSError as e:
+            logger.warning(f"색인 파일을 저장할 수 없습니다: {e}")
+        return index
+    
+    def save(self, index_path: str) -> None:
+        """색인을 임시 파일에 쓴 뒤 교체"""
+        temp_path = f"{index_path}.part"
+        with open(temp_path, 'wb') as file:
+            np.savez(file, meta=np.array([self.VERSION, self.size, self.mtime_ns], dtype=np.int64),
+                     offsets=self.offsets, numbers=self.numbers, starts=self.starts)
+        os.replace(temp_path, index_path)
+    
+    def position_at_time(self, time_ms: int) -> int:
+        """시작 시간이 time_ms 이상인 첫 자막 위치 (없으면 자막 수)"""
+        return int(np.searchsorted(self._start_bounds, time_ms, side='left'))
+    
+    def position_of_number(self, number: int) -> int:
+        """번호가 number 이상인 첫 자막 위치 (없으면 자막 수)"""
+        return int(np.searchsorted(self._number_bounds, number, side='left'))
+    
+    def locate(self, kind: str, first: int, last: int) -> Tuple[int, int]:
+        """
+        parse_range로 해석한 구간을 자막 위치 구간으로 변환
+        
+        Args:
+            kind: "time"이면 시작 시간이 first 이상 last 미만(밀리초)인 자막,
+                  "cue"이면 번호가 first 이상 last 이하인 자막
+            first: 구간 시작
+            last: 구간 끝
+            
+        Returns:
+            (시작 위치, 끝 위치) (끝 위치는 포함하지 않음)
+        """
+        if kind == "time":
+            return self.position_at_time(first), self.position_at_time(last)
+        return self.position_of_number(first), self.position_of_number(last + 1)
+    
+    def byte_range(self, start: int, end: int) -> Tuple[int, int]:
+        """자막 위치 구간 [start, end)의 바이트 범위 (마지막 자막까지면 파일 끝까지)"""
+        return int(self.offsets[start]), (int(self.offsets[end]) if end < len(self) else self.size)
+    
+    @staticmethod
+    def copy_bytes(file_path: str, target, start: int, end: int) -> None:
+        """
+        파일의 바이트 구간 [start, end)를 다른 바이너리 파일 객체에 조각 단위로 복사
+        
+        Args:
+            file_path: 읽을 파일 경로
+            target: 기록할 바이너리 파일 객체
+            start: 시작 바이트 위치
+            end: 끝 바이트 위치 (포함하지 않음)
+        """
+        with open(file_path, 'rb') as source:
+            source.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                data = source.read(min(remaining, SubtitleFileHandler.READ_CHUNK_BYTES))
+                if not data:
+                    break
+                target.write(data)
+                remaining -= len(data)
+    
+    @classmethod
+    def parse_range(cls, spec: str) -> Tuple[str, int, int]:
+        """
+        --range 값을 해석
+        
+        ':'가 있으면 원본 시작 시간 구간(예: 40:00-45:00, 1:05:30.5-1:10:00, 끝 시간은
+        포함하지 않음), 없으면 자막 번호 구간(예: 120-180, 양 끝 포함)으로 봅니다.
+        
+        Args:
+            spec: --range 값
+            
+        Returns:
+            ("time", 시작 밀리초, 끝 밀리초) 또는 ("cue", 첫 번호, 마지막 번호)
+            
+        Raises:
+            ValueError: 형식이 올바르지 않거나 구간이 비어 있는 경우
+        """
+        first, separator, last = spec.partition('-')
+        if not separator:
+            raise ValueError(f"시작-끝 형식이어야 합니다: {spec}")
+        if ':' in spec:
+            kind = "time"
+            bounds = []
+            for value in (first, last):
+                match = cls._RANGE_TIME.fullmatch(value)
+                if not match:
+                    raise ValueError(f"시간 형식이 아닙니다: {value}")
+                hours, minutes, seconds, fraction = match.groups()
+                bounds.append(SubtitleProcessor._to_ms(hours or '0', minutes or '0', seconds, fraction or ''))
+            start, end = bounds
+            empty = end <= start
+        else:
+            if not (first.strip().isdigit() and last.strip().isdigit()):
+                raise ValueError(f"자막 번호 구간이나 시간 구간이 아닙니다: {spec}")
+            kind = "cue"
+            start, end = int(first), int(last)
+            empty = end < start
+        if empty:
+            raise ValueError(f"끝이 시작보다 뒤여야 합니다: {spec}")
+        return kind, start, end
 
 
-class OpenAITranslator(BaseTranslator):
-    """OpenAI API를 이용한 번역 처리 클래스"""
+class CueSequencer:
+    """
+    자막 번호 재정렬, 시간 중복 조정, SRT 직렬화를 자막 하나씩 한 번에 처리하는 단계
     
-    def __init__(self, config: SubtitleTranslationConfig):
-        super().__init__(config)
-        self.api_key = self._get_api_key()
-        self.client = openai.OpenAI(api_key=self.api_key)
+    자막 목록 전체를 번호 재정렬하고 시간 중복을 조정한 것과 같은 결과를 내지만
+    중간 목록을 만들지 않으므로, 자막이 완료되는 대로 파일에 바로 쓸 수 있습니다.
+    """
+    
+    def __init__(self, processor: SubtitleProcessor):
+        self.processor = processor
         
-        # 모델별 지원되지 않는 파라미터를 캐시
-        self.unsupported_params = set()
+        # 다음 자막 번호, 이전 자막 종료 시간(밀리초), 조정된 자막 수
+        self.counter = 1
+        self.prev_end_ms = 0
+        self.adjusted_count = 0
+    
+    def next(self, cue: SubtitleCue) -> SubtitleCue:
+        """
+        다음 자막에 순서대로 번호를 매기고 이전 자막과 겹치는 시간을 조정
+        
+        Args:
+            cue: 원래 순서의 다음 자막 (수정하지 않음)
+            
+        Returns:
+            번호와 시간이 확정된 자막
+        """
+        cue, adjusted = self.processor.adjust_cue_timing(cue, self.prev_end_ms)
+        if adjusted:
+            self.adjusted_count += 1
+        self.prev_end_ms = cue.end_ms
+        
+        cue = SubtitleCue(self.counter, cue.start_ms, cue.end_ms, cue.text)
+        self.counter += 1
+        return cue
+    
+    def write(self, file, cue: SubtitleCue) -> None:
+        """
+        다음 자막을 확정하여 SRT 블록으로 기록 (블록 사이에만 빈 줄)
+        
+        Args:
+            file: 기록할 텍스트 파일 객체
+            cue: 원래 순서의 다음 자막
+        """
+        separator = '\n\n' if self.counter > 1 else ''
+        file.write(separator + self.next(cue).to_srt())
 
-    def _load_system_prompt(self) -> str:
-        """OpenAI 전용: 품질 튜닝을 위한 추가 지침/예시 포함"""
-        base = super()._load_system_prompt()
-        tuning = """
 
-Style guide:
-- Prefer clear, complete sentences ending with “-습니다/었습니다/입니다”.
-- Avoid noun-ending fragments (e.g., “...날.”). Rewrite as a full sentence (e.g., “...날이었습니다.”).
-- Avoid literal calques; use natural Korean phrasing.
+class IncrementalSrtWriter:
+    """
+    번역이 끝난 조각을 원래 순서대로 이어 붙여 파일에 점진적으로 기록하는 클래스
+    
+    조각은 완료되는 순서대로 들어오지만, 앞선 조각이 모두 도착한 연속 구간만
+    번호 재정렬과 시간 중복 조정을 거쳐 임시 파일에 추가합니다. 모든 조각이
+    기록되면 임시 파일을 출력 파일로 교체하므로, 메모리에는 순서가 어긋나
+    대기 중인 조각만 남습니다.
+    """
+    
+    def __init__(self, output_file: str, processor: SubtitleProcessor):
+        self.logger = logging.getLogger(__name__)
+        self.output_file = output_file
+        self.temp_file = f"{output_file}.part"
+        self.processor = processor
+        
+        # 순서가 어긋나 대기 중인 조각 (조각 인덱스 -> 번역된 자막)
+        self.pending: Dict[int, SubtitleCue] = {}
+        self.next_index = 0
+        
+        # 번호 재정렬/시간 조정/직렬화 상태
+        self.sequencer = CueSequencer(processor)
+        
+        os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+        self._file = open(self.temp_file, 'w', encoding='utf-8')
+    
+    def add(self, index: int, cue: SubtitleCue) -> None:
+        """
+        번역된 조각을 추가하고 기록 가능한 연속 구간을 파일에 씀
+        
+        Args:
+            index: 조각 인덱스 (0부터 시작하는 원래 순서)
+            cue: 번역된 자막
+        """
+        self.pending[index] = cue
+        
+        while self.next_index in self.pending:
+            self.sequencer.write(self._file, self.pending.pop(self.next_index))
+            self.next_index += 1
+            
+        self._file.flush()
+    
+    @property
+    def adjusted_count(self) -> int:
+        """시간 중복으로 조정된 자막 수"""
+        return self.sequencer.adjusted_count
+    
+    def commit(self) -> None:
+        """임시 파일을 닫고 출력 파일로 교체"""
+        if self.pending:
+            raise RuntimeError(f"기록되지 않은 조각이 남아 있습니다: {sorted(self.pending)}")
+            
+        self._file.close()
+        os.replace(self.temp_file, self.output_file)
+    
+    def abort(self) -> None:
+        """임시 파일을 닫고 삭제"""
+        self._file.close()
+        if os.path.exists(self.temp_file):
+            os.remove(self.temp_file)
 
-Examples (do NOT include in output):
-<example>
-<source>
-1
-00:00:00,240 --> 00:00:12,040
-Because yesterday was the day the human intelligence monopoly officially ended.
-</source>
-<target>
-1
-00:00:00,240 --> 00:00:12,040
-어제는 인간 지능의 독점이 공식적으로 끝난 날이었습니다.
-</target>
-</example>
+
+class MalformedResponseError(ValueError):
+    """모델 응답이 SRT 형식을 따르지 않을 때 발생하는 예외"""
+
+
+class TruncatedResponseError(MalformedResponseError):
+    """
+    응답이 max_tokens에서 잘렸을 때 발생하는 예외
+    
+    같은 배치를 다시 보내도 다시 잘리므로 재시도하지 않고 배치를 나눠 번역합니다.
+    잘린 응답도 요금이 청구되므로 토큰 사용량을 함께 전달합니다.
+    """
+    
+    def __init__(self, message: str, input_tokens: int = 0, output_tokens: int = 0):
+        super().__init__(message)
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+class BatchTranslationError(Exception):
+    """
+    재시도 후에도 배치를 번역하지 못했을 때 발생하는 예외
+    
+    error_class로 배치를 나눠 다시 번역할 만한 실패인지 판단하며, 잘린 응답처럼
+    요금이 청구된 실패는 토큰 사용량을 함께 전달합니다.
+    """
+    
+    def __init__(self, message: str, error_class: str, input_tokens: int = 0, output_tokens: int = 0):
+        super().__init__(message)
+        self.error_class = error_class
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+class IncrementalSrtParser:
+    """
+    스트리밍 응답을 받는 대로 파싱하여 완성된 SRT 블록을 내보내는 클래스
+    
+    <korean_subtitles> 태그 안의 텍스트를 빈 줄 단위로 나누어, 다음 블록이
+    시작되는 순간 앞 블록을 완성된 것으로 봅니다. 번호나 시간 정보가 없는
+    블록이 나오면 응답 전체를 기다리지 않고 바로 MalformedResponseError를 발생시킵니다.
+    compact 형식에서는 "id|" 로 시작하는 줄 하나(이어지는 줄 포함)를 블록으로 봅니다.
+    """
+    
+    START_TOKEN = '<korean_subtitles>'
+    END_TOKEN = '</korean_subtitles>'
+    
+    def __init__(self, compact: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.compact = compact
+        self.raw_text = ""
+        self.blocks: List[str] = []
+        self._buffer = ""
+        self._inside = False
+        self._finished = False
+    
+    def feed(self, chunk: str) -> List[str]:
+        """
+        응답 조각을 추가하고 새로 완성된 자막 블록 목록을 반환
+        
+        Args:
+            chunk: 스트리밍으로 받은 텍스트 조각
+            
+        Returns:
+            이번 조각으로 완성된 자막 블록 목록
+            
+        Raises:
+            MalformedResponseError: 완성된 블록이 SRT 형식이 아닌 경우
+        """
+        self.raw_text += chunk
+        if self._finished:
+            return []
+            
+        self._buffer += chunk
+        completed = []
+        
+        if not self._inside:
+            start = self._buffer.find(self.START_TOKEN)
+            if start == -1:
+                # 태그가 조각 경계에 걸칠 수 있으므로 끝부분만 남겨둠
+                self._buffer = self._buffer[-len(self.START_TOKEN):]
+                return completed
+            self._buffer = self._buffer[start + len(self.START_TOKEN):].lstrip()
+            self._inside = True
+            
+        end = self._buffer.find(self.END_TOKEN)
+        if end != -1:
+            completed.extend(self._split_blocks(self._buffer[:end], final=True))
+            self._buffer = ""
+            self._finished = True
+        else:
+            completed.extend(self._split_blocks(self._buffer, final=False))
+            
+        return completed
+    
+    def _split_blocks(self, text: str, final: bool) -> List[str]:
+        """버퍼에서 완성된 블록을 떼어내 검증 후 반환"""
+        if self.compact:
+            parts = re.split(r'\n(?=\s*\d+\s*\|)', text)
+        else:
+            parts = re.split(r'\n[ \t]*\n', text)
+        if not final:
+            # 마지막 부분은 아직 이어질 수 있으므로 버퍼에 남김
+            self._buffer = parts.pop()
+            
+        completed = []
+        for part in parts:
+            block = part.strip()
+            if not block:
+                continue
+            self._validate_block(block)
+            self.blocks.append(block)
+            completed.append(block)
+        return completed
+    
+    def _validate_block(self, block: str) -> None:
+        """자막 블록이 번호와 시간 정보를 갖추었는지 확인"""
+        if self.compact:
+            if not re.match(r'^\d+\s*\|', block):
+                raise MalformedResponseError(f"id|본문 형식이 아닌 응답 줄입니다: {block[:100]!r}")
+            return
+            
+        lines = block.split('\n')
+        if len(lines) < 2 or not lines[0].strip().isdigit() or ' --> ' not in lines[1]:
+            raise MalformedResponseError(f"SRT 형식이 아닌 응답 블록입니다: {block[:100]!r}")
+    
+    def close(self) -> str:
+        """
+        스트림 종료 후 남은 내용을 정리하여 전체 번역 결과를 반환
+        
+        Returns:
+            _extract_korean_subtitles와 같은 형식의 번역된 자막
+        """
+        if not self._inside:
+            self.logger.warning("번역된 텍스트에서 <korean_subtitles> 태그를 찾을 수 없습니다. 전체 응답을 반환합니다.")
+            return self.raw_text + '\n\n'
+            
+        if not self._finished:
+            # 닫는 태그 없이 끝난 경우 남은 블록도 포함
+            self._split_blocks(self._buffer, final=True)
+            self._buffer = ""
+            self._finished = True
+            
+        return ('\n' if self.compact else '\n\n').join(self.blocks) + '\n\n'
+
+
+class IncrementalJsonParser:
+    """
+    구조화 응답({"subtitles": [{"id": .., "text": ".."}]})을 compact 형식 줄로 바꾸는 클래스
+    
+    스트리밍 중에는 JSON 전체를 파싱할 수 없으므로, 문자열까지 닫힌 {"id", "text"}
+    객체가 나올 때마다 "id|본문" 줄로 내보내고, 최종 결과는 스트림이 끝난 뒤
+    전체 JSON을 파싱해 만듭니다.
+    """
+    
+    _ITEM_PATTERN = re.compile(r'\{\s*"id"\s*:\s*"?(\d+)"?\s*,\s*"text"\s*:\s*("(?:[^"\\]|\\.)*")\s*\}')
+    
+    def __init__(self):
+        self.raw_text = ""
+        self._scan_pos = 0
+    
+    @staticmethod
+    def _line(cue_id, text: str) -> str:
+        """항목 하나를 compact 형식 줄로 변환 (본문의 줄바꿈은 <br>로 표시)"""
+        text = text.strip().replace('\r', '').replace('\n', SubtitleProcessor.COMPACT_LINE_BREAK)
+        return f"{cue_id}|{text}"
+    
+    @classmethod
+    def decode(cls, data) -> str:
+        """
+        구조화 응답 전체를 compact 형식 텍스트로 변환
+        
+        Args:
+            data: JSON 문자열 또는 이미 파싱된 객체 (Claude 도구 입력)
+            
+        Returns:
+            "id|본문" 줄로 된 번역 결과 (from_compact로 SRT로 되돌림)
+            
+        Raises:
+            MalformedResponseError: JSON이 아니거나 스키마를 따르지 않는 경우
+        """
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except json.JSONDecodeError as e:
+                raise MalformedResponseError(f"구조화 응답이 올바른 JSON이 아닙니다: {e}")
+                
+        items = data.get("subtitles") if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            raise MalformedResponseError(f"구조화 응답에 subtitles 배열이 없습니다: {str(data)[:100]!r}")
+            
+        lines = []
+        for item in items:
+            if not isinstance(item, dict) or not str(item.get("id", "")).strip().isdigit():
+                raise MalformedResponseError(f"id가 없는 구조화 응답 항목입니다: {str(item)[:100]!r}")
+            lines.append(cls._line(str(item["id"]).strip(), str(item.get("text") or "")))
+        return '\n'.join(lines) + '\n\n'
+    
+    def feed(self, chunk: str) -> List[str]:
+        """
+        응답 조각을 추가하고 새로 완성된 항목을 compact 형식 줄 목록으로 반환
+        
+        Args:
+            chunk: 스트리밍으로 받은 JSON 조각
+            
+        Returns:
+            이번 조각으로 완성된 "id|본문" 줄 목록
+        """
+        self.raw_text += chunk
+        completed = []
+        for match in self._ITEM_PATTERN.finditer(self.raw_text, self._scan_pos):
+            completed.append(self._line(match.group(1), json.loads(match.group(2))))
+            self._scan_pos = match.end()
+        return completed
+    
+    def close(self) -> str:
+        """
+        스트림 종료 후 전체 JSON을 파싱하여 번역 결과를 반환
+        
+        Raises:
+            MalformedResponseError: JSON이 아니거나 스키마를 따르지 않는 경우
+        """
+        return self.decode(self.raw_text)
+
+
+class BaseTranslator:
+    """번역기 기본 클래스"""
+    
+    # 제공업체별 프롬프트 캐시 최소 길이(토큰)와 모델 이름별 예외
+    PROMPT_CACHE_MIN_TOKENS = {"claude": 1024, "openai": 1024}
+    MODEL_PROMPT_CACHE_MIN_TOKENS = {"haiku": 2048}
+    # 토큰 수 추정 오차를 감안해 최소 길이보다 넉넉하게 채우는 배율
+    PROMPT_CACHE_MARGIN = 1.15
+    
+    # 구조화 응답 스키마 (Claude 도구 입력 스키마와 OpenAI json_schema에 공통으로 사용)
+    STRUCTURED_OUTPUT_NAME = "submit_translations"
+    STRUCTURED_OUTPUT_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "subtitles": {
+                "type": "array",
+                "description": "One entry per input line, in the same order.",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer", "description": "The id of the input line."},
+                        "text": {"type": "string", "description": "Korean translation. Use <br> for line breaks."}
+                    },
+                    "required": ["id", "text"],
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["subtitles"],
+        "additionalProperties": False
+    }
+    
+    # 캐시 최소 길이를 채울 때 차례로 덧붙이는 스타일 예시 (순서가 바뀌면 캐시가 무효화됨)
+    STYLE_EXAMPLES = [
+        ("Because yesterday was the day the human intelligence monopoly officially ended.",
+         "어제는 인간 지능의 독점이 공식적으로 끝난 날이었습니다."),
+        ("So today I want to walk you through how this actually works.",
+         "그래서 오늘은 이것이 실제로 어떻게 작동하는지 차근차근 설명해 드리겠습니다."),
+        ("And that's exactly where most people get it wrong.",
+         "그리고 바로 그 지점에서 대부분의 사람들이 잘못 이해합니다."),
+        ("Let's take a quick look at the numbers.",
+         "숫자를 잠깐 살펴보겠습니다."),
+        ("I'm not saying it's easy, but it's definitely possible.",
+         "쉽다는 말은 아니지만, 분명히 가능한 일입니다."),
+        ("Thanks for watching, and I'll see you in the next one.",
+         "시청해 주셔서 감사합니다. 다음 영상에서 뵙겠습니다."),
+        ("Wait, what did you just say?",
+         "잠깐만요, 방금 뭐라고 하셨어요?"),
+        ("The results were, frankly, better than anyone expected.",
+         "결과는 솔직히 누구도 예상하지 못했을 만큼 좋았습니다."),
+        ("If you remember one thing from this talk, remember this.",
+         "이번 강연에서 하나만 기억하신다면 이것을 기억해 주세요."),
+        ("We'll come back to that point in a minute.",
+         "그 부분은 잠시 후에 다시 다루겠습니다."),
+        ("This is the part that really surprised me.",
+         "제가 정말 놀랐던 부분이 바로 여기입니다."),
+        ("Nobody knows for sure what's going to happen next.",
+         "다음에 무슨 일이 일어날지는 아무도 확실히 알지 못합니다."),
+        ("It took us almost three years to get here.",
+         "여기까지 오는 데 거의 3년이 걸렸습니다."),
+        ("You can think of it as a kind of shortcut.",
+         "일종의 지름길이라고 생각하시면 됩니다."),
+        ("Okay, let's get started.",
+         "좋습니다, 시작하겠습니다."),
+        ("That's a great question, and I get it a lot.",
+         "좋은 질문입니다. 실제로 자주 받는 질문이기도 합니다."),
+        ("The problem is that the data doesn't tell the whole story.",
+         "문제는 데이터가 전체 이야기를 말해 주지 않는다는 점입니다."),
+        ("Imagine you're standing in an empty room with no windows.",
+         "창문 하나 없는 텅 빈 방에 서 있다고 상상해 보세요."),
+        ("I honestly didn't think it would work the first time.",
+         "솔직히 처음부터 잘될 거라고는 생각하지 않았습니다."),
+        ("Here's what happens when you change just one variable.",
+         "변수 하나만 바꾸면 어떤 일이 일어나는지 보여 드리겠습니다."),
+        ("We're going to need a bigger team for this.",
+         "이 일을 하려면 더 큰 팀이 필요할 것입니다."),
+        ("Most of these companies didn't exist ten years ago.",
+         "이 회사들 대부분은 10년 전에는 존재하지도 않았습니다."),
+        ("Don't worry, we'll go through it step by step.",
+         "걱정하지 마세요, 한 단계씩 함께 살펴보겠습니다."),
+        ("In other words, the model learns from its own mistakes.",
+         "다시 말해, 모델은 자신의 실수로부터 학습합니다."),
+        ("[Music]",
+         "[음악]"),
+        ("[Applause]",
+         "[박수]"),
+        ("I'll put a link to the paper in the description below.",
+         "논문 링크는 아래 설명란에 남겨 두겠습니다."),
+        ("So what does this mean for the rest of us?",
+         "그렇다면 이것이 우리에게는 어떤 의미일까요?"),
+        ("It sounds simple, but the details matter a lot.",
+         "간단하게 들리지만, 세부 사항이 매우 중요합니다."),
+        ("At the end of the day, it's all about trust.",
+         "결국 가장 중요한 것은 신뢰입니다."),
+        ("Let me show you what I mean with a quick example.",
+         "간단한 예시로 무슨 뜻인지 보여 드리겠습니다."),
+        ("That's not a bug, that's a feature.",
+         "그건 버그가 아니라 의도된 기능입니다."),
+        ("We tried everything, and nothing seemed to work.",
+         "모든 방법을 시도해 봤지만, 아무것도 효과가 없는 것 같았습니다."),
+        ("Now, this next slide is a little bit technical.",
+         "이제 다음 슬라이드는 조금 기술적인 내용입니다."),
+        ("By the way, this is a question I get asked all the time.",
+         "참고로, 이건 제가 정말 자주 받는 질문입니다."),
+        ("Think about the last time you made a really big decision.",
+         "마지막으로 정말 큰 결정을 내렸던 때를 떠올려 보세요."),
+        ("The interesting thing is that it works in both directions.",
+         "흥미로운 점은 이것이 양방향으로 작동한다는 것입니다."),
+        ("And honestly, that changed everything for us.",
+         "그리고 솔직히 그 일이 저희에게 모든 것을 바꿔 놓았습니다."),
+        ("He said he'd be back before midnight.",
+         "그는 자정 전에 돌아오겠다고 말했습니다."),
+        ("We don't have much time, so let's keep moving.",
+         "시간이 많지 않으니 계속 진행하겠습니다."),
+        ("If this video helped you, please consider subscribing.",
+         "이 영상이 도움이 되셨다면 구독을 부탁드립니다."),
+        ("What you're seeing here is a map of every connection in the network.",
+         "지금 보고 계신 것은 네트워크의 모든 연결을 나타낸 지도입니다."),
+        ("I know, I know. It sounds crazy.",
+         "압니다, 말도 안 되는 소리처럼 들리죠."),
+        ("The first version was slow, expensive, and honestly kind of ugly.",
+         "첫 번째 버전은 느리고 비쌌으며, 솔직히 좀 볼품없었습니다."),
+        ("Let's pause here for a second.",
+         "여기서 잠깐 멈추겠습니다."),
+        ("That's roughly the same amount of energy as a small city uses in a day.",
+         "이는 작은 도시 하나가 하루에 쓰는 에너지와 거의 같은 양입니다."),
+        ("You don't need to be an expert to follow along.",
+         "전문가가 아니어도 충분히 따라오실 수 있습니다."),
+        ("So where do we go from here?",
+         "그렇다면 이제 우리는 어디로 가야 할까요?"),
+        ("She looked at me and said, \"You're going to regret this.\"",
+         "그녀는 저를 보며 \"후회하게 될 거예요\"라고 말했습니다."),
+        ("It's not perfect, but it's a huge step forward.",
+         "완벽하지는 않지만, 큰 진전입니다."),
+        ("Researchers still disagree about why this happens.",
+         "이런 현상이 왜 일어나는지에 대해서는 연구자들 사이에서도 여전히 의견이 갈립니다."),
+        ("[Laughter]",
+         "[웃음]"),
+        ("The more data we collected, the less sure we became.",
+         "데이터를 모을수록 우리는 오히려 확신을 잃어 갔습니다."),
+        ("And that brings us to the final part of today's lecture.",
+         "이제 오늘 강의의 마지막 부분으로 넘어가겠습니다."),
+    ]
+    
+    def __init__(self, config: SubtitleTranslationConfig):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.processor = SubtitleProcessor()
+        self.structured = config.wire_format == "json"
+        # 구조화 응답도 요청은 compact 형식으로 보내고 응답을 "id|본문" 줄로 바꿔 처리
+        self.compact = config.wire_format == "compact" or self.structured
+        self.system_prompt = self._build_cacheable_prefix()
+        
+        # 비동기 클라이언트는 이벤트 루프에 묶이므로 루프별로 생성
+        self._async_client = None
+        self._async_client_loop = None
+    
+    def _load_system_prompt(self) -> str:
+        """번역용 시스템 프롬프트 로드"""
+        if self.structured:
+            return self._load_structured_system_prompt()
+        if self.compact:
+            return self._load_compact_system_prompt()
+            
+        return """You are an expert Korean subtitle translator.
+
+Translate English SRT subtitles into natural, complete Korean, preserving meaning and tone.
+
+Strict requirements:
+- Do NOT omit meaning or truncate endings. Each line must be a grammatically complete sentence or phrase appropriate for subtitles.
+- Preserve original SRT numbering and timestamps. Do not add, remove, split, or merge subtitle blocks.
+- Keep line length readable, but prioritize meaning and completeness over strict character limits.
+- Use consistent, natural Korean (standard polite style unless context clearly demands otherwise).
+- Keep proper punctuation. Do not drop endings like "…이다/합니다/예요" if they are needed for a complete sentence.
+
+Output format:
+- Return ONLY the SRT content between the tags below.
+
+<korean_subtitles>
+[SRT content: same numbering and timestamps as input, with Korean lines]
+</korean_subtitles>
+"""
+    
+    def prompt_cache_min_tokens(self) -> int:
+        """현재 제공업체/모델의 프롬프트 캐시 최소 길이(토큰)"""
+        if self.config.prompt_cache_min_tokens:
+            return self.config.prompt_cache_min_tokens
+        model = self.config.model.lower()
+        for name, tokens in self.MODEL_PROMPT_CACHE_MIN_TOKENS.items():
+            if name in model:
+                return tokens
+        return self.PROMPT_CACHE_MIN_TOKENS.get(self.config.provider, 1024)
+    
+    def _glossary_section(self) -> str:
+        """용어집 프롬프트 (캐시 접두부가 바이트 단위로 같도록 용어 순으로 정렬)"""
+        if not self.config.glossary:
+            return ""
+        lines = [f"- {source} => {target}" for source, target in sorted(self.config.glossary.items())]
+        return "\n\nGlossary (always use these Korean terms):\n" + '\n'.join(lines) + "\n"
+    
+    def _build_cacheable_prefix(self) -> str:
+        """
+        모든 요청에 똑같이 붙는 캐시용 접두부(시스템 프롬프트 + 용어집 + 스타일 예시) 생성
+        
+        프롬프트 캐시는 접두부가 제공업체 최소 길이 이상이고 요청마다 바이트 단위로
+        같아야 적중하므로, 최소 길이에 닿을 때까지 고정된 순서로 스타일 예시를 덧붙입니다.
+        
+        Returns:
+            시스템 프롬프트
+        """
+        prompt = self._load_system_prompt() + self._glossary_section()
+        if not self.config.prompt_cache:
+            return prompt
+            
+        estimator = TokenEstimator(self.config.provider)
+        target = math.ceil(self.prompt_cache_min_tokens() * self.PROMPT_CACHE_MARGIN)
+        header = "\n\nReference translations for tone and style (do NOT include in output):\n"
+        tokens = estimator.count(prompt) + estimator.count(header)
+        examples = []
+        for source, translation in self.STYLE_EXAMPLES:
+            if tokens >= target:
+                break
+            example = f"EN: {source}\nKO: {translation}\n"
+            examples.append(example)
+            tokens += estimator.count(example)
+            
+        if examples:
+            prompt += header + '\n'.join(examples)
+        if tokens < target:
+            self.logger.warning(f"시스템 프롬프트(약 {tokens}토큰)가 프롬프트 캐시 최소 길이"
+                                f"({self.prompt_cache_min_tokens()}토큰)보다 짧아 캐시되지 않을 수 있습니다.")
+        return prompt
+    
+    @staticmethod
+    def _record_prompt_cache(read_tokens: Optional[int], write_tokens: Optional[int]) -> None:
+        """요청 하나의 프롬프트 캐시 읽기/쓰기 토큰을 현재 배치 작업의 집계에 더함"""
+        usage = _prompt_cache_usage.get()
+        if usage is not None:
+            usage["cache_read_tokens"] += read_tokens or 0
+            usage["cache_write_tokens"] += write_tokens or 0
+    
+    def _load_compact_system_prompt(self) -> str:
+        """compact 형식("id|본문" 줄)용 시스템 프롬프트 로드"""
+        return """You are an expert Korean subtitle translator.
+
+Translate English subtitle lines into natural, complete Korean, preserving meaning and tone.
+
+Input format: one subtitle per line as "id|text". "<br>" marks a line break inside a subtitle.
+
+Strict requirements:
+- Do NOT omit meaning or truncate endings. Each line must be a grammatically complete sentence or phrase appropriate for subtitles.
+- Output exactly one "id|translated text" line for every input line, with the same id, in the same order. Do not add, remove, split, or merge lines.
+- Keep "<br>" where a line break is natural; never output real line breaks inside a subtitle.
+- Keep line length readable, but prioritize meaning and completeness over strict character limits.
+- Use consistent, natural Korean (standard polite style unless context clearly demands otherwise).
+- Keep proper punctuation. Do not drop endings like "…이다/합니다/예요" if they are needed for a complete sentence.
+
+Output format:
+- Return ONLY the translated lines between the tags below.
+
+<korean_subtitles>
+[id|Korean text lines]
+</korean_subtitles>
+"""
+    
+    def _load_structured_system_prompt(self) -> str:
+        """구조화 응답(JSON)용 시스템 프롬프트 로드"""
+        return """You are an expert Korean subtitle translator.
+
+Translate English subtitle lines into natural, complete Korean, preserving meaning and tone.
+
+Input format: one subtitle per line as "id|text". "<br>" marks a line break inside a subtitle.
+
+Strict requirements:
+- Do NOT omit meaning or truncate endings. Each line must be a grammatically complete sentence or phrase appropriate for subtitles.
+- Return exactly one {"id", "text"} entry for every input line, with the same id, in the same order. Do not add, remove, split, or merge entries.
+- Keep "<br>" where a line break is natural.
+- Keep line length readable, but prioritize meaning and completeness over strict character limits.
+- Use consistent, natural Korean (standard polite style unless context clearly demands otherwise).
+- Keep proper punctuation. Do not drop endings like "…이다/합니다/예요" if they are needed for a complete sentence.
+
+Output format:
+- Return ONLY a JSON object of the form {"subtitles": [{"id": 1, "text": "Korean text"}, ...]}.
 """
-        return base + tuning
     
-    def _get_api_key(self) -> str:
+    def encode_batch(self, batch: List[SubtitleCue]) -> str:
+        """
+        요청에 담을 배치 본문 생성 (compact 형식이면 "id|본문" 줄로 변환)
+        
+        Args:
+            batch: 자막 배치
+            
+        Returns:
+            요청 메시지 본문
+        """
+        return self.processor.to_compact(batch) if self.compact else self.processor.format_srt(batch)
+    
+    def decode_response(self, batch: List[SubtitleCue], translated: str) -> str:
+        """
+        응답에서 추출한 번역을 SRT로 되돌림 (compact 형식이면 원본 시간 정보를 다시 붙임)
+        
+        Args:
+            batch: 원본 자막 배치
+            translated: 응답에서 추출한 번역 텍스트
+            
+        Returns:
+            SRT 형식 번역 결과
+        """
+        return self.processor.from_compact(batch, translated) if self.compact else translated
+    
+    def _decode_result(self, batch: List[SubtitleCue], result: Tuple[str, int, int]) -> Tuple[str, int, int]:
+        """(번역 텍스트, 입력 토큰 수, 출력 토큰 수)의 번역 텍스트를 SRT로 되돌림"""
+        return self.decode_response(batch, result[0]), result[1], result[2]
+    
+    def _extract_translation(self, text: str) -> str:
+        """응답 텍스트에서 번역 추출 (구조화 응답이면 JSON을 파싱하고, 아니면 태그 안의 내용)"""
+        if self.structured:
+            return IncrementalJsonParser.decode(text)
+        return self._extract_korean_subtitles(text)
+    
+    def _create_stream_parser(self):
+        """스트리밍 응답 파서 생성 (응답 형식에 따라 JSON 또는 SRT/compact)"""
+        if self.structured:
+            return IncrementalJsonParser()
+        return IncrementalSrtParser(compact=self.compact)
+    
+    def _stream_callback(self, batch: List[SubtitleCue],
+                         on_subtitle: Optional[Callable[[str], None]]) -> Optional[Callable[[str], None]]:
+        """스트리밍으로 완성된 블록을 SRT 블록으로 되돌려 전달하는 콜백"""
+        if not on_subtitle or not self.compact:
+            return on_subtitle
+            
+        def callback(line: str) -> None:
+            block = self.processor.from_compact(batch, line).strip()
+            if block:
+                on_subtitle(block)
+        return callback
+    
+    def translate_batch(self, batch: List[SubtitleCue], start_number: int) -> Tuple[str, int, int]:
+        """배치 번역 (하위 클래스에서 구현)"""
+        raise NotImplementedError("하위 클래스에서 구현해야 합니다")
+    
+    async def translate_batch_async(self, batch: List[SubtitleCue], start_number: int) -> Tuple[str, int, int]:
+        """비동기 배치 번역 (하위 클래스에서 구현)"""
+        raise NotImplementedError("하위 클래스에서 구현해야 합니다")
+    
+    async def translate_batch_stream_async(self, batch: List[SubtitleCue], start_number: int,
+                                           on_subtitle: Optional[Callable[[str], None]] = None) -> Tuple[str, int, int]:
+        """스트리밍 배치 번역 (하위 클래스에서 구현)"""
+        raise NotImplementedError("하위 클래스에서 구현해야 합니다")
+    
+    def _create_async_client(self):
+        """비동기 API 클라이언트 생성 (하위 클래스에서 구현)"""
+        raise NotImplementedError("하위 클래스에서 구현해야 합니다")
+    
+    def submit_batch_job(self, requests: List[Tuple[str, List[SubtitleCue]]]) -> str:
+        """Batch API 작업 제출 (하위 클래스에서 구현)"""
+        raise NotImplementedError("하위 클래스에서 구현해야 합니다")
+    
+    def poll_batch_job(self, job_id: str) -> Tuple[bool, str]:
+        """Batch API 작업 상태 확인 (하위 클래스에서 구현)"""
+        raise NotImplementedError("하위 클래스에서 구현해야 합니다")
+    
+    def fetch_batch_results(self, job_id: str) -> Dict[str, object]:
+        """Batch API 작업 결과 조회 (하위 클래스에서 구현)"""
+        raise NotImplementedError("하위 클래스에서 구현해야 합니다")
+    
+    def _get_async_client(self):
+        """
+        현재 실행 중인 이벤트 루프에서 사용할 비동기 클라이언트를 반환
+        
+        이전 루프에서 만든 클라이언트의 연결은 재사용할 수 없으므로
+        루프가 바뀌면 새로 생성합니다.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = self._create_async_client()
+            self._async_client_loop = loop
+        return self._async_client
+
+    def _extract_korean_subtitles(self, text: str) -> str:
+        """
+        번역된 텍스트에서 <korean_subtitles> 블록을 추출합니다.
+        태그가 없으면 전체 응답을 그대로 반환합니다.
+        """
+        try:
+            start_token = '<korean_subtitles>'
+            end_token = '</korean_subtitles>'
+            content = text.split(start_token, 1)[1].split(end_token, 1)[0].strip()
+            return content + '\n\n'
+        except Exception:
+            self.logger.warning("번역된 텍스트에서 <korean_subtitles> 태그를 찾을 수 없습니다. 전체 응답을 반환합니다.")
+            return text + '\n\n'
+
+
+class ClaudeTranslator(BaseTranslator):
+    """Claude API를 이용한 번역 처리 클래스"""
+    
+    def __init__(self, config: SubtitleTranslationConfig, offline: bool = False):
+        super().__init__(config)
+        self.base_url = config.api_base_urls.get("claude")
+        # 요청을 보내지 않는 예측(--estimate)에는 API 키와 클라이언트가 필요 없음
+        self.api_key = None if offline else self._get_api_key()
+        self.client = None if offline else anthropic.Anthropic(api_key=self.api_key, base_url=self.base_url)
+    
+    def _get_api_key(self) -> str:
+        """
+        환경 변수에서 Claude API 키를 가져옴
+        
+        Returns:
+            API 키
+            
+        Raises:
+            ValueError: API 키가 설정되지 않은 경우
+        """
+        api_key = os.environ.get('ANTHROPIC_API_KEY')
+        if not api_key:
+            self.logger.error("환경 변수 'ANTHROPIC_API_KEY'가 설정되지 않았습니다.")
+            raise ValueError("환경 변수 'ANTHROPIC_API_KEY'가 설정되지 않았습니다. "
+                            "export ANTHROPIC_API_KEY=your_api_key 명령으로 API 키를 설정해주세요.")
+        return api_key
+    
+    def _create_async_client(self):
+        """비동기 Claude 클라이언트 생성 (재시도는 SubtitleTranslator가 슬롯을 반납한 채로 처리)"""
+        return anthropic.AsyncAnthropic(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+    
+    def _create_api_params(self, batch: List[SubtitleCue]) -> dict:
+        """API 호출 파라미터 생성 (구조화 응답이면 번역 결과 제출 도구 호출을 강제)"""
+        api_params = {
+            "model": self.config.model,
+            "max_tokens": self.config.max_tokens,
+            "system": [{"type": "text", "text": self.system_prompt, "cache_control": {"type": "ephemeral"}}],
+            "messages": [
+                {"role": "user", "content": self.encode_batch(batch)}
+            ]
+        }
+        if self.structured:
+            # 도구 정의는 시스템 프롬프트보다 앞에 놓여 같은 캐시 접두부에 포함됨
+            api_params["tools"] = [{
+                "name": self.STRUCTURED_OUTPUT_NAME,
+                "description": "Submit the Korean translation of every input subtitle line.",
+                "input_schema": self.STRUCTURED_OUTPUT_SCHEMA
+            }]
+            api_params["tool_choice"] = {"type": "tool", "name": self.STRUCTURED_OUTPUT_NAME}
+        return api_params
+    
+    def _usage_tokens(self, usage) -> Tuple[int, int]:
+        """
+        응답 사용량에서 (캐시 포함 입력 토큰 수, 출력 토큰 수) 추출
+        
+        Claude의 input_tokens는 캐시 읽기/쓰기 토큰을 제외하므로 더해서 반환하고,
+        캐시 토큰은 따로 기록합니다.
+        """
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        self._record_prompt_cache(cache_read, cache_write)
+        return usage.input_tokens + cache_read + cache_write, usage.output_tokens
+    
+    def _parse_response(self, message) -> Tuple[str, int, int]:
+        """API 응답에서 번역된 자막과 토큰 사용량 추출"""
+        # 토큰 사용량 추출
+        input_tokens, output_tokens = self._usage_tokens(message.usage)
+        
+        if message.stop_reason == "max_tokens":
+            raise TruncatedResponseError(f"응답이 max_tokens({self.config.max_tokens})에서 잘렸습니다.",
+                                         input_tokens, output_tokens)
+
+        if self.structured:
+            return self._parse_tool_input(message.content), input_tokens, output_tokens
+            
+        translated_text = message.content[0].text
+        
+        # 자막 내용 추출
+        korean_subtitles = self._extract_korean_subtitles(translated_text)
+        return korean_subtitles, input_tokens, output_tokens
+    
+    def _parse_tool_input(self, content) -> str:
+        """
+        응답 콘텐츠 블록에서 번역 결과 제출 도구의 입력을 찾아 compact 형식으로 변환
+        
+        Raises:
+            MalformedResponseError: 도구 호출이 없거나 입력이 스키마를 따르지 않는 경우
+        """
+        for block in content:
+            if block.type == "tool_use" and block.name == self.STRUCTURED_OUTPUT_NAME:
+                return IncrementalJsonParser.decode(block.input)
+        raise MalformedResponseError(f"응답에 {self.STRUCTURED_OUTPUT_NAME} 도구 호출이 없습니다.")
+    
+    @staticmethod
+    async def _tool_input_stream(stream):
+        """스트림 이벤트 중 도구 입력 JSON 조각만 골라 전달"""
+        async for event in stream:
+            if event.type == "content_block_delta" and event.delta.type == "input_json_delta":
+                yield event.delta.partial_json
+    
+    def translate_batch(self, batch: List[SubtitleCue], start_number: int) -> Tuple[str, int, int]:
+        """
+        주어진 배치의 자막을 번역
+        
+        Args:
+            batch: 번역할 자막 배치
+            start_number: 시작 자막 번호
+            
+        Returns:
+            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
+            
+        Raises:
+            Exception: 번역 중 오류가 발생한 경우
+        """
+        if not batch:
+            return "", 0, 0
+            
+        try:
+            message = self.client.messages.create(**self._create_api_params(batch))
+            return self._decode_result(batch, self._parse_response(message))
+                
+        except anthropic.APIError as e:
+            self.logger.error(f"Claude API 오류: {e}")
+            raise
+        except Exception as e:
+            self.logger.error(f"번역 중 오류 발생: {e}")
+            raise
+    
+    async def translate_batch_async(self, batch: List[SubtitleCue], start_number: int) -> Tuple[str, int, int]:
+        """
+        주어진 배치의 자막을 비동기로 번역
+        
+        Args:
+            batch: 번역할 자막 배치
+            start_number: 시작 자막 번호
+            
+        Returns:
+            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
+            
+        Raises:
+            Exception: 번역 중 오류가 발생한 경우
+        """
+        if not batch:
+            return "", 0, 0
+            
+        try:
+            client = self._get_async_client()
+            message = await client.messages.create(**self._create_api_params(batch))
+            return self._decode_result(batch, self._parse_response(message))
+                
+        except anthropic.APIError as e:
+            self.logger.error(f"Claude API 오류: {e}")
+            raise
+        except Exception as e:
+            self.logger.error(f"번역 중 오류 발생: {e}")
+            raise
+    
+    async def translate_batch_stream_async(self, batch: List[SubtitleCue], start_number: int,
+                                           on_subtitle: Optional[Callable[[str], None]] = None) -> Tuple[str, int, int]:
+        """
+        주어진 배치의 자막을 스트리밍으로 번역
+        
+        Args:
+            batch: 번역할 자막 배치
+            start_number: 시작 자막 번호
+            on_subtitle: 자막 블록이 완성될 때마다 호출되는 콜백
+            
+        Returns:
+            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
+            
+        Raises:
+            MalformedResponseError: 응답이 SRT 형식을 벗어난 경우 (스트림을 즉시 중단)
+            Exception: 번역 중 오류가 발생한 경우
+        """
+        if not batch:
+            return "", 0, 0
+            
+        parser = self._create_stream_parser()
+        on_subtitle = self._stream_callback(batch, on_subtitle)
+        try:
+            client = self._get_async_client()
+            async with client.messages.stream(**self._create_api_params(batch)) as stream:
+                chunks = self._tool_input_stream(stream) if self.structured else stream.text_stream
+                async for text in chunks:
+                    for subtitle in parser.feed(text):
+                        if on_subtitle:
+                            on_subtitle(subtitle)
+                message = await stream.get_final_message()
+                
+            input_tokens, output_tokens = self._usage_tokens(message.usage)
+            if message.stop_reason == "max_tokens":
+                raise TruncatedResponseError(f"응답이 max_tokens({self.config.max_tokens})에서 잘렸습니다.",
+                                             input_tokens, output_tokens)
+            translated = self._parse_tool_input(message.content) if self.structured else parser.close()
+            return self.decode_response(batch, translated), input_tokens, output_tokens
+                
+        except anthropic.APIError as e:
+            self.logger.error(f"Claude API 오류: {e}")
+            raise
+        except Exception as e:
+            self.logger.error(f"번역 중 오류 발생: {e}")
+            raise
+    
+    def submit_batch_job(self, requests: List[Tuple[str, List[SubtitleCue]]]) -> str:
+        """
+        Message Batches API로 배치 작업 제출
+        
+        Args:
+            requests: (요청 식별자, 번역할 자막 배치) 목록
+            
+        Returns:
+            배치 작업 ID
+        """
+        message_batch = self.client.messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": self._create_api_params(batch)}
+            for custom_id, batch in requests
+        ])
+        return message_batch.id
+    
+    def poll_batch_job(self, job_id: str) -> Tuple[bool, str]:
+        """
+        배치 작업 상태 확인
+        
+        Args:
+            job_id: 배치 작업 ID
+            
+        Returns:
+            (완료 여부, 상태 설명)
+        """
+        message_batch = self.client.messages.batches.retrieve(job_id)
+        counts = message_batch.request_counts
+        status = (f"{message_batch.processing_status} (처리 중 {counts.processing}, 성공 {counts.succeeded}, "
+                  f"오류 {counts.errored}, 만료 {counts.expired}, 취소 {counts.canceled})")
+        return message_batch.processing_status == "ended", status
+    
+    def fetch_batch_results(self, job_id: str) -> Dict[str, object]:
+        """
+        완료된 배치 작업의 결과 조회
+        
+        Args:
+            job_id: 배치 작업 ID
+            
+        Returns:
+            요청 식별자 -> (번역된 자막, 입력 토큰 수, 출력 토큰 수) 또는 실패 사유
+        """
+        results = {}
+        for entry in self.client.messages.batches.results(job_id):
+            if entry.result.type == "succeeded":
+                try:
+                    results[entry.custom_id] = self._parse_response(entry.result.message)
+                except MalformedResponseError as e:
+                    results[entry.custom_id] = str(e)
+            elif entry.result.type == "errored":
+                results[entry.custom_id] = f"Claude API 오류: {entry.result.error}"
+            else:
+                results[entry.custom_id] = f"요청이 처리되지 않았습니다 ({entry.result.type})"
+        return results
+
+
+class OpenAITranslator(BaseTranslator):
+    """OpenAI API를 이용한 번역 처리 클래스"""
+    
+    def __init__(self, config: SubtitleTranslationConfig, offline: bool = False):
+        super().__init__(config)
+        self.base_url = config.api_base_urls.get("openai")
+        # 요청을 보내지 않는 예측(--estimate)에는 API 키와 클라이언트가 필요 없음
+        self.api_key = None if offline else self._get_api_key()
+        self.client = None if offline else openai.OpenAI(api_key=self.api_key, base_url=self.base_url)
+        
+        # 모델별 지원되지 않는 파라미터를 캐시
+        self.unsupported_params = set()
+        
+        # 같은 접두부를 쓰는 요청이 같은 캐시 서버로 가도록 묶는 키
+        self.prompt_cache_key = "subtitle-" + hashlib.sha256(self.system_prompt.encode('utf-8')).hexdigest()[:16]
+
+    def _load_system_prompt(self) -> str:
+        """OpenAI 전용: 품질 튜닝을 위한 추가 지침/예시 포함"""
+        base = super()._load_system_prompt()
+        tuning = """
+
+Style guide:
+- Prefer clear, complete sentences ending with “-습니다/었습니다/입니다”.
+- Avoid noun-ending fragments (e.g., “...날.”). Rewrite as a full sentence (e.g., “...날이었습니다.”).
+- Avoid literal calques; use natural Korean phrasing.
+
+Examples (do NOT include in output):
+<example>
+<source>
+{source}
+</source>
+<target>
+{target}
+</target>
+</example>
+"""
+        if self.structured:
+            source = "1|Because yesterday was the day the human intelligence monopoly officially ended."
+            target = '{"subtitles": [{"id": 1, "text": "어제는 인간 지능의 독점이 공식적으로 끝난 날이었습니다."}]}'
+        elif self.compact:
+            source = "1|Because yesterday was the day the human intelligence monopoly officially ended."
+            target = "1|어제는 인간 지능의 독점이 공식적으로 끝난 날이었습니다."
+        else:
+            source = ("1\n00:00:00,240 --> 00:00:12,040\n"
+                      "Because yesterday was the day the human intelligence monopoly officially ended.")
+            target = "1\n00:00:00,240 --> 00:00:12,040\n어제는 인간 지능의 독점이 공식적으로 끝난 날이었습니다."
+        return base + tuning.format(source=source, target=target)
+    
+    def _get_api_key(self) -> str:
+        """
+        환경 변수에서 OpenAI API 키를 가져옴
+        
+        Returns:
+            API 키
+            
+        Raises:
+            ValueError: API 키가 설정되지 않은 경우
+        """
+        api_key = os.environ.get('OPENAI_API_KEY')
+        if not api_key:
+            self.logger.error("환경 변수 'OPENAI_API_KEY'가 설정되지 않았습니다.")
+            raise ValueError("환경 변수 'OPENAI_API_KEY'가 설정되지 않았습니다. "
+                            "export OPENAI_API_KEY=your_api_key 명령으로 API 키를 설정해주세요.")
+        return api_key
+    
+    def _create_api_params(self, batch: List[SubtitleCue]) -> dict:
+        """API 호출 파라미터를 생성하고 지원되지 않는 파라미터를 제거"""
+        api_params = {
+            "model": self.config.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": self.encode_batch(batch)}
+            ]
+        }
+        
+        # 이전에 지원되지 않는다고 확인된 파라미터들은 제외
+        if "temperature" not in self.unsupported_params:
+            api_params["temperature"] = 0.2
+        if "top_p" not in self.unsupported_params:
+            api_params["top_p"] = 0.9
+        if "presence_penalty" not in self.unsupported_params:
+            api_params["presence_penalty"] = 0.0
+        if "frequency_penalty" not in self.unsupported_params:
+            api_params["frequency_penalty"] = 0.0
+        if "seed" not in self.unsupported_params:
+            api_params["seed"] = 42
+        if self.structured:
+            if "response_format" not in self.unsupported_params:
+                api_params["response_format"] = {
+                    "type": "json_schema",
+                    "json_schema": {"name": self.STRUCTURED_OUTPUT_NAME, "strict": True,
+                                    "schema": self.STRUCTURED_OUTPUT_SCHEMA}
+                }
+            else:
+                # json_schema를 지원하지 않는 모델은 JSON 모드로 대신함 (형식은 시스템 프롬프트로 지정)
+                api_params["response_format"] = {"type": "json_object"}
+        if self.config.prompt_cache and "prompt_cache_key" not in self.unsupported_params:
+            # 구버전 SDK에도 전달되도록 extra_body 사용
+            api_params["extra_body"] = {"prompt_cache_key": self.prompt_cache_key}
+        
+        if self.config.max_tokens > 0:
+            if "max_tokens" not in self.unsupported_params:
+                api_params["max_tokens"] = self.config.max_tokens
+            else:
+                # 일부 모델(o1/o3/Responses API)은 max_completion_tokens 사용
+                api_params["max_completion_tokens"] = self.config.max_tokens
+            
+        return api_params
+    
+    def _create_async_client(self):
+        """비동기 OpenAI 클라이언트 생성 (재시도는 SubtitleTranslator가 슬롯을 반납한 채로 처리)"""
+        return openai.AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+    
+    def _mark_unsupported_param(self, error_str: str) -> bool:
+        """
+        오류 메시지에서 지원되지 않는 파라미터를 찾아 기록
+        
+        Args:
+            error_str: API 오류 메시지
+            
+        Returns:
+            지원되지 않는 파라미터 오류이면 True (파라미터 제거 후 재시도 가능)
+        """
+        if ("Unsupported parameter" not in error_str and "Unsupported value" not in error_str and
+                "Unrecognized request argument" not in error_str and
+                ("response_format" not in error_str or "response_format" in self.unsupported_params)):
+            return False
+            
+        # 어떤 파라미터가 문제인지 파악
+        for param in ("temperature", "max_tokens", "max_completion_tokens", "top_p",
+                      "presence_penalty", "frequency_penalty", "seed", "prompt_cache_key", "response_format"):
+            if param in error_str:
+                self.unsupported_params.add(param)
+                self.logger.info(f"모델 {self.config.model}에서 {param} 파라미터를 지원하지 않습니다. 제거 후 재시도합니다.")
+                break
+                
+        return True
+    
+    def _usage_tokens(self, usage) -> Tuple[int, int]:
+        """
+        응답 사용량에서 (캐시 포함 입력 토큰 수, 출력 토큰 수) 추출
+        
+        OpenAI의 prompt_tokens는 캐시된 토큰을 포함하며, 캐시 쓰기 요금은 없습니다.
+        """
+        details = getattr(usage, "prompt_tokens_details", None)
+        self._record_prompt_cache(getattr(details, "cached_tokens", 0), 0)
+        return usage.prompt_tokens, usage.completion_tokens
+    
+    def _parse_response(self, response) -> Tuple[str, int, int]:
+        """API 응답에서 번역된 자막과 토큰 사용량 추출"""
+        # 토큰 사용량 추출
+        input_tokens, output_tokens = self._usage_tokens(response.usage)
+        
+        if response.choices[0].finish_reason == "length":
+            raise TruncatedResponseError(f"응답이 최대 토큰 수({self.config.max_tokens})에서 잘렸습니다.",
+                                         input_tokens, output_tokens)
+
+        message = response.choices[0].message
+        if getattr(message, "refusal", None):
+            raise MalformedResponseError(f"모델이 응답을 거부했습니다: {message.refusal}")
+        translated_text = message.content or ""
+        
+        # 자막 내용 추출
+        korean_subtitles = self._extract_translation(translated_text)
+        return korean_subtitles, input_tokens, output_tokens
+    
+    def translate_batch(self, batch: List[SubtitleCue], start_number: int) -> Tuple[str, int, int]:
+        """
+        주어진 배치의 자막을 번역
+        
+        Args:
+            batch: 번역할 자막 배치
+            start_number: 시작 자막 번호
+            
+        Returns:
+            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
+            
+        Raises:
+            Exception: 번역 중 오류가 발생한 경우
+        """
+        if not batch:
+            return "", 0, 0
+            
+        try:
+            api_params = self._create_api_params(batch)
+            response = self.client.chat.completions.create(**api_params)
+            return self._decode_result(batch, self._parse_response(response))
+                
+        except openai.APIError as e:
+            # 지원되지 않는 파라미터 에러 처리: 파라미터를 제거하고 재시도
+            if self._mark_unsupported_param(str(e)):
+                api_params = self._create_api_params(batch)
+                response = self.client.chat.completions.create(**api_params)
+                return self._decode_result(batch, self._parse_response(response))
+            else:
+                self.logger.error(f"OpenAI API 오류: {e}")
+                raise
+        except Exception as e:
+            self.logger.error(f"번역 중 오류 발생: {e}")
+            raise
+    
+    async def translate_batch_async(self, batch: List[SubtitleCue], start_number: int) -> Tuple[str, int, int]:
+        """
+        주어진 배치의 자막을 비동기로 번역
+        
+        Args:
+            batch: 번역할 자막 배치
+            start_number: 시작 자막 번호
+            
+        Returns:
+            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
+            
+        Raises:
+            Exception: 번역 중 오류가 발생한 경우
+        """
+        if not batch:
+            return "", 0, 0
+            
+        client = self._get_async_client()
+        try:
+            api_params = self._create_api_params(batch)
+            response = await client.chat.completions.create(**api_params)
+            return self._decode_result(batch, self._parse_response(response))
+                
+        except openai.APIError as e:
+            # 지원되지 않는 파라미터 에러 처리: 파라미터를 제거하고 재시도
+            if self._mark_unsupported_param(str(e)):
+                api_params = self._create_api_params(batch)
+                response = await client.chat.completions.create(**api_params)
+                return self._decode_result(batch, self._parse_response(response))
+            else:
+                self.logger.error(f"OpenAI API 오류: {e}")
+                raise
+        except Exception as e:
+            self.logger.error(f"번역 중 오류 발생: {e}")
+            raise
+    
+    async def _consume_stream(self, batch: List[SubtitleCue], on_subtitle: Optional[Callable[[str], None]]) -> Tuple[str, int, int]:
+        """스트리밍 요청을 보내고 응답 조각을 파싱"""
+        client = self._get_async_client()
+        api_params = self._create_api_params(batch)
+        api_params["stream"] = True
+        api_params["stream_options"] = {"include_usage": True}
+        
+        parser = self._create_stream_parser()
+        on_subtitle = self._stream_callback(batch, on_subtitle)
+        input_tokens = output_tokens = 0
+        finish_reason = None
+        
+        stream = await client.chat.completions.create(**api_params)
+        try:
+            async for chunk in stream:
+                # 마지막 조각에만 토큰 사용량이 포함됨
+                if chunk.usage:
+                    input_tokens, output_tokens = self._usage_tokens(chunk.usage)
+                if chunk.choices and chunk.choices[0].finish_reason:
+                    finish_reason = chunk.choices[0].finish_reason
+                if chunk.choices and chunk.choices[0].delta.content:
+                    for subtitle in parser.feed(chunk.choices[0].delta.content):
+                        if on_subtitle:
+                            on_subtitle(subtitle)
+        finally:
+            await stream.close()
+            
+        if finish_reason == "length":
+            raise TruncatedResponseError(f"응답이 최대 토큰 수({self.config.max_tokens})에서 잘렸습니다.",
+                                         input_tokens, output_tokens)
+        return self.decode_response(batch, parser.close()), input_tokens, output_tokens
+    
+    async def translate_batch_stream_async(self, batch: List[SubtitleCue], start_number: int,
+                                           on_subtitle: Optional[Callable[[str], None]] = None) -> Tuple[str, int, int]:
+        """
+        주어진 배치의 자막을 스트리밍으로 번역
+        
+        Args:
+            batch: 번역할 자막 배치
+            start_number: 시작 자막 번호
+            on_subtitle: 자막 블록이 완성될 때마다 호출되는 콜백
+            
+        Returns:
+            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
+            
+        Raises:
+            MalformedResponseError: 응답이 SRT 형식을 벗어난 경우 (스트림을 즉시 중단)
+            Exception: 번역 중 오류가 발생한 경우
+        """
+        if not batch:
+            return "", 0, 0
+            
+        try:
+            return await self._consume_stream(batch, on_subtitle)
+                
+        except openai.APIError as e:
+            # 지원되지 않는 파라미터 에러 처리: 파라미터를 제거하고 재시도
+            if self._mark_unsupported_param(str(e)):
+                return await self._consume_stream(batch, on_subtitle)
+            else:
+                self.logger.error(f"OpenAI API 오류: {e}")
+                raise
+        except Exception as e:
+            self.logger.error(f"번역 중 오류 발생: {e}")
+            raise
+    
+    def submit_batch_job(self, requests: List[Tuple[str, List[SubtitleCue]]]) -> str:
+        """
+        Batch API로 배치 작업 제출 (요청을 JSONL 파일로 업로드한 뒤 작업 생성)
+        
+        Args:
+            requests: (요청 식별자, 번역할 자막 배치) 목록
+            
+        Returns:
+            배치 작업 ID
+        """
+        lines = []
+        for custom_id, batch in requests:
+            # 요청 본문에는 extra_body 없이 파라미터를 그대로 담음
+            body = self._create_api_params(batch)
+            body.update(body.pop("extra_body", {}))
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body
+            }, ensure_ascii=False))
+        input_file = self.client.files.create(
+            file=("subtitle_batch.jsonl", '\n'.join(lines).encode('utf-8')),
+            purpose="batch"
+        )
+        batch_job = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch_job.id
+    
+    def poll_batch_job(self, job_id: str) -> Tuple[bool, str]:
+        """
+        배치 작업 상태 확인
+        
+        Args:
+            job_id: 배치 작업 ID
+            
+        Returns:
+            (완료 여부, 상태 설명)
+            
+        Raises:
+            RuntimeError: 작업이 실패/만료/취소된 경우
+        """
+        batch_job = self.client.batches.retrieve(job_id)
+        status = batch_job.status
+        if batch_job.request_counts:
+            counts = batch_job.request_counts
+            status += f" (완료 {counts.completed}/{counts.total}, 실패 {counts.failed})"
+            
+        if batch_job.status in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"배치 작업 {job_id}이(가) 완료되지 못했습니다: {status}")
+        return batch_job.status == "completed", status
+    
+    def fetch_batch_results(self, job_id: str) -> Dict[str, object]:
+        """
+        완료된 배치 작업의 결과 조회
+        
+        Args:
+            job_id: 배치 작업 ID
+            
+        Returns:
+            요청 식별자 -> (번역된 자막, 입력 토큰 수, 출력 토큰 수) 또는 실패 사유
+        """
+        batch_job = self.client.batches.retrieve(job_id)
+        results = {}
+        
+        for file_id in (batch_job.output_file_id, batch_job.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                if entry.get("error") or response.get("status_code") != 200:
+                    results[entry["custom_id"]] = f"OpenAI API 오류: {entry.get('error') or response.get('body')}"
+                    continue
+                    
+                body = response["body"]
+                if body["choices"][0].get("finish_reason") == "length":
+                    results[entry["custom_id"]] = f"응답이 최대 토큰 수({self.config.max_tokens})에서 잘렸습니다."
+                    continue
+                try:
+                    korean_subtitles = self._extract_translation(body["choices"][0]["message"].get("content") or "")
+                except MalformedResponseError as e:
+                    results[entry["custom_id"]] = str(e)
+                    continue
+                usage = body.get("usage") or {}
+                self._record_prompt_cache((usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0), 0)
+                results[entry["custom_id"]] = (korean_subtitles, usage.get("prompt_tokens", 0),
+                                               usage.get("completion_tokens", 0))
+        return results
+
+
+class TranslatorFactory:
+    """번역기 팩토리 클래스"""
+    
+    @staticmethod
+    def create_translator(config: SubtitleTranslationConfig, offline: bool = False) -> BaseTranslator:
+        """
+        설정에 따라 적절한 번역기 인스턴스 생성
+        
+        Args:
+            config: 번역 설정
+            offline: True이면 API 키와 클라이언트 없이 생성 (프롬프트와 요청 형식만 사용하는 예측용)
+            
+        Returns:
+            번역기 인스턴스
+            
+        Raises:
+            ValueError: 지원하지 않는 제공업체인 경우
+        """
+        if config.provider == "claude":
+            return ClaudeTranslator(config, offline)
+        elif config.provider == "openai":
+            return OpenAITranslator(config, offline)
+        else:
+            raise ValueError(f"지원하지 않는 제공업체입니다: {config.provider}. "
+                           "사용 가능한 제공업체: claude, openai")
+
+
+class AdaptiveConcurrencyController:
+    """
+    AIMD(가산 증가/곱셈 감소) 방식으로 동시 요청 수를 조정하는 클래스
+    
+    요청이 성공하고 지연 시간이 안정적이면 한 라운드(현재 한도만큼의 성공)마다
+    한도를 1씩 늘리고, 429/529/overloaded 오류가 나면 한도를 절반으로 줄입니다.
+    """
+    
+    # 최근 평균 대비 이 배율을 넘는 지연은 불안정한 것으로 간주
+    LATENCY_TOLERANCE = 1.5
+    
+    # 지연 시간 지수 이동 평균의 가중치
+    LATENCY_SMOOTHING = 0.2
+    
+    def __init__(self, initial: int, floor: int, ceiling: int, adaptive: bool = True):
+        self.logger = logging.getLogger(__name__)
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.adaptive = adaptive
+        if adaptive:
+            self.limit = min(max(initial, self.floor), self.ceiling)
+        else:
+            self.limit = max(1, initial)
+        
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+        self._successes = 0
+        self._avg_latency = None
+        self._last_decrease = 0.0
+    
+    async def acquire(self) -> None:
+        """동시 요청 한도에 여유가 생길 때까지 대기 후 슬롯 확보"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+    
+    async def release(self) -> None:
+        """슬롯 반환 후 대기 중인 요청을 깨움"""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+    
+    async def record_success(self, latency: float) -> None:
+        """
+        요청 성공을 기록하고 필요하면 한도를 늘림
+        
+        Args:
+            latency: 요청 지연 시간 (초)
+        """
+        if self._avg_latency is None:
+            self._avg_latency = latency
+        stable = latency <= self._avg_latency * self.LATENCY_TOLERANCE
+        self._avg_latency += self.LATENCY_SMOOTHING * (latency - self._avg_latency)
+        
+        if not self.adaptive:
+            return
+            
+        if not stable:
+            # 지연이 튀면 증가를 보류하고 라운드를 다시 시작
+            self._successes = 0
+            return
+            
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.ceiling:
+            self._successes = 0
+            await self._set_limit(self.limit + 1, "요청 성공, 지연 시간 안정")
+    
+    async def record_overload(self) -> None:
+        """과부하(429/529) 응답을 기록하고 한도를 절반으로 줄임"""
+        self._successes = 0
+        if not self.adaptive:
+            return
+            
+        # 같은 시점에 보낸 요청들이 연달아 실패해도 한 번만 줄이도록 평균 지연만큼은 무시
+        now = time.monotonic()
+        cooldown = self._avg_latency or 1.0
+        if now - self._last_decrease < cooldown:
+            return
+            
+        self._last_decrease = now
+        await self._set_limit(max(self.floor, self.limit // 2), "과부하 응답")
+    
+    async def _set_limit(self, new_limit: int, reason: str) -> None:
+        """한도를 변경하고 기록 (한도가 늘어나면 늘어난 슬롯 수만큼 대기 중인 요청을 깨움)"""
+        if new_limit == self.limit:
+            return
+        self.logger.info(f"동시 요청 수 조정: {self.limit} -> {new_limit} ({reason})")
+        increase = new_limit - self.limit
+        self.limit = new_limit
+        if increase > 0:
+            async with self._condition:
+                self._condition.notify(increase)
+
+
+class TokenBucketRateLimiter:
+    """
+    분당 요청 수(RPM)와 토큰 수(TPM)를 토큰 버킷으로 제한하는 클래스
+    
+    요청 전에 추정 토큰을 미리 차감하고, 응답을 받은 뒤 실제 사용량과의
+    차이를 정산하여 제공업체 한도 바로 아래에서 꾸준히 요청을 보냅니다.
+    """
+    
+    # 한도에 딱 맞추지 않고 약간의 여유를 둠
+    HEADROOM = 0.95
+    
+    def __init__(self, limits: Dict[str, int]):
+        self.logger = logging.getLogger(__name__)
+        
+        # 버킷 이름 -> [용량, 현재 잔량]
+        self.buckets = {}
+        for name in ("rpm", "tpm", "itpm", "otpm"):
+            if limits.get(name):
+                capacity = limits[name] * self.HEADROOM
+                self.buckets[name] = [capacity, capacity]
+                
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        """설정된 한도가 하나라도 있는지 여부"""
+        return bool(self.buckets)
+    
+    def _refill(self) -> None:
+        """경과 시간만큼 버킷을 채움 (용량은 분당 한도이므로 초당 용량/60씩 회복)"""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        for bucket in self.buckets.values():
+            bucket[1] = min(bucket[0], bucket[1] + bucket[0] * elapsed / 60)
+    
+    def _charges(self, input_tokens: int, output_tokens: int) -> Dict[str, float]:
+        """버킷별 차감량 계산"""
+        return {
+            "rpm": 1,
+            "tpm": input_tokens + output_tokens,
+            "itpm": input_tokens,
+            "otpm": output_tokens,
+        }
+    
+    async def acquire(self, input_tokens: int, output_tokens: int) -> None:
+        """
+        요청을 보낼 수 있을 만큼 버킷이 찰 때까지 대기 후 추정 사용량을 차감
+        
+        Args:
+            input_tokens: 추정 입력 토큰 수
+            output_tokens: 추정 출력 토큰 수
+        """
+        if not self.enabled:
+            return
+            
+        charges = self._charges(input_tokens, output_tokens)
+        
+        # 먼저 도착한 요청부터 순서대로 처리
+        async with self._lock:
+            while True:
+                self._refill()
+                
+                wait_time = 0.0
+                for name, (capacity, level) in self.buckets.items():
+                    # 용량보다 큰 요청은 가득 찼을 때 보낼 수 있도록 용량으로 제한
+                    needed = min(charges[name], capacity)
+                    if level < needed:
+                        wait_time = max(wait_time, (needed - level) * 60 / capacity)
+                        
+                if wait_time <= 0:
+                    break
+                    
+                self.logger.debug(f"요청 한도 도달, {wait_time:.2f}초 대기합니다.")
+                await asyncio.sleep(wait_time)
+                
+            for name, bucket in self.buckets.items():
+                bucket[1] -= charges[name]
+    
+    def reconcile(self, estimated_input: int, estimated_output: int,
+                  actual_input: int, actual_output: int) -> None:
+        """
+        미리 차감한 추정치를 실제 사용량으로 정산
+        
+        추정보다 적게 썼으면 돌려주고, 더 썼으면 추가로 차감합니다
+        (잔량이 음수가 되면 그만큼 다음 요청이 기다립니다).
+        
+        Args:
+            estimated_input: 차감했던 추정 입력 토큰 수
+            estimated_output: 차감했던 추정 출력 토큰 수
+            actual_input: 실제 입력 토큰 수
+            actual_output: 실제 출력 토큰 수
+        """
+        if not self.enabled:
+            return
+            
+        estimated = self._charges(estimated_input, estimated_output)
+        actual = self._charges(actual_input, actual_output)
+        for name, bucket in self.buckets.items():
+            if name == "rpm":
+                continue
+            bucket[1] = min(bucket[0], bucket[1] + estimated[name] - actual[name])
+
+
+class HedgePolicy:
+    """
+    최근 지연 시간 분포를 기준으로 헤지(중복) 요청을 보낼 시점을 정하는 클래스
+    
+    배치마다 크기가 다르므로 지연 시간을 추정 출력 토큰당 시간으로 정규화해 기록하고,
+    그 백분위수에 현재 배치의 추정 출력 토큰 수를 곱한 시간이 지나도록 응답이 없으면
+    중복 요청을 보냅니다. 표본이 충분히 모이기 전에는 헤지하지 않습니다.
+    """
+    
+    # 백분위수 계산에 사용할 최근 표본 수
+    WINDOW = 200
+    
+    def __init__(self, percentile: float, min_samples: int):
+        self.percentile = percentile
+        self.min_samples = max(1, min_samples)
+        self.samples = deque(maxlen=self.WINDOW)
+    
+    def record(self, latency: float, estimated_output: int) -> None:
+        """
+        완료된 요청의 지연 시간 기록
+        
+        Args:
+            latency: 요청 시작부터 응답까지 걸린 시간(초)
+            estimated_output: 배치의 추정 출력 토큰 수
+        """
+        self.samples.append(latency / max(1, estimated_output))
+    
+    def delay(self, estimated_output: int) -> Optional[float]:
+        """
+        헤지 요청을 보내기까지 기다릴 시간 계산
+        
+        Args:
+            estimated_output: 배치의 추정 출력 토큰 수
+            
+        Returns:
+            대기 시간(초) (표본이 부족하면 None)
+        """
+        if len(self.samples) < self.min_samples:
+            return None
+            
+        ordered = sorted(self.samples)
+        rank = min(len(ordered), max(1, math.ceil(self.percentile / 100 * len(ordered))))
+        return ordered[rank - 1] * max(1, estimated_output)
+
+
+class DifficultyRouter:
+    """
+    자막 본문의 난이도를 점수로 매겨 빠른 모델로 보낼 쉬운 자막을 고르는 클래스
+    
+    점수는 0~1 범위로 단어 수(길이), 긴 단어와 문장 중간의 고유명사 비율(어휘),
+    쉼표/따옴표/여러 문장 등 구두점(구조), 숫자 포함 여부를 가중합해 구합니다.
+    [Music] 같은 효과음 표시와 글자가 없는 자막은 0점입니다. 모델은 자막 하나가 아니라
+    문장/장면 단위로 묶은 연속 자막마다 정하므로 한 문장이 두 모델로 나뉘지 않습니다.
+    """
+    
+    # 점수 가중치 (길이, 어휘, 구조, 숫자)
+    LENGTH_WEIGHT = 0.45
+    VOCABULARY_WEIGHT = 0.3
+    STRUCTURE_WEIGHT = 0.25
+    NUMBER_BONUS = 0.1
+    
+    # 이 단어 수 이상이면 길이 점수가 최대
+    MAX_WORDS = 20
+    # 이 길이 이상의 단어는 어려운 어휘로 봄
+    LONG_WORD_LENGTH = 8
+    
+    # 자막 사이 간격이 이 이상이면 장면이 바뀐 것으로 보고 묶음을 끊음
+    SCENE_GAP_MS = 2000
+    # 문장이 끝나지 않아도 이 수만큼 모이면 묶음을 끊음
+    MAX_GROUP_CUES = 12
+    
+    _WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z'-]*")
+    _SOUND_TAG_PATTERN = re.compile(r'^[\[(♪].*[\])♪]$')
+    # 문장 끝 (말줄임표로 끝나면 다음 자막으로 이어지는 문장으로 봄)
+    _SENTENCE_END_PATTERN = re.compile(r'(?<!\.\.)[.?!\])♪]["\'\u201d\u2019]*$')
+    
+    def __init__(self, threshold: float):
+        """
+        Args:
+            threshold: 이 점수 미만의 자막을 쉬운 자막으로 판단
+        """
+        self.threshold = threshold
+    
+    def score(self, text: str) -> float:
+        """
+        자막 본문의 난이도 점수 계산
+        
+        Args:
+            text: 자막 본문
+            
+        Returns:
+            0(쉬움)~1(어려움) 사이의 점수
+        """
+        text = ' '.join(text.split())
+        words = self._WORD_PATTERN.findall(text)
+        if not words or self._SOUND_TAG_PATTERN.match(text):
+            return 0.0
+            
+        length = min(1.0, len(words) / self.MAX_WORDS)
+        
+        long_words = sum(1 for word in words if len(word) >= self.LONG_WORD_LENGTH)
+        proper_nouns = sum(1 for word in words[1:] if word[0].isupper() and word != "I")
+        vocabulary = min(1.0, (long_words + proper_nouns) / len(words) * 2)
+        
+        sentence_ends = len(re.findall(r'[.?!]+(?=\s|$)', text))
+        marks = len(re.findall(r'[,;:"()\u2014\u2013]', text))
+        structure = min(1.0, (marks + max(0, sentence_ends - 1)) / 4)
+        
+        score = (length * self.LENGTH_WEIGHT + vocabulary * self.VOCABULARY_WEIGHT +
+                 structure * self.STRUCTURE_WEIGHT)
+        if re.search(r'\d', text):
+            score += self.NUMBER_BONUS
+        return min(1.0, score)
+    
+    def is_easy(self, text: str) -> bool:
+        """빠른 모델로 보내도 되는 쉬운 자막인지 판단"""
+        return self.score(text) < self.threshold
+    
+    def route_groups(self, subtitles: Iterable[SubtitleCue]) -> Iterator[Tuple[SubtitleCue, bool]]:
+        """
+        연속 자막을 문장/장면 단위로 묶어 묶음마다 쉬운지 판단
+        
+        문장이 끝나지 않은 자막은 다음 자막과 같은 묶음에 넣고, 자막 사이 간격이
+        SCENE_GAP_MS 이상이면 묶음을 끊습니다. 묶음의 자막이 모두 쉬울 때만 쉬운
+        묶음으로 판단합니다.
+        
+        Args:
+            subtitles: 원래 순서의 자막 목록 또는 생성기
+            
+        Returns:
+            (자막, 쉬운 묶음에 속하는지 여부) 생성기 (원래 순서)
+        """
+        group: List[SubtitleCue] = []
+        for subtitle in subtitles:
+            if group and (subtitle.start_ms - group[-1].end_ms >= self.SCENE_GAP_MS or
+                          len(group) >= self.MAX_GROUP_CUES):
+                yield from self._judge_group(group)
+                group = []
+            group.append(subtitle)
+            if self._SENTENCE_END_PATTERN.search(' '.join(subtitle.text.split())):
+                yield from self._judge_group(group)
+                group = []
+        yield from self._judge_group(group)
+    
+    def _judge_group(self, group: List[SubtitleCue]) -> Iterator[Tuple[SubtitleCue, bool]]:
+        """묶음의 자막마다 묶음 전체가 쉬운지 여부를 붙여 반환"""
+        easy = all(self.is_easy(subtitle.text) for subtitle in group)
+        return ((subtitle, easy) for subtitle in group)
+
+
+class ModelTier:
+    """
+    난이도 라우팅의 모델 등급 하나 (번역기와 설정, 캐시 키용 프롬프트 해시, 요청 제한)
+    """
+    
+    def __init__(self, name: str, config: SubtitleTranslationConfig, translator: BaseTranslator):
+        self.name = name
+        self.config = config
+        self.translator = translator
+        self.prompt_hash = hashlib.sha256(translator.system_prompt.encode('utf-8')).hexdigest()[:16]
+        self.system_prompt_tokens = TokenEstimator(config.provider).count(translator.system_prompt)
+        
+        # 등급별 동시 요청 수 제어기와 요청 한도 제한기 (번역 실행 시 생성)
+        self.concurrency: Optional[AdaptiveConcurrencyController] = None
+        self.rate_limiter: Optional[TokenBucketRateLimiter] = None
+
+
+class TranslationCache:
+    """
+    번역 결과를 자막 단위로 저장하는 번역 메모리 캐시
+    
+    키는 제공업체, 모델, 시스템 프롬프트 해시, 정규화된 자막 본문을 합친 해시이며,
+    자주 쓰는 항목은 메모리 LRU에, 전체는 SQLite 파일에 보관합니다.
+    파일 크기가 한도를 넘으면 가장 오래 쓰이지 않은 항목부터 지웁니다.
+    """
+    
+    # 용량 초과로 지울 항목을 last_used 색인 순서로 한 번에 읽는 수
+    EVICT_CHUNK = 1000
+    
+    def __init__(self, cache_file: str, max_mb: float, memory_entries: int, read_only: bool = False):
+        """
+        Args:
+            cache_file: SQLite 캐시 파일 경로
+            max_mb: 파일 크기 한도 (MB)
+            memory_entries: 메모리 LRU에 보관할 항목 수
+            read_only: True이면 이미 있는 캐시 파일을 읽기만 함 (파일을 만들거나 last_used를 갱신하지 않는
+                --estimate용)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache_file = cache_file
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.memory_entries = memory_entries
+        self.memory: "OrderedDict[str, str]" = OrderedDict()
+        self.read_only = read_only
+        
+        self.hits = 0
+        self.misses = 0
+        
+        if read_only:
+            uri = f"file:{urllib.parse.quote(os.path.abspath(cache_file))}?mode=ro"
+            self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+            self.connection = sqlite3.connect(cache_file, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+            self.connection.commit()
+        
+        self.total_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM translations").fetchone()[0]
+        self.logger.info(f"번역 캐시: {os.path.abspath(cache_file)} (끄려면 --no-cache)")
+    
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """줄마다 공백을 정리하여 사소한 차이로 캐시가 빗나가지 않게 함"""
+        lines = (' '.join(line.split()) for line in text.strip().split('\n'))
+        return '\n'.join(line for line in lines if line)
+    
+    @staticmethod
+    def make_key(provider: str, model: str, prompt_hash: str, text: str) -> str:
+        """
+        캐시 키 생성
+        
+        Args:
+            provider: 제공업체
+            model: 모델 이름
+            prompt_hash: 시스템 프롬프트 해시
+            text: 자막 본문
+            
+        Returns:
+            SHA-256 키
+        """
+        raw = '\x1f'.join((provider, model, prompt_hash, TranslationCache.normalize_text(text)))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        캐시에서 번역을 찾음
+        
+        Args:
+            key: 캐시 키
+            
+        Returns:
+            번역된 본문 (없으면 None)
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self.memory[key]
+            
+        row = self.connection.execute("SELECT text FROM translations WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+            
+        if not self.read_only:
+            self.connection.execute("UPDATE translations SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._remember(key, row[0])
+        self.hits += 1
+        return row[0]
+    
+    def put(self, key: str, text: str) -> None:
+        """
+        번역을 캐시에 저장
+        
+        Args:
+            key: 캐시 키
+            text: 번역된 본문
+        """
+        size = len(key) + len(text.encode('utf-8'))
+        previous = self.connection.execute("SELECT size FROM translations WHERE key = ?", (key,)).fetchone()
+        if previous:
+            self.total_bytes -= previous[0]
+            
+        self.connection.execute(
+            "INSERT OR REPLACE INTO translations (key, text, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, text, size, time.time())
+        )
+        self.total_bytes += size
+        self._remember(key, text)
+        
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+    
+    def _remember(self, key: str, text: str) -> None:
+        """메모리 LRU에 추가하고 넘치면 가장 오래된 항목 제거"""
+        self.memory[key] = text
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+    
+    def _evict(self) -> None:
+        """
+        파일 크기가 한도의 90% 아래로 내려갈 때까지 오래 쓰이지 않은 항목 삭제
+        
+        last_used 색인 순서로 EVICT_CHUNK개씩만 읽으므로 테이블 전체를 훑지 않습니다.
+        """
+        target = int(self.max_bytes * 0.9)
+        evicted_count = 0
+        
+        while self.total_bytes > target:
+            rows = self.connection.execute("SELECT key, size FROM translations ORDER BY last_used LIMIT ?",
+                                           (self.EVICT_CHUNK,)).fetchall()
+            if not rows:
+                break
+            evicted = []
+            for key, size in rows:
+                if self.total_bytes <= target:
+                    break
+                evicted.append((key,))
+                self.total_bytes -= size
+                self.memory.pop(key, None)
+            self.connection.executemany("DELETE FROM translations WHERE key = ?", evicted)
+            evicted_count += len(evicted)
+            
+        self.logger.info(f"번역 캐시 용량 초과로 {evicted_count}개 항목을 삭제했습니다.")
+    
+    def flush(self) -> None:
+        """변경 내용을 파일에 반영"""
+        self.connection.commit()
+    
+    def close(self) -> None:
+        """변경 내용을 반영하고 연결 종료"""
+        self.connection.commit()
+        self.connection.close()
+
+
+class JobKeyHasher:
+    """
+    입력 SRT 조각을 다른 처리에 넘기면서 작업 식별 키(TranslationJournal.make_job_key)를 함께 계산하는 클래스
+    
+    자막 시간 정보를 모으며 파일을 읽는 동안 같은 조각으로 키를 만들므로, 키를 구하려고
+    입력 파일을 따로 다시 읽지 않아도 됩니다.
+    """
+    
+    def __init__(self, provider: str, model: str, prompt_hash: str):
+        """
+        Args:
+            provider: 제공업체
+            model: 모델 이름
+            prompt_hash: 시스템 프롬프트 해시
+        """
+        self._digest = hashlib.sha256()
+        for part in (provider, model, prompt_hash):
+            self._digest.update(part.encode('utf-8'))
+            self._digest.update(b'\x1f')
+    
+    def wrap(self, srt_chunks: Iterable[str]) -> Iterator[str]:
+        """
+        조각을 그대로 넘기면서 키에 더함
+        
+        Args:
+            srt_chunks: 입력 SRT 내용 조각
+            
+        Returns:
+            같은 조각 생성기 (끝까지 읽어야 hexdigest가 파일 전체의 키가 됨)
+        """
+        for chunk in srt_chunks:
+            self._digest.update(chunk.encode('utf-8'))
+            yield chunk
+    
+    def hexdigest(self) -> str:
+        """지금까지 넘긴 조각으로 만든 SHA-256 키"""
+        digest = self._digest.copy()
+        digest.update(b'\x1f')
+        return digest.hexdigest()
+
+
+class TranslationJournal:
+    """
+    완료된 배치를 기록하여 중단된 번역 작업을 이어서 할 수 있게 하는 클래스
+    
+    작업은 입력 파일 내용과 번역 설정(제공업체, 모델, 시스템 프롬프트)의 해시로
+    식별되며, 배치가 끝날 때마다 결과를 JSON 한 줄로 추가합니다. 같은 명령을 다시
+    실행하면 기록된 자막은 그대로 쓰고 나머지만 번역합니다.
+    """
+    
+    def __init__(self, journal_dir: str, job_key: str):
+        self.logger = logging.getLogger(__name__)
+        self.job_key = job_key
+        self.journal_dir = journal_dir
+        self.path = os.path.join(journal_dir, f"{job_key}.jsonl")
+        self._file = None
+    
+    @staticmethod
+    def make_job_key(srt_chunks: Iterable[str], provider: str, model: str, prompt_hash: str) -> str:
+        """
+        작업 식별 키 생성
+        
+        Args:
+            srt_chunks: 입력 SRT 내용 조각 (내용 전체를 한 조각으로 넘겨도 같은 키)
+            provider: 제공업체
+            model: 모델 이름
+            prompt_hash: 시스템 프롬프트 해시
+            
+        Returns:
+            SHA-256 키
+        """
+        hasher = JobKeyHasher(provider, model, prompt_hash)
+        for _ in hasher.wrap(srt_chunks):
+            pass
+        return hasher.hexdigest()
+    
+    def load(self) -> Dict[int, SubtitleCue]:
+        """
+        기록된 자막을 읽어옴
+        
+        Returns:
+            자막 위치 -> 번역된 자막
+        """
+        completed: Dict[int, SubtitleCue] = {}
+        if not os.path.exists(self.path):
+            return completed
+            
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 기록 도중 중단된 마지막 줄은 무시
+                    self.logger.warning("작업 기록의 손상된 줄을 건너뜁니다.")
+                    continue
+                for position, subtitle in entry.get("subtitles", {}).items():
+                    if isinstance(subtitle, str):
+                        # 이전 형식의 기록은 SRT 블록 문자열로 저장되어 있음
+                        cues = SubtitleProcessor().parse_srt(subtitle)
+                        if not cues:
+                            continue
+                        completed[int(position)] = cues[0]
+                    else:
+                        completed[int(position)] = SubtitleCue(*subtitle)
+                    
+        return completed
+    
+    def record(self, batch_index: int, subtitles: Dict[int, SubtitleCue]) -> None:
+        """
+        완료된 배치를 기록하고 디스크에 바로 반영
+        
+        Args:
+            batch_index: 배치 인덱스
+            subtitles: 자막 위치 -> 번역된 자막
+        """
+        if self._file is None:
+            # 디렉터리는 처음 기록할 때 만듦 (기록하지 않는 --estimate는 아무것도 만들지 않음)
+            os.makedirs(self.journal_dir, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            
+        entry = {"batch": batch_index, "subtitles": {
+            str(position): [cue.index, cue.start_ms, cue.end_ms, cue.text] for position, cue in subtitles.items()
+        }}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+    
+    def close(self) -> None:
+        """기록 파일 닫기"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def remove(self) -> None:
+        """작업이 끝나 더 이상 필요 없는 기록 삭제"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ThroughputHistory:
+    """
+    모델별 응답 속도를 기록해 요청 지연 시간을 예측하는 클래스 (--estimate에서 사용)
+    
+    요청 지연 시간을 "고정 지연 + 출력 토큰 수 / 초당 출력 토큰 수"로 보고, 실제 번역에서
+    측정한 (출력 토큰 수, 지연 시간)의 합계를 모델별로 JSON 파일에 누적해 최소제곱으로
+    두 값을 구합니다. 기록이 부족한 모델은 모델 계열별 기본값을 사용합니다.
+    """
+    
+    # 모델 이름에 포함된 문자열 -> (초당 출력 토큰 수, 고정 지연(초)) (앞에서부터 먼저 일치하는 항목 사용)
+    DEFAULT_SPEEDS = [
+        ("haiku", 120.0, 0.6),
+        ("opus", 35.0, 1.5),
+        ("sonnet", 60.0, 1.0),
+        ("mini", 90.0, 0.5),
+        ("gpt-4o", 80.0, 0.6),
+        ("gpt", 70.0, 0.8),
+    ]
+    FALLBACK_SPEED = (50.0, 1.0)
+    
+    # 기록된 값을 사용하기 위한 최소 요청 수
+    MIN_REQUESTS = 5
+    
+    def __init__(self, history_file: str):
+        self.logger = logging.getLogger(__name__)
+        self.history_file = history_file
+        self.models: Dict[str, Dict[str, float]] = {}
+        self._dirty = False
+        
+        if os.path.exists(history_file):
+            try:
+                with open(history_file, 'r', encoding='utf-8') as f:
+                    self.models = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                self.logger.warning(f"응답 속도 기록을 읽지 못했습니다: {e}")
+    
+    def record(self, model: str, output_tokens: int, latency: float) -> None:
+        """
+        완료된 요청의 출력 토큰 수와 지연 시간 기록
+        
+        Args:
+            model: 모델 이름
+            output_tokens: 출력 토큰 수
+            latency: 요청 시작부터 응답까지 걸린 시간(초)
+        """
+        sums = self.models.setdefault(model, {"n": 0, "x": 0.0, "y": 0.0, "xx": 0.0, "xy": 0.0})
+        sums["n"] += 1
+        sums["x"] += output_tokens
+        sums["y"] += latency
+        sums["xx"] += output_tokens * output_tokens
+        sums["xy"] += output_tokens * latency
+        self._dirty = True
+    
+    def speed(self, model: str) -> Tuple[float, float, bool]:
+        """
+        모델의 (초당 출력 토큰 수, 고정 지연(초), 기록 기반 여부) 반환
+        
+        Args:
+            model: 모델 이름
+        """
+        tokens_per_second, overhead = self.FALLBACK_SPEED
+        for name, default_speed, default_overhead in self.DEFAULT_SPEEDS:
+            if name in model.lower():
+                tokens_per_second, overhead = default_speed, default_overhead
+                break
+                
+        sums = self.models.get(model)
+        if sums and sums["n"] >= self.MIN_REQUESTS:
+            n = sums["n"]
+            variance = n * sums["xx"] - sums["x"] ** 2
+            if variance > 0:
+                slope = (n * sums["xy"] - sums["x"] * sums["y"]) / variance
+                intercept = (sums["y"] - slope * sums["x"]) / n
+                if slope > 0:
+                    return 1 / slope, max(0.0, intercept), True
+            if sums["x"] > 0 and sums["y"] > 0:
+                # 배치 크기가 모두 같으면 기울기를 구할 수 없으므로 고정 지연 없이 평균 속도 사용
+                return sums["x"] / sums["y"], 0.0, True
+                
+        return tokens_per_second, overhead, False
+    
+    def save(self) -> None:
+        """새 기록이 있으면 파일에 저장"""
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.history_file)), exist_ok=True)
+            temp_file = f"{self.history_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.models, f, indent=2)
+            os.replace(temp_file, self.history_file)
+            self._dirty = False
+        except IOError as e:
+            self.logger.warning(f"응답 속도 기록을 저장하지 못했습니다: {e}")
+
+
+class SubtitleTranslator:
+    """전체 자막 번역 프로세스를 관리하는 클래스"""
+    
+    # 재시도를 모두 실패한 배치 자리에 남기는 표시
+    FAILURE_MARKER = "[번역 실패"
+    
+    # 배치를 나누면 성공할 수 있는 실패 종류 (응답 잘림, 응답 형식 오류, 요청 크기 초과)
+    BISECT_ERROR_CLASSES = ("truncated", "parse", "size")
+    
+    # 다시 보내도 같은 결과가 나오는 요청 오류 상태 코드 (잘못된 요청, 인증/권한, 없는 모델 등)
+    CLIENT_ERROR_STATUSES = (400, 401, 403, 404, 422)
+    
+    # 요청이 너무 크다는 400 오류 메시지에 나오는 표현
+    _SIZE_ERROR_HINTS = ("too long", "too large", "too many tokens", "context length", "context_length",
+                         "maximum context")
+    
+    # 동시 요청 수 상한 하나당 미리 만들어 두는 배치 수 (번역 중인 배치와 기록을 기다리는 자막 수의 상한)
+    IN_FLIGHT_PER_SLOT = 2
+    
+    # 한 모델 등급의 배치가 이 자막 수만큼 지나도록 차지 않으면 그대로 보내고,
+    # 아직 기록하지 못한 가장 앞 자막보다 이만큼 앞서면 앞쪽 배치가 끝날 때까지 배치 구성을 멈춤
+    PLAN_FLUSH_DISTANCE = 2000
+    
+    def __init__(self, config: SubtitleTranslationConfig, offline: bool = False):
+        """
+        Args:
+            config: 번역 설정
+            offline: True이면 API 키와 클라이언트 없이 생성 (요청을 보내지 않는 estimate_files 전용)
+        """
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.file_handler = SubtitleFileHandler()
+        self.processor = SubtitleProcessor()
+        self.translator = TranslatorFactory.create_translator(config, offline)
+        self.token_estimator = TokenEstimator(config.provider, compact=config.wire_format == "compact",
+                                              structured=config.wire_format == "json")
+        self.system_prompt_tokens = self.token_estimator.count(self.translator.system_prompt)
+        self.prompt_hash = hashlib.sha256(self.translator.system_prompt.encode('utf-8')).hexdigest()[:16]
+        
+        # 난이도 라우팅 (쉬운 자막은 빠른 모델 등급으로, 나머지는 기본 모델로 번역)
+        self.tiers: Dict[str, ModelTier] = {"main": ModelTier("main", config, self.translator)}
+        self.router: Optional[DifficultyRouter] = None
+        if config.routing_enabled:
+            fast_config = self._create_fast_config()
+            self.tiers["fast"] = ModelTier("fast", fast_config, TranslatorFactory.create_translator(fast_config, offline))
+            self.router = DifficultyRouter(config.routing_threshold)
+            self.logger.info(f"난이도 라우팅: 쉬운 자막은 {fast_config.provider}/{fast_config.model}, "
+                             f"나머지는 {config.provider}/{config.model}로 번역합니다.")
+        
+        # 번역 메모리 캐시 (캐시에 있는 자막은 API로 보내지 않음)
+        # (offline 예측은 이미 있는 캐시 파일을 읽기만 하고, 파일이 없으면 캐시 없이 계산)
+        self.cache: Optional[TranslationCache] = None
+        if config.cache_enabled and not (offline and not os.path.exists(config.cache_file)):
+            self.cache = TranslationCache(config.cache_file, config.cache_max_mb, config.cache_memory_entries,
+                                          read_only=offline)
+        
+        # 모델별 응답 속도 기록 (실제 요청마다 갱신, --estimate에서 사용)
+        self.throughput = ThroughputHistory(config.throughput_file)
+        
+        # 토큰 사용량 추적 변수
+        self.total_input_tokens = 0
+        self.total_output_tokens = 0
+        
+        # 배치 완료 시 호출되는 진행 상황 콜백 (완료된 배치 수, 전체 배치 수)
+        self.progress_callback: Optional[Callable[[int, int], None]] = None
+        
+        # 스트리밍 모드에서 자막 블록이 완성될 때마다 호출되는 콜백 (배치 시작 번호, 자막 블록)
+        # 재시도된 배치의 블록은 다시 전달될 수 있음
+        self.subtitle_callback: Optional[Callable[[int, str], None]] = None
+        
+        # 기본 모델 등급의 동시 요청 수 제어기와 요청 한도 제한기 (헤지 요청도 사용, translate_async 실행 시 생성)
+        self.concurrency: Optional[AdaptiveConcurrencyController] = None
+        self.rate_limiter: Optional[TokenBucketRateLimiter] = None
+        
+        # 늦은 배치에 보낼 헤지 요청 설정 (다른 제공업체/모델을 지정하면 별도 번역기 사용)
+        self.hedge_policy: Optional[HedgePolicy] = None
+        self.hedge_config = config
+        self.hedge_translator = self.translator
+        self.hedge_prompt_hash = self.prompt_hash
+        if config.hedge_enabled:
+            self.hedge_policy = HedgePolicy(config.hedge_percentile, config.hedge_min_samples)
+            if config.hedge_provider or config.hedge_model:
+                self.hedge_config = self._create_hedge_config()
+                self.hedge_translator = TranslatorFactory.create_translator(self.hedge_config, offline)
+                self.hedge_prompt_hash = hashlib.sha256(
+                    self.hedge_translator.system_prompt.encode('utf-8')).hexdigest()[:16]
+    
+    def _create_hedge_config(self) -> SubtitleTranslationConfig:
+        """헤지 요청에 사용할 제공업체/모델로 바꾼 설정 복사본 생성"""
+        hedge_config = copy.copy(self.config)
+        if self.config.hedge_provider and self.config.hedge_provider != self.config.provider:
+            hedge_config.provider = self.config.hedge_provider
+            hedge_config._update_model_defaults()
+        if self.config.hedge_model:
+            hedge_config.model = self.config.hedge_model
+        return hedge_config
+    
+    def _create_fast_config(self) -> SubtitleTranslationConfig:
+        """쉬운 자막에 사용할 빠른 모델 등급의 설정 복사본 생성"""
+        fast_config = copy.copy(self.config)
+        if self.config.fast_provider and self.config.fast_provider != self.config.provider:
+            fast_config.provider = self.config.fast_provider
+            fast_config._update_model_defaults()
+            
+        default_model, input_cost, output_cost = fast_config.DEFAULT_FAST_MODELS[fast_config.provider]
+        fast_config.model = self.config.fast_model or default_model
+        fast_config.input_token_cost = (self.config.fast_input_token_cost
+                                        if self.config.fast_input_token_cost is not None else input_cost / 1_000_000)
+        fast_config.output_token_cost = (self.config.fast_output_token_cost
+                                         if self.config.fast_output_token_cost is not None else output_cost / 1_000_000)
+        return fast_config
+    
+    def _route(self, subtitles: Iterable[SubtitleCue], route: bool = True) -> Iterator[Tuple[SubtitleCue, str]]:
+        """자막마다 번역할 모델 등급 이름을 붙여 반환 (문장/장면 묶음 단위로 판단)"""
+        if not (self.router and route):
+            return ((subtitle, "main") for subtitle in subtitles)
+        return ((subtitle, "fast" if easy else "main") for subtitle, easy in self.router.route_groups(subtitles))
+    
+    def create_batches(self, subtitles: Iterable[SubtitleCue]) -> Iterator[List[SubtitleCue]]:
+        """
+        설정된 방식(토큰 예산 또는 고정 개수)에 따라 자막 배치 생성
+        
+        Args:
+            subtitles: 자막 목록 또는 생성기
+            
+        Returns:
+            배치 생성기
+        """
+        return self._new_batcher().batches(subtitles)
+    
+    def _new_batcher(self) -> CueBatcher:
+        """설정된 방식(토큰 예산 또는 고정 개수)으로 배치를 채우는 빈 배처 생성"""
+        if self.config.batching_mode == "count":
+            return CueBatcher(max_cues=self.config.batch_size)
+            
+        input_budget, output_budget = self.config.get_batch_token_budget()
+        return CueBatcher(self.token_estimator, input_budget, output_budget, self.config.max_batch_cues)
+    
+    @staticmethod
+    def _is_overload_error(error: Exception) -> bool:
+        """
+        요청 한도 초과/서버 과부하 오류인지 확인
+        
+        Args:
+            error: API 호출 중 발생한 예외
+            
+        Returns:
+            429, 529 또는 overloaded 오류이면 True
+        """
+        status_code = getattr(error, 'status_code', None)
+        if status_code in (429, 529):
+            return True
+        return "overloaded" in str(error).lower()
+    
+    @classmethod
+    def _classify_error(cls, error: Exception) -> str:
+        """
+        재시도 횟수를 따로 관리할 오류 종류 판별
+        
+        Args:
+            error: API 호출 중 발생한 예외
+            
+        Returns:
+            "rate_limit", "server", "timeout", "parse", "size", "client", "other" 중 하나
+            ("client"는 재시도하지 않음)
+        """
+        if isinstance(error, MalformedResponseError):
+            return "parse"
+        if isinstance(error, (asyncio.TimeoutError, anthropic.APIConnectionError, openai.APIConnectionError)):
+            return "timeout"
+        status_code = getattr(error, 'status_code', None)
+        if status_code == 429:
+            return "rate_limit"
+        if status_code == 413 or (status_code == 400 and
+                                  any(hint in str(error).lower() for hint in cls._SIZE_ERROR_HINTS)):
+            return "size"
+        if status_code in cls.CLIENT_ERROR_STATUSES:
+            return "client"
+        if (status_code and status_code >= 500) or "overloaded" in str(error).lower():
+            return "server"
+        return "other"
+    
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """
+        오류 응답의 retry-after(-ms) 헤더에서 서버가 요청한 대기 시간 추출
+        
+        Args:
+            error: API 호출 중 발생한 예외
+            
+        Returns:
+            대기 시간(초) (헤더가 없으면 None)
+        """
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+        if not headers:
+            return None
+            
+        try:
+            if headers.get('retry-after-ms'):
+                return float(headers['retry-after-ms']) / 1000
+            value = headers.get('retry-after')
+            if not value:
+                return None
+            if value.strip().replace('.', '', 1).isdigit():
+                return float(value)
+            # HTTP 날짜 형식
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    
+    def _make_subtitle_callback(self, start_number: int) -> Optional[Callable[[str], None]]:
+        """배치 시작 번호를 붙여 subtitle_callback에 전달하는 콜백 생성"""
+        if not self.subtitle_callback:
+            return None
+        return lambda subtitle: self.subtitle_callback(start_number, subtitle)
+    
+    async def _translate_batch_with_retry(self, batch: List[SubtitleCue], start_number: int,
+                                          tier: Optional[ModelTier] = None) -> Tuple[str, int, int]:
+        """
+        재시도 로직을 포함한 배치 번역
+        
+        요청마다 동시 요청 슬롯을 잡고, 실패하면 슬롯을 반납한 채로 대기하므로
+        그동안 다른 배치가 요청을 보냅니다. 대기 시간은 decorrelated jitter 방식으로
+        정하되 서버가 retry-after 헤더를 보냈으면 그보다 짧게 기다리지 않으며,
+        재시도 횟수는 오류 종류별로 retry_budgets만큼 허용합니다. 인증 오류나 잘못된
+        요청(400/401/403/404/422)은 재시도하지 않고 원래 예외를 그대로 발생시킵니다.
+        
+        Args:
+            batch: 번역할 자막 배치
+            start_number: 시작 자막 번호
+            tier: 요청을 보낼 모델 등급 (None이면 기본 모델)
+            
+        Returns:
+            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
+            
+        Raises:
+            BatchTranslationError: 응답이 잘렸거나 재시도 횟수를 모두 쓴 경우
+            Exception: 재시도하지 않는 요청 오류 (API가 발생시킨 예외 그대로)
+        """
+        tier = tier or self.tiers["main"]
+        failures: Dict[str, int] = {}
+        backoff = self.config.retry_base_delay
+        
+        # 요청 한도 차감용 추정 토큰 수
+        estimated_input, estimated_output = self._estimate_request_tokens(batch, tier)
+        
+        while True:
+            await tier.concurrency.acquire()
+            try:
+                await tier.rate_limiter.acquire(estimated_input, estimated_output)
+                request_started = time.monotonic()
+                if self.hedge_policy and tier.name == "main":
+                    result = await self._send_hedged_request(batch, start_number, estimated_input, estimated_output)
+                else:
+                    result = await self._send_request(tier.translator, batch, start_number)
+                job = _current_job.get()
+                if job is not None:
+                    job.latencies.setdefault(tier.name, []).append(time.monotonic() - request_started)
+                await tier.concurrency.record_success(time.monotonic() - request_started)
+                tier.rate_limiter.reconcile(estimated_input, estimated_output, result[1], result[2])
+                return result
+            except TruncatedResponseError as e:
+                # 같은 배치는 다시 보내도 잘리므로 재시도하지 않고 호출한 쪽에서 배치를 나눔
+                await tier.concurrency.record_success(time.monotonic() - request_started)
+                tier.rate_limiter.reconcile(estimated_input, estimated_output, e.input_tokens, e.output_tokens)
+                self.logger.warning(f"배치 번역 실패: {e}")
+                raise BatchTranslationError(str(e), "truncated", e.input_tokens, e.output_tokens) from e
+            except Exception as e:
+                # 실패한 요청은 출력 토큰을 쓰지 않았으므로 출력 추정치만 돌려받음
+                tier.rate_limiter.reconcile(estimated_input, estimated_output, estimated_input, 0)
+                if self._is_overload_error(e):
+                    await tier.concurrency.record_overload()
+                    
+                error_class = self._classify_error(e)
+                if error_class == "client":
+                    # 인증 오류, 잘못된 요청 등은 다시 보내거나 배치를 나눠도 실패하므로 작업을 바로 중단
+                    self.logger.error(f"요청이 거부되어 번역을 중단합니다 (HTTP {e.status_code}). "
+                                      f"API 키, 모델 이름, 요청 설정을 확인하세요: {e}")
+                    raise
+                failures[error_class] = failures.get(error_class, 0) + 1
+                budget = self.config.retry_budgets.get(error_class, 0)
+                self.logger.warning(f"배치 번역 시도 실패 ({error_class} {failures[error_class]}/{budget + 1}): {e}")
+                
+                if failures[error_class] > budget:
+                    self.logger.error(f"{error_class} 오류 재시도 횟수를 초과했습니다.")
+                    raise BatchTranslationError(str(e), error_class) from e
+                    
+                # decorrelated jitter (요청들이 같은 시점에 몰려 재시도하지 않도록 분산)
+                backoff = min(self.config.retry_max_delay,
+                              random.uniform(self.config.retry_base_delay, backoff * 3))
+                retry_after = self._retry_after(e)
+                wait_time = max(backoff, retry_after) if retry_after is not None else backoff
+                job = _current_job.get()
+                if job is not None:
+                    job.retry_counts[error_class] = job.retry_counts.get(error_class, 0) + 1
+            finally:
+                await tier.concurrency.release()
+            
+            # 슬롯을 반납한 상태로 대기하므로 그동안 다른 배치가 요청을 보냄
+            self.logger.info(f"{wait_time:.1f}초 후 재시도합니다...")
+            await asyncio.sleep(wait_time)
+    
+    def _estimate_request_tokens(self, batch: List[SubtitleCue], tier: Optional[ModelTier] = None) -> Tuple[int, int]:
+        """배치 요청 하나의 (추정 입력 토큰 수, 추정 출력 토큰 수) (tier가 None이면 기본 모델)"""
+        tier = tier or self.tiers["main"]
+        estimated_input = tier.system_prompt_tokens + self.token_estimator.count(tier.translator.encode_batch(batch))
+        estimated_output = (self.token_estimator.RESPONSE_OVERHEAD_TOKENS +
+                            sum(self.token_estimator.estimate_subtitle_output(subtitle) for subtitle in batch))
+        return estimated_input, estimated_output
+    
+    async def _send_request(self, translator: BaseTranslator, batch: List[SubtitleCue], start_number: int,
+                            preview: bool = True) -> Tuple[str, int, int]:
+        """
+        설정에 따라 스트리밍 또는 일반 요청으로 배치 번역
+        
+        Args:
+            translator: 요청을 보낼 번역기
+            batch: 번역할 자막 배치
+            start_number: 시작 자막 번호
+            preview: 스트리밍 모드에서 완성된 자막을 subtitle_callback에 전달할지 여부
+            
+        Returns:
+            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
+        """
+        started = time.monotonic()
+        if self.config.streaming:
+            on_subtitle = self._make_subtitle_callback(start_number) if preview else None
+            result = await translator.translate_batch_stream_async(batch, start_number, on_subtitle=on_subtitle)
+        else:
+            result = await translator.translate_batch_async(batch, start_number)
+        self.throughput.record(translator.config.model, result[2], time.monotonic() - started)
+        return result
+    
+    async def _send_hedged_request(self, batch: List[SubtitleCue], start_number: int,
+                                   estimated_input: int, estimated_output: int) -> Tuple[str, int, int]:
+        """
+        응답이 늦으면 중복 요청을 보내고 먼저 도착한 정상 응답을 사용
+        
+        원래 요청이 최근 지연 시간의 백분위수를 넘기면 같은(또는 지정된 보조) 모델로
+        헤지 요청을 보냅니다. 헤지 요청도 동시 요청 슬롯과 요청 한도를 차지하므로,
+        슬롯을 기다리는 동안 원래 요청이 끝나면 헤지 요청은 보내지 않습니다. 응답은
+        원본 배치와 대조해 누락된 자막이 없을 때만 바로 채택하고, 둘 다 누락이 있으면
+        누락이 적은 쪽을 반환하며 나머지 요청은 취소합니다. 두 요청이 모두 실패하면
+        원래 요청의 예외를 다시 발생시킵니다.
+        
+        Args:
+            batch: 번역할 자막 배치
+            start_number: 시작 자막 번호
+            estimated_input: 추정 입력 토큰 수
+            estimated_output: 추정 출력 토큰 수
+            
+        Returns:
+            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
+        """
+        policy = self.hedge_policy
+        self._count("hedge_eligible_requests")
+        started = time.monotonic()
+        primary = asyncio.create_task(self._send_request(self.translator, batch, start_number))
+        
+        delay = policy.delay(estimated_output)
+        capacity = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if primary not in done:
+                # 헤지 요청용 슬롯과 요청 한도를 원래 요청의 응답과 경쟁해서 기다림
+                capacity = asyncio.create_task(self._acquire_hedge_capacity(estimated_input, estimated_output))
+                await asyncio.wait({primary, capacity}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            primary.cancel()
+            if capacity:
+                capacity.cancel()
+            raise
+        if primary.done():
+            if capacity:
+                await self._cancel_hedge_capacity(capacity, estimated_input, estimated_output)
+            result = primary.result()
+            policy.record(time.monotonic() - started, estimated_output)
+            return result
+        
+        # 원래 요청이 늦어지면 중복 요청을 보내고 먼저 도착한 정상 응답을 사용
+        self._count("hedged_requests")
+        self.logger.info(f"배치(자막 {start_number}번부터) 응답이 {delay:.1f}초를 넘어 헤지 요청을 보냅니다.")
+        hedge = asyncio.create_task(self._send_hedge_request(batch, start_number))
+        pending = {primary, hedge}
+        winner = None
+        fallback = None
+        
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+                    missing = self._count_missing(batch, task.result()[0])
+                    if missing == 0:
+                        winner = task
+                        break
+                    if fallback is None or missing < fallback[1]:
+                        fallback = (task, missing)
+            if winner is None:
+                if fallback is None:
+                    # 둘 다 실패하면 헤지 요청분 차감을 돌려주고 원래 요청의 오류로 재시도
+                    self.rate_limiter.reconcile(estimated_input, estimated_output, estimated_input, 0)
+                    raise primary.exception()
+                # 둘 다 누락이 있으면 누락이 적은 쪽을 쓰고 나머지는 응답 검증 후 다시 요청
+                winner = fallback[0]
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        result = winner.result()
+        policy.record(time.monotonic() - started, estimated_output)
+        
+        # 진 요청의 비용 (취소된 요청은 이미 생성한 토큰만큼 청구되므로 추정치 상한으로 계산)
+        loser = hedge if winner is primary else primary
+        loser_config = self.hedge_config if loser is hedge else self.config
+        if loser.done() and not loser.cancelled() and loser.exception() is None:
+            loser_input, loser_output = loser.result()[1], loser.result()[2]
+        else:
+            loser_input, loser_output = estimated_input, estimated_output
+        self._count("hedge_extra_cost", loser_input * loser_config.input_token_cost +
+                    loser_output * loser_config.output_token_cost)
+        self.rate_limiter.reconcile(estimated_input, estimated_output, loser_input, loser_output)
+        
+        if winner is hedge:
+            self._count("hedge_wins")
+            # 토큰 비용은 주 모델 단가로 합산되므로 보조 모델과의 단가 차이를 추가 비용에 반영
+            self._count("hedge_extra_cost",
+                        result[1] * (self.hedge_config.input_token_cost - self.config.input_token_cost) +
+                        result[2] * (self.hedge_config.output_token_cost - self.config.output_token_cost))
+            self._record_hedge_answers(batch, result[0])
+        return result
+    
+    async def _acquire_hedge_capacity(self, estimated_input: int, estimated_output: int) -> None:
+        """헤지 요청용 동시 요청 슬롯과 요청 한도를 확보 (한도를 기다리다 취소되면 잡은 슬롯을 돌려줌)"""
+        await self.concurrency.acquire()
+        try:
+            await self.rate_limiter.acquire(estimated_input, estimated_output)
+        except BaseException:
+            await self.concurrency.release()
+            raise
+    
+    async def _cancel_hedge_capacity(self, capacity: asyncio.Task, estimated_input: int, estimated_output: int) -> None:
+        """보내지 않은 헤지 요청의 슬롯 확보를 취소하고, 이미 확보했으면 슬롯과 요청 한도 차감을 돌려줌"""
+        capacity.cancel()
+        try:
+            await capacity
+        except asyncio.CancelledError:
+            return
+        await self.concurrency.release()
+        self.rate_limiter.reconcile(estimated_input, estimated_output, 0, 0)
+    
+    async def _send_hedge_request(self, batch: List[SubtitleCue], start_number: int) -> Tuple[str, int, int]:
+        """슬롯을 확보한 헤지 요청을 보내고 끝나거나 취소되면 슬롯을 반납"""
+        try:
+            return await self._send_request(self.hedge_translator, batch, start_number, preview=False)
+        except Exception as e:
+            if self._is_overload_error(e):
+                await self.concurrency.record_overload()
+            raise
+        finally:
+            await self.concurrency.release()
+    
+    def _count_missing(self, batch: List[SubtitleCue], translated: str) -> int:
+        """응답을 원본 배치와 대조했을 때 누락/손상된 자막 수"""
+        cues, _ = self.processor.match_translated_blocks(batch, translated)
+        return sum(1 for cue in cues if cue is None)
+    
+    def _record_hedge_answers(self, batch: List[SubtitleCue], translated: str) -> None:
+        """보조 헤지 모델이 번역한 자막을 기록해 캐시에 그 모델의 키로 저장되게 함"""
+        answers = _hedge_answers.get()
+        if answers is None or self.hedge_translator is self.translator:
+            return
+        answered_by = (self.hedge_config.provider, self.hedge_config.model, self.hedge_prompt_hash)
+        cues, _ = self.processor.match_translated_blocks(batch, translated)
+        for subtitle, cue in zip(batch, cues):
+            if cue is not None:
+                answers[id(subtitle)] = answered_by
+    
+    async def _translate_batch_task(self, args: Tuple[List[SubtitleCue], int, int],
+                                    tier: Optional[ModelTier] = None
+                                    ) -> Tuple[int, List[Optional[SubtitleCue]], int, int]:
+        """
+        동시 실행을 위한 번역 작업 함수
+        
+        Args:
+            args: (배치, 시작 번호, 배치 인덱스)
+            tier: 요청을 보낼 모델 등급 (None이면 기본 모델)
+            
+        Returns:
+            (배치 인덱스, 원본 순서에 맞춘 번역된 자막 목록 (누락은 None), 입력 토큰 수, 출력 토큰 수)
+        """
+        batch, start_number, batch_index = args
+        translated, input_tokens, output_tokens = await self._translate_with_bisection(batch, start_number, tier)
+        translated, repair_input, repair_output = await self._repair_translation(batch, start_number, translated, tier)
+        return batch_index, translated, input_tokens + repair_input, output_tokens + repair_output
+    
+    async def _translate_with_bisection(self, batch: List[SubtitleCue], start_number: int,
+                                        tier: Optional[ModelTier] = None
+                                        ) -> Tuple[List[Optional[SubtitleCue]], int, int]:
+        """
+        배치를 번역하고, 응답이 잘리거나 형식 오류/요청 크기 초과로 실패하면 절반씩 나눠 다시 번역
+        
+        자막 하나까지 재귀적으로 나누므로 문제가 되는 자막 하나 때문에 배치 전체가
+        실패하지 않습니다. 나눈 배치는 각자 동시 요청 슬롯을 받아 따로 재시도하며,
+        자막 하나로도 실패하면 그 자막만 원문과 실패 표시로 채웁니다. 서버 오류, 요청
+        한도 초과 등 배치 크기와 관계없는 실패는 나누지 않고 배치 전체를 실패로 채웁니다.
+        
+        Args:
+            batch: 번역할 자막 배치
+            start_number: 시작 자막 번호
+            tier: 요청을 보낼 모델 등급 (None이면 기본 모델)
+            
+        Returns:
+            (원본 순서에 맞춘 번역된 자막 목록 (누락은 None), 입력 토큰 수, 출력 토큰 수)
+        """
+        try:
+            translated, input_tokens, output_tokens = await self._translate_batch_with_retry(batch, start_number, tier)
+        except BatchTranslationError as e:
+            if len(batch) <= 1 or e.error_class not in self.BISECT_ERROR_CLASSES:
+                reason = f"{self.FAILURE_MARKER}: {e}]"
+                return [self._fallback_subtitle(subtitle, reason) for subtitle in batch], e.input_tokens, e.output_tokens
+            input_tokens, output_tokens = e.input_tokens, e.output_tokens
+        else:
+            cues, restored = self.processor.match_translated_blocks(batch, translated)
+            self._count("restored_timestamps", restored)
+            return cues, input_tokens, output_tokens
+        
+        self._count("bisected_batches")
+        middle = len(batch) // 2
+        self.logger.info(f"자막 {len(batch)}개 배치를 {middle}개와 {len(batch) - middle}개로 나눠 다시 번역합니다.")
+        
+        parts = await asyncio.gather(
+            self._translate_with_bisection(batch[:middle], start_number, tier),
+            self._translate_with_bisection(batch[middle:], start_number + middle, tier)
+        )
+        cues = []
+        for part_cues, part_input, part_output in parts:
+            cues.extend(part_cues)
+            input_tokens += part_input
+            output_tokens += part_output
+            
+        return cues, input_tokens, output_tokens
+    
+    async def _repair_translation(self, batch: List[SubtitleCue], start_number: int,
+                                  translated: List[Optional[SubtitleCue]], tier: Optional[ModelTier] = None
+                                  ) -> Tuple[List[Optional[SubtitleCue]], int, int]:
+        """
+        번역 결과에서 누락/손상된 자막만 작은 배치로 다시 요청
+        
+        Args:
+            batch: 원본 자막 배치
+            start_number: 시작 자막 번호
+            translated: 원본 순서에 맞춘 번역된 자막 목록 (누락은 None)
+            tier: 요청을 보낼 모델 등급 (None이면 기본 모델)
+            
+        Returns:
+            (복구한 자막을 채운 번역된 자막 목록, 추가 입력 토큰 수, 추가 출력 토큰 수)
+        """
+        cues = list(translated)
+        input_tokens = output_tokens = 0
+        
+        for attempt in range(self.config.repair_attempts):
+            missing = [i for i, cue in enumerate(cues) if cue is None]
+            if not missing:
+                break
+                
+            self.logger.warning(f"응답에서 {len(batch)}개 중 {len(missing)}개의 자막이 누락/손상되어 해당 자막만 다시 요청합니다 "
+                                f"({attempt + 1}/{self.config.repair_attempts}).")
+            retry_batch = [batch[i] for i in missing]
+            try:
+                retry_translated, retry_input, retry_output = await self._translate_batch_with_retry(
+                    retry_batch, start_number, tier)
+            except BatchTranslationError as e:
+                input_tokens += e.input_tokens
+                output_tokens += e.output_tokens
+                break
+            input_tokens += retry_input
+            output_tokens += retry_output
+                
+            retry_cues, restored = self.processor.match_translated_blocks(retry_batch, retry_translated)
+            self._count("restored_timestamps", restored)
+            for i, cue in zip(missing, retry_cues):
+                if cue is not None:
+                    cues[i] = cue
+                    self._count("repaired_subtitles")
+        
+        # 복구되지 않은 자막은 _split_translated_batch에서 실패 자막으로 채움
+        return cues, input_tokens, output_tokens
+    
+    def _lookup_cache(self, job: "TranslationJob", subtitle: SubtitleCue,
+                      tier: Optional[ModelTier] = None) -> Optional[SubtitleCue]:
+        """
+        캐시에서 자막 번역을 찾아 원본 번호와 시간 정보를 붙여 반환 (적중/미적중은 작업 통계에 기록)
+        
+        Args:
+            job: 자막이 속한 번역 작업
+            subtitle: 원본 자막
+            tier: 자막을 번역할 모델 등급 (None이면 기본 모델)
+            
+        Returns:
+            번역된 자막 (캐시에 없으면 None)
+        """
+        if not self.cache or not subtitle.text.strip():
+            return None
+            
+        cached = self.cache.get(self._cache_key(subtitle.text, tier))
+        if cached is None:
+            job.counters["cache_misses"] += 1
+            return None
+        job.counters["cache_hits"] += 1
+        return subtitle.with_text(cached)
+    
+    @staticmethod
+    def _count(name: str, amount: float = 1) -> None:
+        """현재 배치 작업이 속한 번역 작업의 통계 항목에 더함 (배치 작업 밖에서는 무시)"""
+        job = _current_job.get()
+        if job is not None:
+            job.counters[name] += amount
+    
+    def _cache_key(self, text: str, tier: Optional[ModelTier] = None) -> str:
+        """모델 등급(None이면 기본 모델)의 제공업체/모델/프롬프트 기준 캐시 키"""
+        tier = tier or self.tiers["main"]
+        return TranslationCache.make_key(tier.config.provider, tier.config.model, tier.prompt_hash, text)
+    
+    def _split_translated_batch(self, batch_subtitles: List[SubtitleCue], translated: List[Optional[SubtitleCue]],
+                                tier: Optional[ModelTier] = None,
+                                answered_by: Optional[Dict[int, Tuple[str, str, str]]] = None) -> List[SubtitleCue]:
+        """
+        번역된 자막을 자막별로 캐시에 저장하고 누락된 자막을 실패 자막으로 채움
+        
+        응답에 없거나 손상된 자막은 원본 번호와 시간 정보에 실패 표시와 원문으로 채웁니다.
+        
+        Args:
+            batch_subtitles: 배치에 담긴 원본 자막 목록
+            translated: 원본 순서에 맞춘 번역된 자막 목록 (누락은 None)
+            tier: 배치를 번역한 모델 등급 (캐시 키에 사용, None이면 기본 모델)
+            answered_by: 보조 헤지 모델이 번역한 자막 (id(원본 자막) -> (제공업체, 모델, 프롬프트 해시)),
+                         이 자막은 번역한 모델의 키로 캐시에 저장
+            
+        Returns:
+            원본 자막 순서에 맞춘 번역 결과 목록
+        """
+        missing = sum(1 for cue in translated if cue is None)
+        if missing:
+            self.logger.warning(f"번역된 자막 {len(batch_subtitles)}개 중 {missing}개가 누락/손상되어 원문을 유지합니다.")
+            
+        results = []
+        for subtitle, cue in zip(batch_subtitles, translated):
+            if cue is None:
+                results.append(self._fallback_subtitle(subtitle, f"{self.FAILURE_MARKER}: 응답에 없는 자막]"))
+                continue
+            if self.cache and self.FAILURE_MARKER not in cue.text and subtitle.text.strip():
+                answered = answered_by.get(id(subtitle)) if answered_by else None
+                key = (TranslationCache.make_key(*answered, subtitle.text) if answered
+                       else self._cache_key(subtitle.text, tier))
+                self.cache.put(key, cue.text)
+            results.append(cue)
+                    
+        return results
+    
+    def _fallback_subtitle(self, subtitle: SubtitleCue, reason: str) -> SubtitleCue:
+        """
+        번역하지 못한 자막을 원본 번호와 시간 정보에 실패 표시와 원문을 붙여 반환
+        
+        Args:
+            subtitle: 원본 자막
+            reason: 실패 표시 (FAILURE_MARKER로 시작)
+            
+        Returns:
+            실패 표시가 붙은 자막
+        """
+        return subtitle.with_text(f"{reason}\n{subtitle.text}" if subtitle.text.strip() else reason)
+    
+    def _copy_translation(self, subtitle: SubtitleCue, translated_subtitle: SubtitleCue) -> SubtitleCue:
+        """
+        대표 자막의 번역을 원본 자막의 번호와 시간 정보에 붙임
+        
+        Args:
+            subtitle: 중복 자막의 원본
+            translated_subtitle: 대표 자막의 번역
+            
+        Returns:
+            번역된 자막 (대표 번역이 비어 있으면 원본 그대로)
+        """
+        if not translated_subtitle.text.strip():
+            return subtitle
+        return subtitle.with_text(translated_subtitle.text)
+    
+    def _retime_subtitles(self, job: "TranslationJob") -> None:
+        """
+        설정된 시간 일괄 조정과 시간 중복 조정을 원본 자막 전체에 한 번에 적용
+        
+        번역된 자막은 원본 자막의 시간 정보를 그대로 쓰므로 번역 전에 조정해 두면
+        writer에서는 더 조정할 자막이 없습니다. 일괄 조정 결과는 한 줄로 보고합니다.
+        
+        Args:
+            job: 원본 자막의 시간 정보를 읽어 둔 번역 작업
+        """
+        config = self.config
+        timing = job.timing
+        changes = []
+        if config.timing_offset_ms:
+            changes.append(f"{config.timing_offset_ms:+d}ms 이동 {timing.offset(config.timing_offset_ms)}개")
+        if config.source_fps and config.target_fps:
+            scaled = timing.scale(config.source_fps / config.target_fps)
+            changes.append(f"{config.source_fps}fps -> {config.target_fps}fps 변환 {scaled}개")
+            
+        job.adjusted_timestamps = timing.repair_overlaps(self.processor.OVERLAP_GAP_MS, self.processor.MIN_DURATION_MS)
+        
+        if config.min_duration_ms:
+            extended = timing.enforce_min_duration(config.min_duration_ms, self.processor.OVERLAP_GAP_MS)
+            changes.append(f"{config.min_duration_ms}ms 미만 자막 {extended}개 연장")
+        if config.close_gap_ms:
+            changes.append(f"{config.close_gap_ms}ms 이하 간격 {timing.close_gaps(config.close_gap_ms)}개 메움")
+            
+        if changes:
+            self.logger.info("자막 시간 조정: " + ", ".join(changes))
+    
+    def _prepare_job(self, job: "TranslationJob", dry_run: bool = False, route: bool = True,
+                     throttle: bool = True) -> None:
+        """
+        입력 파일을 검증하고 번역할 배치를 만들 준비
+        
+        입력 파일은 메모리 매핑으로 조각씩 읽습니다. 여기서는 자막 시간 정보만 모아
+        파일 전체의 시간을 조정하고, 자막 본문은 배치를 만들 때 파일을 다시 읽어
+        하나씩 가져오므로(_plan_batches) 파일 크기와 관계없이 메모리 사용량이 일정합니다.
+        작업 식별 키도 시간 정보를 모으는 같은 읽기에서 계산하므로, 준비 단계에서는 형식
+        검증용 앞부분을 빼면 파일을 한 번만 읽습니다.
+        
+        Args:
+            job: 준비할 번역 작업
+            dry_run: True이면 출력 파일과 작업 기록을 건드리지 않고 배치만 구성 (--estimate)
+            route: False이면 난이도 라우팅 없이 모두 기본 모델로 번역
+            throttle: False이면 기록을 기다리는 자막 수와 관계없이 배치를 만듦 (배치를 한 번에 모두 만드는 Batch API)
+        """
+        # 입력 파일 앞부분만 읽어 형식 검증
+        if not self.file_handler.validate_srt_stream(self.file_handler.iter_srt_chunks(job.input_file)):
+            self.logger.error("유효하지 않은 SRT 파일 형식입니다.")
+            raise ValueError("유효하지 않은 SRT 파일 형식입니다.")
+        
+        # 같은 입력과 설정으로 중단된 작업을 찾을 키는 시간 정보를 모으며 같은 조각으로 계산
+        model = self.config.model
+        if self.router and route:
+            model += f"+{self.tiers['fast'].config.model}@{self.config.routing_threshold}"
+        job_key = JobKeyHasher(self.config.provider, model, self.prompt_hash)
+        
+        # 자막 시간 정보만 모음 (시간 정보가 있는 자막이 하나도 없으면 SRT 파일이 아님)
+        starts, ends = array('q'), array('q')
+        for subtitle in self.processor.iter_cues(job_key.wrap(self.file_handler.iter_srt_chunks(job.input_file))):
+            starts.append(subtitle.start_ms)
+            ends.append(subtitle.end_ms)
+        if not starts:
+            self.logger.error("유효하지 않은 SRT 파일 형식입니다.")
+            raise ValueError("유효하지 않은 SRT 파일 형식입니다.")
+        
+        job.subtitle_count = len(starts)
+        job.timing = TimingEngine(np.frombuffer(starts, dtype=np.int64), np.frombuffer(ends, dtype=np.int64))
+        self.logger.info(f"총 {job.subtitle_count}개의 자막을 찾았습니다.")
+        self._retime_subtitles(job)
+        
+        # 같은 입력과 설정으로 중단된 작업이 있으면 이어서 진행
+        job.journal = TranslationJournal(self.config.journal_dir, job_key.hexdigest())
+        if self.config.resume:
+            job.resumed = job.journal.load()
+            if job.resumed:
+                self.logger.info(f"이전 작업 기록에서 {len(job.resumed)}개의 자막을 복구하여 이어서 번역합니다.")
+        elif not dry_run:
+            job.journal.remove()
+        
+        if not dry_run:
+            job.writer = IncrementalSrtWriter(job.output_file, self.processor)
+        job.plan = self._plan_batches(job, route, throttle)
+    
+    def _iter_job_subtitles(self, job: "TranslationJob") -> Iterator[SubtitleCue]:
+        """
+        입력 파일을 다시 읽어 번역 전에 조정한 시간 정보를 붙인 원본 자막을 하나씩 반환
+        
+        Args:
+            job: _prepare_job으로 준비한 번역 작업
+            
+        Returns:
+            원본 자막 생성기
+            
+        Raises:
+            ValueError: 시간 정보를 읽은 뒤 입력 파일의 자막 수가 바뀐 경우
+        """
+        cues = self.processor.iter_cues(self.file_handler.iter_srt_chunks(job.input_file), warn=False)
+        count = 0
+        for count, subtitle in enumerate(job.timing.apply(cues), 1):
+            yield subtitle
+        if count != job.subtitle_count:
+            raise ValueError(f"번역 중에 입력 파일 '{job.input_file}'이(가) 바뀌었습니다.")
+    
+    def _plan_batches(self, job: "TranslationJob", route: bool = True, throttle: bool = True
+                      ) -> Iterator[Optional[Tuple[List[int], List[SubtitleCue], str]]]:
+        """
+        원본 자막을 차례로 읽으며 번역할 배치를 하나씩 생성
+        
+        중단된 작업 기록과 캐시에서 찾은 자막은 바로 writer에 기록하고, 나머지는 모델
+        등급별로 배치에 담아 가득 찬 배치부터 내보냅니다. 같은 본문의 자막은 대표 자막이
+        아직 번역 중일 때만 묶어 대표의 번역을 복사합니다(이미 끝난 대표의 번역은 캐시에서
+        찾음). 한 등급의 배치가 PLAN_FLUSH_DISTANCE개 자막이 지나도록 차지 않으면 그대로
+        내보내고, 읽는 위치가 아직 기록하지 못한 가장 앞 자막보다 PLAN_FLUSH_DISTANCE개
+        이상 앞서면 None을 내보내 번역 중인 앞쪽 배치가 끝날 때까지 기다립니다. 그래서
+        작업 기록과 캐시로 채운 자막도 writer에 쌓이는 수가 일정하게 제한됩니다.
+        
+        Args:
+            job: _prepare_job으로 준비한 번역 작업
+            route: False이면 난이도 라우팅 없이 모두 기본 모델로 번역
+            throttle: False이면 기록을 기다리는 자막 수를 제한하지 않음
+            
+        Returns:
+            (자막 위치 목록, 배치, 모델 등급 이름) 생성기 (앞쪽 배치를 기다려야 하면 None)
+        """
+        batchers = {name: self._new_batcher() for name in self.tiers}
+        batch_positions: Dict[str, List[int]] = {name: [] for name in self.tiers}
+        batch_counts = dict.fromkeys(self.tiers, 0)
+        # 중복 제거를 하지 않았을 때의 배치 수 (절감한 요청 수 계산용)
+        undeduplicated = {name: self._new_batcher() for name in self.tiers} if self.config.dedup else {}
+        undeduplicated_count = 0
+        cached_count = 0
+        
+        for position, (subtitle, tier_name) in enumerate(self._route(self._iter_job_subtitles(job), route)):
+            for name, positions in batch_positions.items():
+                if positions and position - positions[0] >= self.PLAN_FLUSH_DISTANCE:
+                    batch_positions[name] = []
+                    batch_counts[name] += 1
+                    if undeduplicated and undeduplicated[name].flush():
+                        undeduplicated_count += 1
+                    yield positions, batchers[name].flush(), name
+            
+            # 앞쪽 배치의 결과를 기다리는 자막이 너무 많으면 그 배치가 끝날 때까지 대기
+            while (throttle and job.writer and job.in_flight and
+                   position - job.writer.next_index >= self.PLAN_FLUSH_DISTANCE):
+                yield None
+                    
+            if position in job.resumed:
+                # 시간 조정 설정이 바뀌었을 수 있으므로 시간 정보는 이번에 조정한 원본 것을 사용
+                self._settle(job, position, subtitle.with_text(job.resumed[position].text))
+                continue
+            cached = self._lookup_cache(job, subtitle, self.tiers[tier_name])
+            if cached is not None:
+                cached_count += 1
+                self._settle(job, position, cached)
+                continue
+            
+            # 같은 본문의 자막은 대표 자막 하나만 번역하고 결과를 나머지에 복사
+            if self.config.dedup:
+                if undeduplicated[tier_name].add(subtitle):
+                    undeduplicated_count += 1
+                key = TranslationCache.normalize_text(subtitle.text)
+                if key in job.representatives:
+                    job.duplicates.setdefault(job.representatives[key], []).append((position, subtitle))
+                    job.dedup_stats["dedup_saved_subtitles"] += 1
+                    job.dedup_stats["dedup_saved_tokens"] += (self.token_estimator.estimate_subtitle_input(subtitle) +
+                                                              self.token_estimator.estimate_subtitle_output(subtitle))
+                    continue
+                if key:
+                    job.representatives[key] = position
+            
+            finished = batchers[tier_name].add(subtitle)
+            if finished:
+                positions = batch_positions[tier_name]
+                batch_positions[tier_name] = []
+                batch_counts[tier_name] += 1
+                yield positions, finished, tier_name
+            batch_positions[tier_name].append(position)
+            
+        # 남은 배치는 파일 앞쪽 자막이 담긴 것부터 보냄
+        for name in sorted((name for name in self.tiers if batch_positions[name]),
+                           key=lambda name: batch_positions[name][0]):
+            batch_counts[name] += 1
+            yield batch_positions[name], batchers[name].flush(), name
+        undeduplicated_count += sum(1 for batcher in undeduplicated.values() if batcher.flush())
+        
+        batches_count = sum(batch_counts.values())
+        if self.cache:
+            self.logger.info(f"번역 캐시에서 {cached_count}개의 자막을 찾았습니다.")
+        if job.dedup_stats["dedup_saved_subtitles"]:
+            job.dedup_stats["dedup_saved_requests"] = undeduplicated_count - batches_count
+            self.logger.info(f"중복 자막 {job.dedup_stats['dedup_saved_subtitles']}개를 제외했습니다 "
+                             f"(절감: 요청 {job.dedup_stats['dedup_saved_requests']}개, "
+                             f"토큰 약 {job.dedup_stats['dedup_saved_tokens']}개).")
+        if self.router and route:
+            self.logger.info(f"자막을 {batches_count}개의 배치로 나누었습니다 "
+                             f"(빠른 모델 {batch_counts['fast']}개, 기본 모델 {batch_counts['main']}개).")
+        else:
+            self.logger.info(f"자막을 {batches_count}개의 배치로 나누었습니다.")
+    
+    def _next_batch(self, job: "TranslationJob") -> Optional[Tuple[List[SubtitleCue], int, int]]:
+        """
+        작업의 다음 배치를 만들어 번역 중인 배치로 등록
+        
+        Args:
+            job: 번역 작업
+            
+        Returns:
+            (배치, 시작 번호, 배치 인덱스) (더 만들 배치가 없거나 앞쪽 배치를 기다려야 하면 None,
+            더 만들 배치가 없으면 job.planned가 True)
+        """
+        try:
+            planned = next(job.plan)
+        except StopIteration:
+            job.planned = True
+            return None
+        if planned is None:
+            return None
+        batch_index = job.batches_count
+        job.batches_count += 1
+        job.in_flight[batch_index] = planned
+        return planned[1], planned[0][0] + 1, batch_index
+    
+    @staticmethod
+    def _settle(job: "TranslationJob", position: int, subtitle: SubtitleCue) -> None:
+        """결과가 정해진 자막을 writer에 기록 (--estimate에서는 writer 없이 수만 셈)"""
+        if job.writer:
+            job.writer.add(position, subtitle)
+        job.settled += 1
+    
+    def _complete_batch(self, job: "TranslationJob", batch_index: int, translated: List[Optional[SubtitleCue]],
+                        input_tokens: int, output_tokens: int,
+                        answered_by: Optional[Dict[int, Tuple[str, str, str]]] = None) -> None:
+        """
+        번역이 끝난 배치를 자막 단위로 나누어 기록
+        
+        Args:
+            job: 배치가 속한 번역 작업
+            batch_index: 배치 인덱스
+            translated: 원본 순서에 맞춘 번역된 자막 목록 (누락은 None)
+            input_tokens: 입력 토큰 수
+            output_tokens: 출력 토큰 수
+            answered_by: 보조 헤지 모델이 번역한 자막 (id(원본 자막) -> (제공업체, 모델, 프롬프트 해시))
+        """
+        # 완료된 배치를 자막 단위로 나누어 기록 (앞쪽 연속 구간은 바로 파일에 씀)
+        positions, batch, tier_name = job.in_flight.pop(batch_index)
+        translated_subtitles = self._split_translated_batch(batch, translated, self.tiers[tier_name], answered_by)
+        
+        completed = {}
+        for position, subtitle, translated_subtitle in zip(positions, batch, translated_subtitles):
+            completed[position] = translated_subtitle
+            for duplicate, duplicate_subtitle in job.duplicates.pop(position, []):
+                completed[duplicate] = self._copy_translation(duplicate_subtitle, translated_subtitle)
+            # 이후에 나오는 같은 본문은 대표 대신 캐시에서 번역을 찾음
+            if job.representatives:
+                key = TranslationCache.normalize_text(subtitle.text)
+                if job.representatives.get(key) == position:
+                    del job.representatives[key]
+        for position, translated_subtitle in completed.items():
+            self._settle(job, position, translated_subtitle)
+        
+        # 실패한 자막은 다음 실행에서 다시 번역하도록 기록하지 않음
+        failed = [position for position, translated_subtitle in completed.items()
+                  if self.FAILURE_MARKER in translated_subtitle.text]
+        job.failed_positions.extend(failed)
+        succeeded = {position: translated_subtitle for position, translated_subtitle in completed.items()
+                     if position not in failed}
+        if succeeded:
+            job.journal.record(batch_index, succeeded)
+        
+        # 토큰 사용량 누적
+        usage = job.usage(tier_name)
+        usage["batches"] += 1
+        usage["subtitles"] += len(positions)
+        usage["input_tokens"] += input_tokens
+        usage["output_tokens"] += output_tokens
+        job.input_tokens += input_tokens
+        job.output_tokens += output_tokens
+        self.total_input_tokens += input_tokens
+        self.total_output_tokens += output_tokens
+    
+    def _finish_job(self, job: "TranslationJob", cost_multiplier: float = 1.0) -> Dict:
+        """
+        결과 파일을 확정하고 작업 기록을 정리한 뒤 통계를 반환
+        
+        Args:
+            job: 완료된 번역 작업
+            cost_multiplier: 요금 배율 (Batch API 할인 등)
+            
+        Returns:
+            번역 결과 통계 (토큰 수, 비용 등)
+        """
+        job.writer.commit()
+        
+        # 모든 자막이 저장되었으므로 작업 기록은 삭제
+        job.journal.remove()
+        
+        # 시간 중복 조정 결과 보고 (번역 전에 원본에서 조정한 것과 기록하며 조정한 것의 합)
+        adjusted_timestamps = job.adjusted_timestamps + job.writer.adjusted_count
+        if adjusted_timestamps:
+            self.logger.info(f"시간 중복 {adjusted_timestamps}건이 감지되어 자동으로 조정되었습니다.")
+        else:
+            self.logger.info("시간 중복이 발견되지 않았습니다.")
+            
+        self.logger.info(f"번역 완료! 결과가 {job.output_file}에 저장되었습니다.")
+        
+        # 비용 계산 (모델 등급마다 요금이 다름)
+        tier_stats = {name: self._tier_stats(name, usage, job.latencies.get(name, []), cost_multiplier)
+                      for name, usage in job.tier_usage.items()}
+        cache_read = sum(usage["cache_read_tokens"] for usage in job.tier_usage.values())
+        cache_write = sum(usage["cache_write_tokens"] for usage in job.tier_usage.values())
+        total_cost = sum(stats["total_cost"] for stats in tier_stats.values())
+        cache_hit_ratio = cache_read / job.input_tokens if job.input_tokens else 0.0
+        
+        stats = {
+            "input_tokens": job.input_tokens,
+            "output_tokens": job.output_tokens,
+            "prompt_cache_read_tokens": cache_read,
+            "prompt_cache_write_tokens": cache_write,
+            "prompt_cache_hit_ratio": cache_hit_ratio,
+            "total_cost": total_cost,
+            "tiers": tier_stats,
+            "subtitles_count": job.subtitle_count,
+            "batches_count": job.batches_count,
+            "cache_hits": job.counters["cache_hits"],
+            "cache_misses": job.counters["cache_misses"],
+            **self._hedge_stats(job.counters),
+            "resumed_subtitles": len(job.resumed),
+            "repaired_subtitles": job.counters["repaired_subtitles"],
+            "restored_timestamps": job.counters["restored_timestamps"],
+            "adjusted_timestamps": adjusted_timestamps,
+            "failed_subtitles": len(job.failed_positions),
+            "failed_subtitle_numbers": sorted(position + 1 for position in job.failed_positions),
+            "bisected_batches": job.counters["bisected_batches"],
+            "retries": {error_class: job.retry_counts.get(error_class, 0) for error_class in self.config.retry_budgets},
+            **job.dedup_stats
+        }
+        
+        if job.failed_positions:
+            numbers = stats["failed_subtitle_numbers"]
+            shown = ', '.join(str(number) for number in numbers[:20]) + (" ..." if len(numbers) > 20 else "")
+            self.logger.warning(f"번역하지 못한 자막 {len(numbers)}개(번호: {shown})는 원문과 '{self.FAILURE_MARKER}' 표시로 "
+                                f"저장되었습니다. 같은 명령으로 다시 실행하면 이 자막만 다시 번역합니다.")
+        
+        self.logger.info(f"총 사용된 입력 토큰: {job.input_tokens}")
+        self.logger.info(f"총 사용된 출력 토큰: {job.output_tokens}")
+        self.logger.info(f"프롬프트 캐시: 읽기 {cache_read}토큰, 쓰기 {cache_write}토큰 (적중률 {cache_hit_ratio:.1%})")
+        self.logger.info(f"총 요금: ${total_cost:.4f}")
+        
+        return stats
+    
+    @staticmethod
+    def _cost(config: SubtitleTranslationConfig, input_tokens: int, output_tokens: int,
+              cache_read: int, cache_write: int) -> float:
+        """토큰 사용량의 요금 (프롬프트 캐시 읽기/쓰기 토큰은 입력 토큰 요금에 배율을 적용)"""
+        input_cost = ((input_tokens - cache_read - cache_write) +
+                      cache_read * config.cache_read_cost_ratio +
+                      cache_write * config.cache_write_cost_ratio) * config.input_token_cost
+        return input_cost + output_tokens * config.output_token_cost
+    
+    def _tier_stats(self, name: str, usage: Dict[str, int], latencies: List[float],
+                    cost_multiplier: float = 1.0) -> Dict:
+        """
+        모델 등급 하나의 통계 (요금은 그 등급의 모델 요금으로 계산)
+        
+        Args:
+            name: 모델 등급 이름
+            usage: 등급의 사용량 집계
+            latencies: 등급의 성공한 요청 지연 시간(초) (합산용으로 통계에 함께 담음)
+            cost_multiplier: 요금 배율
+        """
+        tier = self.tiers[name]
+        return {
+            "model": f"{tier.config.provider}/{tier.config.model}",
+            **usage,
+            "total_cost": self._cost(tier.config, usage["input_tokens"], usage["output_tokens"],
+                                     usage["cache_read_tokens"], usage["cache_write_tokens"]) * cost_multiplier,
+            "latencies": list(latencies),
+            **self._latency_stats(latencies)
+        }
+    
+    @staticmethod
+    def _latency_stats(latencies: List[float]) -> Dict[str, float]:
+        """평균 및 95백분위수 지연 시간(초)"""
+        if not latencies:
+            return {"mean_latency": 0.0, "p95_latency": 0.0}
+        ordered = sorted(latencies)
+        rank = min(len(ordered), max(1, math.ceil(0.95 * len(ordered))))
+        return {"mean_latency": sum(ordered) / len(ordered), "p95_latency": ordered[rank - 1]}
+    
+    @staticmethod
+    def _hedge_stats(counters: Dict) -> Dict:
+        """
+        헤지 요청 통계
+        
+        Args:
+            counters: 작업 통계 항목 (TranslationJob.counters 또는 그 합계)
+        """
+        eligible = counters["hedge_eligible_requests"]
+        return {
+            "hedge_eligible_requests": eligible,
+            "hedged_requests": counters["hedged_requests"],
+            "hedge_wins": counters["hedge_wins"],
+            "hedge_rate": counters["hedged_requests"] / eligible if eligible else 0.0,
+            "hedge_extra_cost": counters["hedge_extra_cost"]
+        }
+    
+    def _abort_job(self, job: "TranslationJob") -> None:
+        """중단된 작업의 임시 파일을 지우고 작업 기록은 다음 실행을 위해 남김"""
+        if job.writer:
+            job.writer.abort()
+        if job.journal:
+            job.journal.close()
+    
+    async def _run_batches(self, jobs: List["TranslationJob"]) -> None:
+        """
+        모든 작업의 배치를 하나의 스케줄러로 동시에 번역하고 완료되는 순서대로 결과를 기록
+        
+        동시 요청 수 제어기와 요청 한도 제한기는 모델 등급마다 두고 모든 파일이 공유하며,
+        파일의 마지막 배치가 끝나는 즉시 그 파일의 결과를 확정합니다(job.stats).
+        
+        Args:
+            jobs: 번역할 작업 목록
+        """
+        # 요청은 스레드 대신 코루틴으로 실행하고 동시 요청 수는 제어기가 조정
+        # (모델마다 요청 한도가 따로이므로 등급마다 제어기와 제한기를 둠)
+        for tier in self.tiers.values():
+            tier.concurrency = AdaptiveConcurrencyController(
+                tier.config.max_workers,
+                tier.config.concurrency_floor,
+                tier.config.concurrency_ceiling,
+                adaptive=tier.config.adaptive_concurrency
+            )
+            tier.rate_limiter = TokenBucketRateLimiter(tier.config.get_rate_limits())
+        self.concurrency = self.tiers["main"].concurrency
+        self.rate_limiter = self.tiers["main"].rate_limiter
+        
+        # 배치는 번역 중인 배치가 상한보다 적을 때만 만들어 파일 크기와 관계없이 메모리 사용량을 제한
+        window = max(1, self.config.concurrency_ceiling) * self.IN_FLIGHT_PER_SLOT * len(self.tiers)
+        waiting = deque(jobs)
+        tasks: Dict[asyncio.Task, TranslationJob] = {}
+        
+        try:
+            # tqdm으로 진행 상황 표시 (작업 기록/캐시로 채운 자막도 포함, 전체 자막 수는 파일을 준비할 때마다 늘어남)
+            with tqdm(total=sum(job.subtitle_count for job in jobs), desc="번역 진행 중", unit="자막") as progress_bar:
+                while True:
+                    await self._schedule_batches(waiting, tasks, window)
+                    total = sum(job.subtitle_count for job in jobs)
+                    if total != progress_bar.total:
+                        progress_bar.total = total
+                        progress_bar.refresh()
+                    progress_bar.update(sum(job.settled for job in jobs) - progress_bar.n)
+                    if self.progress_callback:
+                        self.progress_callback(progress_bar.n, total)
+                    if not tasks:
+                        break
+                    
+                    done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        job = tasks.pop(task)
+                        _, (batch_index, translated, input_tokens, output_tokens), answered_by = task.result()
+                        self._complete_batch(job, batch_index, translated, input_tokens, output_tokens, answered_by)
+                        if job.planned and not job.in_flight:
+                            job.stats = self._finish_job(job)
+        finally:
+            # 오류로 중단된 경우 남은 요청 취소
+            for task in tasks:
+                task.cancel()
+    
+    async def _schedule_batches(self, waiting: deque, tasks: Dict[asyncio.Task, "TranslationJob"],
+                                window: int) -> None:
+        """
+        번역 중인 배치가 window개가 될 때까지 다음 배치를 만들어 요청 태스크로 실행
+        
+        앞 파일의 배치부터 만들므로 동시 요청 수 대기열에서도 먼저 처리되어 파일이
+        순서대로 완료됩니다. 배치를 모두 만든 작업은 대기열에서 빼고, 번역 중인 배치가
+        없으면(캐시/작업 기록으로 모두 채워진 경우 등) 바로 확정합니다. 앞쪽 배치를
+        기다려야 하는 작업이 있으면 배치가 끝날 때까지 더 만들지 않습니다. 아직 준비하지
+        않은 작업은 첫 배치를 만들 차례가 되었을 때 준비하고(출력 임시 파일도 이때 열림),
+        준비하지 못한 파일은 건너뜁니다(job.failed). 배치 구성과 작업 준비는 입력 파일
+        읽기, 캐시 조회, 출력 파일 쓰기를 하므로 이벤트 루프를 막지 않도록 스레드에서
+        실행합니다(그동안 작업 상태를 바꾸는 결과 기록은 일어나지 않음).
+        
+        Args:
+            waiting: 배치를 더 만들 작업 대기열
+            tasks: 실행 중인 요청 태스크 -> 작업
+            window: 동시에 실행할 최대 요청 태스크 수
+        """
+        while waiting and len(tasks) < window:
+            job = waiting[0]
+            if job.plan is None and not await self._start_job(job):
+                waiting.popleft()
+                continue
+            batch_info = await asyncio.to_thread(self._next_batch, job)
+            if batch_info is None:
+                if not job.planned:
+                    break
+                waiting.popleft()
+                if not job.in_flight:
+                    job.stats = self._finish_job(job)
+                continue
+            tasks[asyncio.create_task(self._run_job_batch(job, batch_info))] = job
+    
+    async def _start_job(self, job: "TranslationJob") -> bool:
         """
-        환경 변수에서 OpenAI API 키를 가져옴
+        작업을 준비하고 준비하지 못하면 정리한 뒤 실패로 표시
         
+        Args:
+            job: 준비할 번역 작업
+            
         Returns:
-            API 키
+            준비에 성공했는지 여부
+        """
+        try:
+            self.logger.info(f"파일 '{job.input_file}' 준비 중...")
+            await asyncio.to_thread(self._prepare_job, job)
+            return True
+        except Exception as e:
+            self.logger.error(f"파일 '{job.input_file}'을(를) 건너뜁니다: {e}")
+            self._abort_job(job)
+            job.failed = True
+            return False
+    
+    async def _run_job_batch(self, job: "TranslationJob", batch_info: Tuple[List[SubtitleCue], int, int]
+                             ) -> Tuple["TranslationJob", Tuple[int, List[Optional[SubtitleCue]], int, int],
+                                        Dict[int, Tuple[str, str, str]]]:
+        """배치를 번역하고 결과를 작업, 보조 헤지 모델이 번역한 자막 기록과 함께 반환"""
+        # 배치마다 별도 태스크로 실행되므로 이 태스크의 요청만 이 작업의 캐시 사용량에 기록됨
+        tier_name = job.in_flight[batch_info[2]][2]
+        _prompt_cache_usage.set(job.usage(tier_name))
+        _current_job.set(job)
+        answers = {}
+        _hedge_answers.set(answers)
+        return job, await self._translate_batch_task(batch_info, self.tiers[tier_name]), answers
+    
+    def translate(self, input_file: str, output_file: str) -> Dict:
+        """
+        전체 자막 번역 실행 (translate_async의 동기 래퍼)
+        
+        Args:
+            input_file: 번역할 SRT 파일 경로
+            output_file: 번역 결과를 저장할 파일 경로
             
-        Raises:
-            ValueError: API 키가 설정되지 않은 경우
+        Returns:
+            번역 결과 통계 (토큰 수, 비용 등)
         """
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if not api_key:
-            self.logger.error("환경 변수 'OPENAI_API_KEY'가 설정되지 않았습니다.")
-            raise ValueError("환경 변수 'OPENAI_API_KEY'가 설정되지 않았습니다. "
-                            "export OPENAI_API_KEY=your_api_key 명령으로 API 키를 설정해주세요.")
-        return api_key
+        return asyncio.run(self.translate_async(input_file, output_file))
     
-    def _create_api_params(self, batch: str) -> dict:
-        """API 호출 파라미터를 생성하고 지원되지 않는 파라미터를 제거"""
-        api_params = {
-            "model": self.config.model,
-            "messages": [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": batch}
-            ]
-        }
+    async def translate_async(self, input_file: str, output_file: str) -> Dict:
+        """
+        전체 자막 번역 실행
         
-        # 이전에 지원되지 않는다고 확인된 파라미터들은 제외
-        if "temperature" not in self.unsupported_params:
-            api_params["temperature"] = 0.2
-        if "top_p" not in self.unsupported_params:
-            api_params["top_p"] = 0.9
-        if "presence_penalty" not in self.unsupported_params:
-            api_params["presence_penalty"] = 0.0
-        if "frequency_penalty" not in self.unsupported_params:
-            api_params["frequency_penalty"] = 0.0
-        if "seed" not in self.unsupported_params:
-            api_params["seed"] = 42
+        Args:
+            input_file: 번역할 SRT 파일 경로
+            output_file: 번역 결과를 저장할 파일 경로
+            
+        Returns:
+            번역 결과 통계 (토큰 수, 비용 등)
+        """
+        self.logger.info(f"파일 '{input_file}'을(를) 번역합니다...")
+        job = TranslationJob(input_file, output_file)
         
-        if self.config.max_tokens > 0:
-            if "max_tokens" not in self.unsupported_params:
-                api_params["max_tokens"] = self.config.max_tokens
-            else:
-                # 일부 모델(o1/o3/Responses API)은 max_completion_tokens 사용
-                api_params["max_completion_tokens"] = self.config.max_tokens
+        try:
+            try:
+                await asyncio.to_thread(self._prepare_job, job)
+                await self._run_batches([job])
+            except BaseException:
+                self._abort_job(job)
+                raise
+            finally:
+                if self.cache:
+                    self.cache.flush()
+                self.throughput.save()
+                    
+            return job.stats
             
-        return api_params
+        except Exception as e:
+            self.logger.error(f"번역 중 오류가 발생했습니다: {e}")
+            raise
     
-    def translate_batch(self, batch: str, start_number: int) -> Tuple[str, int, int]:
+    def translate_range(self, input_file: str, output_file: str, range_spec: Tuple[str, int, int]) -> Dict:
         """
-        주어진 배치의 자막을 번역
+        입력 파일의 시간 구간이나 자막 번호 구간만 번역해 출력 파일의 같은 자리에 끼워 넣음 (--range)
+        
+        입력 파일 옆에 저장한 색인(SrtIndex)으로 구간의 바이트 범위를 찾아 그 부분만 임시 파일로
+        옮겨 번역하므로 파일 전체를 파싱하지 않습니다. 구간 번역은 일반 번역과 같이 캐시, 작업
+        기록, 중복 제거를 거칩니다. 출력 파일에서는 구간 자막의 본문만 바꾸고 번호, 시간 정보와
+        구간 밖 내용은 그대로 두며, 출력 파일이 아직 없으면 입력 파일을 복사해 시작합니다.
         
         Args:
-            batch: 번역할 자막 배치
-            start_number: 시작 자막 번호
+            input_file: 번역할 SRT 파일 경로
+            output_file: 번역 결과를 끼워 넣을 파일 경로
+            range_spec: SrtIndex.parse_range로 해석한 구간
             
         Returns:
-            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
+            구간 번역 결과 통계 (번역한 자막 위치 구간은 "range"에 포함)
             
         Raises:
-            Exception: 번역 중 오류가 발생한 경우
+            ValueError: 구간에 자막이 없거나 출력 파일의 자막 수가 입력 파일과 다른 경우
         """
-        if not batch.strip():
-            return "", 0, 0
-            
+        index = SrtIndex.load(input_file)
+        start, end = index.locate(*range_spec)
+        if start >= end:
+            raise ValueError(f"지정한 범위에 자막이 없습니다: {input_file}")
+        self.logger.info(f"'{input_file}'의 자막 {start + 1}~{end}번째({end - start}개)만 번역합니다.")
+        
+        # 끼워 넣을 파일은 번역 전에 확인해 쓸모없는 요청을 보내지 않음
+        base_file, base_index = input_file, index
+        if os.path.exists(output_file):
+            base_file, base_index = output_file, SrtIndex.build(output_file)
+            if len(base_index) != len(index):
+                raise ValueError(f"출력 파일 '{output_file}'의 자막 수({len(base_index)})가 입력 파일({len(index)})과 "
+                                 f"달라 구간을 끼워 넣을 수 없습니다. --range 없이 전체를 번역하세요.")
+        
+        config = self.config
+        if config.timing_offset_ms or config.source_fps or config.min_duration_ms or config.close_gap_ms:
+            self.logger.warning("--range는 자막 본문만 바꾸므로 시간 조정 설정은 적용되지 않습니다.")
+        
+        # 구간의 원본 바이트만 임시 파일로 옮겨 일반 번역과 같은 과정으로 번역
+        os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+        range_input = f"{output_file}.range.srt"
+        range_output = f"{output_file}.range_ko.srt"
         try:
-            api_params = self._create_api_params(batch)
-            response = self.client.chat.completions.create(**api_params)
-    
-            # 토큰 사용량 추출
-            usage = response.usage
-            input_tokens = usage.prompt_tokens
-            output_tokens = usage.completion_tokens
+            with open(range_input, 'wb') as file:
+                SrtIndex.copy_bytes(input_file, file, *index.byte_range(start, end))
+            stats = self.translate(range_input, range_output)
+            translated = list(self.processor.iter_cues(self.file_handler.iter_srt_chunks(range_output), warn=False))
+            self._splice_range(base_file, base_index, output_file, start, end, translated)
+        finally:
+            for path in (range_input, range_output):
+                if os.path.exists(path):
+                    os.remove(path)
+                    
+        stats['range'] = (start + 1, end)
+        return stats
     
-            translated_text = response.choices[0].message.content
+    def _splice_range(self, base_file: str, base_index: SrtIndex, output_file: str,
+                      start: int, end: int, translated: List[SubtitleCue]) -> None:
+        """
+        번역한 구간 자막의 본문을 바탕 파일(기존 출력 파일 또는 입력 파일)의 같은 위치 자막에 넣어 출력 파일을 씀
+        
+        구간 앞뒤의 바이트는 그대로 복사하므로 이미 번역된 다른 구간은 바뀌지 않습니다.
+        """
+        if len(translated) != end - start:
+            raise ValueError(f"구간 번역 결과의 자막 수({len(translated)})가 구간 자막 수({end - start})와 다릅니다.")
             
-            # 자막 내용 추출
-            korean_subtitles = self._extract_korean_subtitles(translated_text)
-            return korean_subtitles, input_tokens, output_tokens
-                
-        except openai.APIError as e:
-            error_str = str(e)
-            
-            # 지원되지 않는 파라미터 에러 처리
-            if "Unsupported parameter" in error_str or "Unsupported value" in error_str:
-                # 어떤 파라미터가 문제인지 파악
-                if "temperature" in error_str:
-                    self.unsupported_params.add("temperature")
-                    self.logger.info(f"모델 {self.config.model}에서 temperature 파라미터를 지원하지 않습니다. 제거 후 재시도합니다.")
-                elif "max_tokens" in error_str:
-                    self.unsupported_params.add("max_tokens")
-                    self.logger.info(f"모델 {self.config.model}에서 max_tokens 파라미터를 지원하지 않습니다. 제거 후 재시도합니다.")
-                elif "max_completion_tokens" in error_str:
-                    self.unsupported_params.add("max_completion_tokens")
-                    self.logger.info(f"모델 {self.config.model}에서 max_completion_tokens 파라미터를 지원하지 않습니다. 제거 후 재시도합니다.")
-                elif "top_p" in error_str:
-                    self.unsupported_params.add("top_p")
-                    self.logger.info(f"모델 {self.config.model}에서 top_p 파라미터를 지원하지 않습니다. 제거 후 재시도합니다.")
-                elif "presence_penalty" in error_str:
-                    self.unsupported_params.add("presence_penalty")
-                    self.logger.info(f"모델 {self.config.model}에서 presence_penalty 파라미터를 지원하지 않습니다. 제거 후 재시도합니다.")
-                elif "frequency_penalty" in error_str:
-                    self.unsupported_params.add("frequency_penalty")
-                    self.logger.info(f"모델 {self.config.model}에서 frequency_penalty 파라미터를 지원하지 않습니다. 제거 후 재시도합니다.")
-                elif "seed" in error_str:
-                    self.unsupported_params.add("seed")
-                    self.logger.info(f"모델 {self.config.model}에서 seed 파라미터를 지원하지 않습니다. 제거 후 재시도합니다.")
-                
-                # 파라미터를 제거하고 재시도
-                api_params = self._create_api_params(batch)
-                response = self.client.chat.completions.create(**api_params)
-                
-                # 토큰 사용량 추출
-                usage = response.usage
-                input_tokens = usage.prompt_tokens
-                output_tokens = usage.completion_tokens
+        range_start, range_end = base_index.byte_range(start, end)
+        with open(base_file, 'rb') as file:
+            file.seek(range_start)
+            base_content = file.read(range_end - range_start).decode('utf-8')
+        base_cues = self.processor.iter_cues([base_content], warn=False)
+        blocks = [SubtitleCue(number, cue.start_ms, cue.end_ms, translation.text).to_srt()
+                  for number, cue, translation in zip(base_index.numbers[start:end].tolist(), base_cues, translated)]
         
-                translated_text = response.choices[0].message.content
-                
-                # 자막 내용 추출
-                korean_subtitles = self._extract_korean_subtitles(translated_text)
-                return korean_subtitles, input_tokens, output_tokens
-            else:
-                self.logger.error(f"OpenAI API 오류: {e}")
-                raise
-        except Exception as e:
-            self.logger.error(f"번역 중 오류 발생: {e}")
-            raise
-
-
-class TranslatorFactory:
-    """번역기 팩토리 클래스"""
+        temp_file = f"{output_file}.part"
+        with open(temp_file, 'wb') as file:
+            SrtIndex.copy_bytes(base_file, file, 0, range_start)
+            file.write('\n\n'.join(blocks).encode('utf-8'))
+            if end < len(base_index):
+                file.write(b'\n\n')
+                SrtIndex.copy_bytes(base_file, file, range_end, base_index.size)
+            elif base_content.endswith(('\n', '\r')):
+                file.write(b'\n')
+        os.replace(temp_file, output_file)
     
-    @staticmethod
-    def create_translator(config: SubtitleTranslationConfig) -> BaseTranslator:
+    def translate_files(self, file_pairs: List[Tuple[str, str]]) -> Dict:
         """
-        설정에 따라 적절한 번역기 인스턴스 생성
+        여러 자막 파일 번역 실행 (translate_files_async의 동기 래퍼)
         
         Args:
-            config: 번역 설정
+            file_pairs: (입력 파일 경로, 출력 파일 경로) 목록
             
         Returns:
-            번역기 인스턴스
+            전체 번역 결과 통계 (파일별 통계는 "files"에 포함)
+        """
+        return asyncio.run(self.translate_files_async(file_pairs))
+    
+    async def translate_files_async(self, file_pairs: List[Tuple[str, str]]) -> Dict:
+        """
+        여러 자막 파일을 하나의 스케줄러로 번역
+        
+        모든 파일의 배치가 전역 동시 요청 수와 요청 한도를 공유하므로 파일 사이에서도
+        병렬로 처리되며, 각 파일은 마지막 배치가 끝나는 즉시 저장됩니다. 파일은 첫 배치를
+        만들 차례가 되었을 때 읽고 출력 임시 파일을 열므로, 파일 수와 관계없이 동시에
+        열린 파일은 번역 중인 파일뿐입니다. 읽을 수 없거나 형식이 잘못된 파일은 건너뛰고
+        "failed_files"에 기록합니다.
+        
+        Args:
+            file_pairs: (입력 파일 경로, 출력 파일 경로) 목록
             
-        Raises:
-            ValueError: 지원하지 않는 제공업체인 경우
+        Returns:
+            전체 번역 결과 통계 (파일별 통계는 "files"에 포함)
         """
-        if config.provider == "claude":
-            return ClaudeTranslator(config)
-        elif config.provider == "openai":
-            return OpenAITranslator(config)
-        else:
-            raise ValueError(f"지원하지 않는 제공업체입니다: {config.provider}. "
-                           "사용 가능한 제공업체: claude, openai")
-
-
-class SubtitleTranslator:
-    """전체 자막 번역 프로세스를 관리하는 클래스"""
+        self.logger.info(f"{len(file_pairs)}개의 파일을 번역합니다...")
+        jobs = [TranslationJob(input_file, output_file) for input_file, output_file in file_pairs]
+        
+        try:
+            await self._run_batches(jobs)
+        except BaseException:
+            # 완료되지 않은 파일만 정리 (이미 저장된 파일은 그대로 둠)
+            for job in jobs:
+                if job.stats is None:
+                    self._abort_job(job)
+            raise
+        finally:
+            if self.cache:
+                self.cache.flush()
+            self.throughput.save()
+        
+        return self.aggregate_stats({job.input_file: job.stats for job in jobs if not job.failed},
+                                    [job.input_file for job in jobs if job.failed])
     
-    def __init__(self, config: SubtitleTranslationConfig):
-        self.config = config
-        self.logger = logging.getLogger(__name__)
-        self.file_handler = SubtitleFileHandler()
-        self.processor = SubtitleProcessor()
-        self.translator = TranslatorFactory.create_translator(config)
+    def aggregate_stats(self, file_stats: Dict[str, Dict], failed_files: Optional[List[str]] = None) -> Dict:
+        """
+        파일별 통계를 합산한 전체 통계 생성
         
-        # 토큰 사용량 추적 변수
-        self.total_input_tokens = 0
-        self.total_output_tokens = 0
+        Args:
+            file_stats: 입력 파일 경로 -> 파일별 번역 결과 통계
+            failed_files: 건너뛴 입력 파일 목록
+            
+        Returns:
+            전체 번역 결과 통계
+        """
+        totals = {
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "prompt_cache_read_tokens": 0,
+            "prompt_cache_write_tokens": 0,
+            "total_cost": 0.0,
+            "subtitles_count": 0,
+            "batches_count": 0,
+            "resumed_subtitles": 0,
+            "adjusted_timestamps": 0,
+            "failed_subtitles": 0,
+            "dedup_saved_subtitles": 0,
+            "dedup_saved_requests": 0,
+            "dedup_saved_tokens": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "repaired_subtitles": 0,
+            "restored_timestamps": 0,
+            "bisected_batches": 0,
+            "hedge_eligible_requests": 0,
+            "hedged_requests": 0,
+            "hedge_wins": 0,
+            "hedge_extra_cost": 0.0
+        }
+        retries = dict.fromkeys(self.config.retry_budgets, 0)
+        for stats in file_stats.values():
+            for key in totals:
+                totals[key] += stats[key]
+            for error_class, count in stats["retries"].items():
+                retries[error_class] = retries.get(error_class, 0) + count
+        totals["prompt_cache_hit_ratio"] = (totals["prompt_cache_read_tokens"] / totals["input_tokens"]
+                                            if totals["input_tokens"] else 0.0)
+        
+        # 모델 등급별 사용량과 요금도 합산 (지연 시간 통계는 파일별 지연 시간을 모아 다시 계산)
+        totals["tiers"] = self._sum_tier_stats(file_stats)
+        for name, tier_stats in totals["tiers"].items():
+            latencies = [latency for stats in file_stats.values() if name in stats["tiers"]
+                         for latency in stats["tiers"][name]["latencies"]]
+            tier_stats["latencies"] = latencies
+            tier_stats.update(self._latency_stats(latencies))
+                
+        totals["retries"] = retries
+        totals.update(self._hedge_stats(totals))
+        totals["files_count"] = len(file_stats)
+        totals["failed_files"] = failed_files or []
+        totals["files"] = file_stats
+        return totals
     
-    def _translate_batch_with_retry(self, batch: str, start_number: int) -> Tuple[str, int, int]:
+    def estimate_files(self, file_pairs: List[Tuple[str, str]], batch_api: bool = False) -> Dict:
         """
-        재시도 로직을 포함한 배치 번역
+        요청을 보내지 않고 번역 비용, 요청 수, 소요 시간을 예측 (--estimate)
+        
+        실제 번역과 똑같이 파일을 읽고 작업 기록/캐시/중복 제거를 적용해 배치를 구성한 뒤,
+        배치마다 입력/출력 토큰 수를 추정합니다. 요청별 지연 시간은 모델 등급마다 그 모델의
+        응답 속도 기록으로 구합니다. 모델 등급은 요청 슬롯과 분당 한도(rate_limits)를 따로
+        쓰므로, 등급마다 설정된 동시 요청 수로 순서대로 처리했을 때의 소요 시간과 분당
+        한도로 인한 최소 시간 중 큰 값을 구하고, 그중 가장 오래 걸리는 등급의 시간을 예상
+        소요 시간으로 봅니다.
         
         Args:
-            batch: 번역할 자막 배치
-            start_number: 시작 자막 번호
+            file_pairs: (입력 파일, 출력 파일) 목록
+            batch_api: Batch API 요금 배율을 적용할지 여부 (소요 시간은 예측하지 않음)
             
         Returns:
-            (번역된 자막, 입력 토큰 수, 출력 토큰 수)
+            예상 통계 (파일별 통계는 "files")
         """
-        max_retries = 3
-        retry_count = 0
+        speeds = {name: self.throughput.speed(tier.config.model) for name, tier in self.tiers.items()}
+        cost_multiplier = self.config.batch_api_discount if batch_api else 1.0
         
-        while retry_count < max_retries:
+        file_stats = {}
+        failed_files = []
+        # 모델 등급 -> 배치를 만든 순서대로의 요청별 예상 지연 시간
+        latencies: Dict[str, List[float]] = {name: [] for name in self.tiers}
+        for input_file, output_file in file_pairs:
+            job = TranslationJob(input_file, output_file)
             try:
-                return self.translator.translate_batch(batch, start_number)
+                self._prepare_job(job, dry_run=True, route=not batch_api)
             except Exception as e:
-                retry_count += 1
-                self.logger.warning(f"배치 번역 시도 {retry_count}/{max_retries} 실패: {e}")
+                self.logger.error(f"파일 '{input_file}'을(를) 건너뜁니다: {e}")
+                failed_files.append(input_file)
+                continue
                 
-                if retry_count >= max_retries:
-                    self.logger.error("최대 재시도 횟수를 초과했습니다.")
-                    return f"[번역 실패: {e}]\n\n", 0, 0
+            translated = 0
+            for positions, batch, tier_name in job.plan:
+                job.batches_count += 1
+                translated += len(positions)
+                estimated_input, estimated_output = self._estimate_request_tokens(batch, self.tiers[tier_name])
+                usage = job.usage(tier_name)
+                usage["batches"] += 1
+                usage["subtitles"] += len(positions)
+                usage["input_tokens"] += estimated_input
+                usage["output_tokens"] += estimated_output
+                tier_speed, tier_overhead, _ = speeds[tier_name]
+                latencies[tier_name].append(tier_overhead + estimated_output / tier_speed)
+                
+            tier_stats = {}
+            for tier_name, usage in job.tier_usage.items():
+                tier = self.tiers[tier_name]
+                
+                # 동시에 시작하는 첫 요청들은 캐시에 쓰고, 나머지는 캐시에서 읽는다고 가정
+                prefix_tokens = tier.system_prompt_tokens
+                if self.config.prompt_cache and prefix_tokens >= tier.translator.prompt_cache_min_tokens():
+                    writers = min(usage["batches"], tier.config.max_workers)
+                    usage["cache_write_tokens"] = writers * prefix_tokens
+                    usage["cache_read_tokens"] = (usage["batches"] - writers) * prefix_tokens
                     
-                # 지수 백오프 적용
-                wait_time = 2 ** retry_count
-                self.logger.info(f"{wait_time}초 후 재시도합니다...")
-                time.sleep(wait_time)
+                tier_stats[tier_name] = {
+                    "model": f"{tier.config.provider}/{tier.config.model}",
+                    **usage,
+                    "total_cost": self._cost(tier.config, usage["input_tokens"], usage["output_tokens"],
+                                             usage["cache_read_tokens"], usage["cache_write_tokens"]) * cost_multiplier
+                }
+                
+            file_stats[input_file] = {
+                "subtitles_count": job.subtitle_count,
+                "translated_subtitles": translated,
+                "skipped_subtitles": job.subtitle_count - translated - job.dedup_stats["dedup_saved_subtitles"],
+                "batches_count": job.batches_count,
+                "input_tokens": sum(usage["input_tokens"] for usage in job.tier_usage.values()),
+                "output_tokens": sum(usage["output_tokens"] for usage in job.tier_usage.values()),
+                "prompt_cache_read_tokens": sum(usage["cache_read_tokens"] for usage in job.tier_usage.values()),
+                "prompt_cache_write_tokens": sum(usage["cache_write_tokens"] for usage in job.tier_usage.values()),
+                "total_cost": sum(stats["total_cost"] for stats in tier_stats.values()),
+                "tiers": tier_stats,
+                **job.dedup_stats
+            }
+            
+        totals = {key: sum(stats[key] for stats in file_stats.values())
+                  for key in ("subtitles_count", "translated_subtitles", "skipped_subtitles", "batches_count",
+                              "input_tokens", "output_tokens", "prompt_cache_read_tokens",
+                              "prompt_cache_write_tokens", "total_cost", "dedup_saved_subtitles")}
+        
+        tier_totals = self._sum_tier_stats(file_stats)
+        wall_seconds = None if batch_api else 0.0
+        for name, tier_stats in tier_totals.items():
+            tier_speed, tier_overhead, from_history = speeds[name]
+            tier_stats["mean_latency"] = tier_overhead + tier_stats["output_tokens"] / max(1, tier_stats["batches"]) / tier_speed
+            tier_stats.update({"tokens_per_second": tier_speed, "request_overhead": tier_overhead,
+                               "throughput_from_history": from_history, "concurrency": self.tiers[name].config.max_workers})
+            if not batch_api:
+                tier_stats["wall_seconds"] = self._estimate_tier_wall_seconds(self.tiers[name], latencies[name], tier_stats)
+                wall_seconds = max(wall_seconds, tier_stats["wall_seconds"])
+        
+        totals.update({
+            "requests_count": totals["batches_count"],
+            "wall_seconds": wall_seconds,
+            "concurrency": sum(tier.config.max_workers for name, tier in self.tiers.items() if name in tier_totals),
+            "tiers": tier_totals,
+            "files_count": len(file_stats),
+            "failed_files": failed_files,
+            "files": file_stats
+        })
+        return totals
     
-    def _translate_batch_task(self, args: Tuple[str, int, int]) -> Tuple[int, str, int, int]:
+    @staticmethod
+    def _estimate_tier_wall_seconds(tier: ModelTier, latencies: List[float], usage: Dict) -> float:
         """
-        병렬 처리를 위한 번역 작업 함수
+        한 모델 등급의 요청을 그 등급의 요청 슬롯과 분당 한도로 처리했을 때의 예상 소요 시간
         
         Args:
-            args: (배치, 시작 번호, 배치 인덱스)
+            tier: 모델 등급
+            latencies: 배치를 만든 순서대로의 요청별 예상 지연 시간
+            usage: 모델 등급의 예상 사용량 (요청 수와 입력/출력 토큰 수)
             
         Returns:
-            (배치 인덱스, 번역된 자막, 입력 토큰 수, 출력 토큰 수)
+            예상 소요 시간 (초)
         """
-        batch, start_number, batch_index = args
-        translated_batch, input_tokens, output_tokens = self._translate_batch_with_retry(batch, start_number)
-        return batch_index, translated_batch, input_tokens, output_tokens
+        # 배치를 만든 순서대로 비어 있는 요청 슬롯에 배정했을 때 마지막 요청이 끝나는 시각
+        slots = [0.0] * max(1, min(tier.config.max_workers, len(latencies)))
+        for latency in latencies:
+            heapq.heapreplace(slots, slots[0] + latency)
+        wall_seconds = max(slots)
+        
+        # 분당 한도가 있으면 한도 안에서 보낼 수 있는 속도보다 빨리 끝날 수 없음
+        requested = {"rpm": usage["batches"], "tpm": usage["input_tokens"] + usage["output_tokens"],
+                     "itpm": usage["input_tokens"], "otpm": usage["output_tokens"]}
+        for key, limit in tier.config.get_rate_limits().items():
+            if limit and key in requested:
+                wall_seconds = max(wall_seconds, requested[key] / limit * 60)
+        return wall_seconds
     
-    def translate(self, input_file: str, output_file: str) -> Dict:
+    @staticmethod
+    def _sum_tier_stats(file_stats: Dict[str, Dict]) -> Dict[str, Dict]:
+        """파일별 통계의 모델 등급별 사용량과 요금 합산 (지연 시간 제외)"""
+        tiers: Dict[str, Dict] = {}
+        for stats in file_stats.values():
+            for name, tier_stats in stats["tiers"].items():
+                summed = tiers.setdefault(name, {"model": tier_stats["model"]})
+                for key in ("batches", "subtitles", "input_tokens", "output_tokens",
+                            "cache_read_tokens", "cache_write_tokens", "total_cost"):
+                    summed[key] = summed.get(key, 0) + tier_stats[key]
+        return tiers
+    
+    def translate_with_batch_api(self, input_file: str, output_file: str) -> Dict:
         """
-        전체 자막 번역 실행
+        제공업체의 비동기 Batch API로 전체 자막 번역 실행
+        
+        모든 배치를 하나의 배치 작업으로 제출하고 완료될 때까지 간격을 늘려가며
+        확인합니다. 작업 ID는 출력 파일 옆에 저장되므로 중단 후 같은 명령으로
+        다시 실행하면 새로 제출하지 않고 기존 작업을 이어서 기다립니다.
         
         Args:
             input_file: 번역할 SRT 파일 경로
@@ -747,86 +5425,245 @@ class SubtitleTranslator:
         Returns:
             번역 결과 통계 (토큰 수, 비용 등)
         """
-        self.logger.info(f"파일 '{input_file}'을(를) 번역합니다...")
+        stats = self.translate_files_with_batch_api([(input_file, output_file)], skip_failed=False)
+        return stats["files"][input_file]
+    
+    def translate_files_with_batch_api(self, file_pairs: List[Tuple[str, str]], skip_failed: bool = True) -> Dict:
+        """
+        여러 자막 파일을 파일마다 배치 작업 하나로 Batch API에 제출해 번역
         
-        try:
-            # 입력 파일 읽기 및 검증
-            srt_content = self.file_handler.read_srt_file(input_file)
-            
-            if not self.file_handler.validate_srt_format(srt_content):
-                self.logger.error("유효하지 않은 SRT 파일 형식입니다.")
-                raise ValueError("유효하지 않은 SRT 파일 형식입니다.")
-            
-            # 자막 분할 및 배치 생성
-            subtitles = self.processor.split_subtitles(srt_content)
-            self.logger.info(f"총 {len(subtitles)}개의 자막을 찾았습니다.")
-            
-            batches = self.processor.create_batches(subtitles, self.config.batch_size)
-            self.logger.info(f"자막을 {len(batches)}개의 배치로 나누었습니다.")
-            
-            # 번역 작업 준비
-            results = [None] * len(batches)
-            
-            # 병렬 처리 실행
-            batch_tasks = [(batch, i * self.config.batch_size + 1, i) for i, batch in enumerate(batches)]
+        모든 파일의 배치 작업을 먼저 제출(또는 저장된 작업을 이어받음)한 뒤 함께 상태를
+        확인하고, 끝난 작업부터 결과를 저장하므로 파일 수만큼 처리 시간을 차례로 기다리지
+        않습니다. 상태 확인 간격은 확인할 때마다 두 배씩 늘어납니다.
+        
+        Args:
+            file_pairs: (입력 파일 경로, 출력 파일 경로) 목록
+            skip_failed: True이면 준비, 제출, 결과 저장에 실패한 파일을 건너뛰고 "failed_files"에
+                기록하며, False이면 예외를 그대로 발생시킴
             
-            with ThreadPoolExecutor(max_workers=min(self.config.max_workers, len(batches))) as executor:
-                futures = [executor.submit(self._translate_batch_task, task) for task in batch_tasks]
+        Returns:
+            전체 번역 결과 통계 (파일별 통계는 "files"에 포함)
+        """
+        # 배치 작업 ID -> (번역 작업, 제출한 (배치, 시작 번호, 배치 인덱스) 목록)
+        pending: Dict[str, Tuple[TranslationJob, List[Tuple[List[SubtitleCue], int, int]]]] = {}
+        file_stats = {}
+        failed_files = []
+        
+        try:
+            try:
+                for input_file, output_file in file_pairs:
+                    self.logger.info(f"파일 '{input_file}'을(를) Batch API로 번역합니다...")
+                    job = TranslationJob(input_file, output_file)
+                    try:
+                        # 배치 작업 하나는 한 모델로만 제출하므로 난이도 라우팅은 사용하지 않음
+                        self._prepare_job(job, route=False, throttle=False)
+                        # 배치 작업은 모든 요청을 한 번에 제출하므로 배치를 모두 만들어 둠
+                        batch_tasks = list(iter(lambda: self._next_batch(job), None))
+                        if not batch_tasks:
+                            file_stats[input_file] = self._finish_batch_api_job(job)
+                            continue
+                        job_id = self._submit_or_resume_batch_job(job, batch_tasks, self._batch_state_file(job))
+                    except Exception as e:
+                        self._skip_batch_api_job(job, e, skip_failed, failed_files)
+                        continue
+                    pending[job_id] = (job, batch_tasks)
                 
-                # tqdm으로 진행 상황 표시
-                with tqdm(total=len(batches), desc="번역 진행 중") as progress_bar:
-                    for future in futures:
-                        batch_index, translated_batch, input_tokens, output_tokens = future.result()
-                        results[batch_index] = translated_batch
-                        
-                        # 토큰 사용량 누적
-                        self.total_input_tokens += input_tokens
-                        self.total_output_tokens += output_tokens
-                        
-                        progress_bar.update(1)
-            
-            # 번역 결과 결합
-            translated_srt = "".join(results)
-            
-            # 자막 번호 재정렬
-            translated_srt = self.processor.renumber_subtitles(translated_srt)
-            
-            # 시간 중복 확인 및 조정
-            self.logger.info("자막 시간 중복 확인 및 조정 중...")
-            original_translated_srt = translated_srt
-            adjusted_translated_srt = self.processor.check_timestamp_overlaps(translated_srt)
+                # 제출한 작업을 함께 확인하며 끝난 작업부터 결과를 저장
+                interval = self.config.batch_poll_interval
+                while pending:
+                    for job_id, (job, batch_tasks) in list(pending.items()):
+                        try:
+                            finished, status = self.translator.poll_batch_job(job_id)
+                            self.logger.info(f"배치 작업 {job_id} 상태: {status}")
+                            if not finished:
+                                continue
+                            del pending[job_id]
+                            self._store_batch_api_results(job, job_id, batch_tasks)
+                            file_stats[job.input_file] = self._finish_batch_api_job(job)
+                        except Exception as e:
+                            pending.pop(job_id, None)
+                            self._skip_batch_api_job(job, e, skip_failed, failed_files)
+                    if pending:
+                        time.sleep(interval)
+                        interval = min(interval * 2, self.config.batch_poll_max_interval)
+            except BaseException:
+                # 저장하지 못한 작업의 임시 파일만 정리 (작업 ID는 다시 실행할 때 이어받도록 남김)
+                for job, _ in pending.values():
+                    self._abort_job(job)
+                raise
+            finally:
+                if self.cache:
+                    self.cache.flush()
+                self.throughput.save()
+                
+        except Exception as e:
+            self.logger.error(f"번역 중 오류가 발생했습니다: {e}")
+            raise
             
-            # 수정된 내용이 있는지 확인
-            if original_translated_srt != adjusted_translated_srt:
-                self.logger.info("시간 중복이 감지되어 자동으로 조정되었습니다.")
-                translated_srt = adjusted_translated_srt
+        return self.aggregate_stats(file_stats, failed_files)
+    
+    @staticmethod
+    def _batch_state_file(job: "TranslationJob") -> str:
+        """배치 작업 ID를 저장하는 파일 경로 (출력 파일 옆)"""
+        return f"{job.output_file}.batchjob.json"
+    
+    def _skip_batch_api_job(self, job: "TranslationJob", error: Exception, skip_failed: bool,
+                            failed_files: List[str]) -> None:
+        """실패한 Batch API 작업을 정리하고 건너뛴 파일로 기록 (skip_failed가 False이면 예외를 다시 발생)"""
+        self._abort_job(job)
+        if not skip_failed:
+            raise error
+        self.logger.error(f"파일 '{job.input_file}'을(를) 건너뜁니다: {error}")
+        failed_files.append(job.input_file)
+    
+    def _store_batch_api_results(self, job: "TranslationJob", job_id: str,
+                                 batch_tasks: List[Tuple[List[SubtitleCue], int, int]]) -> None:
+        """
+        끝난 배치 작업의 결과를 받아 배치마다 기록 (실패한 요청의 자막은 원문과 실패 표시로 채움)
+        
+        Args:
+            job: 번역 작업
+            job_id: 끝난 배치 작업 ID
+            batch_tasks: 제출한 (배치, 시작 번호, 배치 인덱스) 목록
+        """
+        usage_token = _prompt_cache_usage.set(job.usage("main"))
+        try:
+            results = self.translator.fetch_batch_results(job_id)
+        finally:
+            _prompt_cache_usage.reset(usage_token)
+        
+        for batch, start_number, batch_index in batch_tasks:
+            result = results.get(self._batch_custom_id(batch_index))
+            if isinstance(result, tuple):
+                translated, restored = self.processor.match_translated_blocks(
+                    batch, self.translator.decode_response(batch, result[0]))
+                job.counters["restored_timestamps"] += restored
+                self._complete_batch(job, batch_index, translated, result[1], result[2])
             else:
-                self.logger.info("시간 중복이 발견되지 않았습니다.")
-            
-            # 결과 저장
-            self.file_handler.write_srt_file(output_file, translated_srt)
-            self.logger.info(f"번역 완료! 결과가 {output_file}에 저장되었습니다.")
-            
-            # 비용 계산
-            total_cost = (self.total_input_tokens * self.config.input_token_cost) + (self.total_output_tokens * self.config.output_token_cost)
-            
-            stats = {
-                "input_tokens": self.total_input_tokens,
-                "output_tokens": self.total_output_tokens,
-                "total_cost": total_cost,
-                "subtitles_count": len(subtitles),
-                "batches_count": len(batches)
-            }
-            
-            self.logger.info(f"총 사용된 입력 토큰: {self.total_input_tokens}")
-            self.logger.info(f"총 사용된 출력 토큰: {self.total_output_tokens}")
-            self.logger.info(f"총 요금: ${total_cost:.4f}")
+                self.logger.error(f"배치 {batch_index + 1} 번역 실패: {result}")
+                reason = f"{self.FAILURE_MARKER}: {result}]"
+                self._complete_batch(job, batch_index,
+                                     [self._fallback_subtitle(subtitle, reason) for subtitle in batch], 0, 0)
+    
+    def _finish_batch_api_job(self, job: "TranslationJob") -> Dict:
+        """Batch API 작업의 결과 파일을 확정하고 저장해 둔 배치 작업 ID를 지운 뒤 통계를 반환"""
+        stats = self._finish_job(job, cost_multiplier=self.config.batch_api_discount)
+        state_file = self._batch_state_file(job)
+        if os.path.exists(state_file):
+            os.remove(state_file)
+        return stats
+    
+    @staticmethod
+    def _batch_custom_id(batch_index: int) -> str:
+        """Batch API 요청 식별자 (영문, 숫자, -, _만 허용됨)"""
+        return f"batch-{batch_index}"
+    
+    def _submit_or_resume_batch_job(self, job: "TranslationJob", batch_tasks: List[Tuple[List[SubtitleCue], int, int]],
+                                    state_file: str) -> str:
+        """
+        저장된 배치 작업이 같은 작업이면 그 ID를, 아니면 새로 제출한 작업의 ID를 반환
+        
+        Args:
+            job: 번역 작업
+            batch_tasks: 제출할 (배치, 시작 번호, 배치 인덱스) 목록
+            state_file: 배치 작업 ID를 저장하는 파일 경로
             
-            return stats
+        Returns:
+            배치 작업 ID
+        """
+        if os.path.exists(state_file):
+            try:
+                with open(state_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get("job_key") == job.journal.job_key and state.get("batches") == len(batch_tasks):
+                    self.logger.info(f"저장된 배치 작업 {state['job_id']}을(를) 이어서 기다립니다.")
+                    return state["job_id"]
+                self.logger.info("저장된 배치 작업이 현재 입력/설정과 달라 새로 제출합니다.")
+            except (json.JSONDecodeError, IOError, KeyError) as e:
+                self.logger.warning(f"배치 작업 상태 파일을 읽을 수 없어 새로 제출합니다: {e}")
+                
+        requests = [(self._batch_custom_id(batch_index), batch) for batch, _, batch_index in batch_tasks]
+        job_id = self.translator.submit_batch_job(requests)
+        self.logger.info(f"{len(requests)}개의 배치를 배치 작업 {job_id}(으)로 제출했습니다.")
+        
+        with open(state_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                "job_id": job_id,
+                "job_key": job.journal.job_key,
+                "provider": self.config.provider,
+                "model": self.config.model,
+                "batches": len(batch_tasks)
+            }, f, indent=2)
             
-        except Exception as e:
-            self.logger.error(f"번역 중 오류가 발생했습니다: {e}")
-            raise
+        return job_id
+
+
+class TranslationJob:
+    """파일 하나의 번역 작업 상태를 담는 클래스"""
+    
+    def __init__(self, input_file: str, output_file: str):
+        self.input_file = input_file
+        self.output_file = output_file
+        
+        # 원본 자막 수와 번역 전에 조정한 시간 정보 (자막 본문은 배치를 만들 때 파일에서 다시 읽음)
+        self.subtitle_count = 0
+        self.timing: Optional[TimingEngine] = None
+        
+        # 번역할 배치를 차례로 만드는 생성기와 지금까지 만든 배치 수
+        self.plan: Optional[Iterator[Optional[Tuple[List[int], List[SubtitleCue], str]]]] = None
+        self.planned = False
+        self.batches_count = 0
+        # 번역 중인 배치 (배치 인덱스 -> (자막 위치 목록, 배치, 모델 등급 이름))
+        self.in_flight: Dict[int, Tuple[List[int], List[SubtitleCue], str]] = {}
+        # 결과가 정해져 writer에 넘긴 자막 수 (진행률 표시)
+        self.settled = 0
+        
+        # 번역 중인 대표 자막의 정규화한 본문 -> 위치, 대표 위치 -> 같은 번역을 받을 (위치, 원본 자막) 목록
+        self.representatives: Dict[str, int] = {}
+        self.duplicates: Dict[int, List[Tuple[int, SubtitleCue]]] = {}
+        self.dedup_stats = {"dedup_saved_subtitles": 0, "dedup_saved_requests": 0, "dedup_saved_tokens": 0}
+        
+        # 이전 작업 기록에서 복구한 자막 (위치 -> 번역된 자막)
+        self.resumed: Dict[int, SubtitleCue] = {}
+        
+        # 번역 전에 원본 자막에서 조정한 시간 중복 수
+        self.adjusted_timestamps = 0
+        
+        self.writer: Optional[IncrementalSrtWriter] = None
+        self.journal: Optional[TranslationJournal] = None
+        # 준비하지 못해 건너뛴 작업인지 여부
+        self.failed = False
+        
+        # 이 작업에서 사용한 토큰 수 (입력 토큰은 프롬프트 캐시 읽기/쓰기 토큰 포함)
+        self.input_tokens = 0
+        self.output_tokens = 0
+        
+        # 모델 등급 이름 -> 배치/자막 수와 토큰 사용량
+        self.tier_usage: Dict[str, Dict[str, int]] = {}
+        
+        # 캐시 조회, 응답 검증, 배치 나눔, 헤지 요청 집계 (요청 코루틴은 _current_job으로 이 작업을 찾아 기록)
+        self.counters: Dict[str, float] = {
+            "cache_hits": 0, "cache_misses": 0, "repaired_subtitles": 0, "restored_timestamps": 0,
+            "bisected_batches": 0, "hedge_eligible_requests": 0, "hedged_requests": 0, "hedge_wins": 0,
+            "hedge_extra_cost": 0.0
+        }
+        # 오류 종류별 재시도 횟수
+        self.retry_counts: Dict[str, int] = {}
+        # 모델 등급 이름 -> 성공한 요청의 지연 시간(초)
+        self.latencies: Dict[str, List[float]] = {}
+        
+        # 번역하지 못해 원문과 실패 표시로 채운 자막 위치
+        self.failed_positions: List[int] = []
+        
+        # 결과 파일이 확정된 뒤의 통계 (완료 전에는 None)
+        self.stats: Optional[Dict] = None
+    
+    def usage(self, tier: str) -> Dict[str, int]:
+        """모델 등급의 사용량 집계 (없으면 생성)"""
+        return self.tier_usage.setdefault(tier, {
+            "batches": 0, "subtitles": 0, "input_tokens": 0, "output_tokens": 0,
+            "cache_read_tokens": 0, "cache_write_tokens": 0
+        })
 
 
 def setup_logging():
@@ -849,8 +5686,54 @@ def generate_default_config(config: SubtitleTranslationConfig):
         "batch_size": config.batch_size,
         "max_tokens": config.max_tokens,
         "max_workers": config.max_workers,
+        "batching_mode": config.batching_mode,
+        "max_batch_cues": config.max_batch_cues,
+        "token_budgets": config.token_budgets,
+        "adaptive_concurrency": config.adaptive_concurrency,
+        "concurrency_floor": config.concurrency_floor,
+        "concurrency_ceiling": config.concurrency_ceiling,
+        "rate_limits": config.rate_limits,
+        "streaming": config.streaming,
+        "wire_format": config.wire_format,
+        "dedup": config.dedup,
+        "cache_enabled": config.cache_enabled,
+        "cache_file": config.cache_file,
+        "cache_max_mb": config.cache_max_mb,
+        "cache_memory_entries": config.cache_memory_entries,
+        "resume": config.resume,
+        "journal_dir": config.journal_dir,
+        "throughput_file": config.throughput_file,
+        "batch_api_discount": config.batch_api_discount,
+        "batch_poll_interval": config.batch_poll_interval,
+        "batch_poll_max_interval": config.batch_poll_max_interval,
+        "api_base_urls": config.api_base_urls,
+        "timing_offset_ms": config.timing_offset_ms,
+        "source_fps": config.source_fps,
+        "target_fps": config.target_fps,
+        "min_duration_ms": config.min_duration_ms,
+        "close_gap_ms": config.close_gap_ms,
+        "retry_budgets": config.retry_budgets,
+        "retry_base_delay": config.retry_base_delay,
+        "retry_max_delay": config.retry_max_delay,
+        "repair_attempts": config.repair_attempts,
+        "hedge_enabled": config.hedge_enabled,
+        "hedge_percentile": config.hedge_percentile,
+        "hedge_min_samples": config.hedge_min_samples,
+        "hedge_provider": config.hedge_provider,
+        "hedge_model": config.hedge_model,
+        "routing_enabled": config.routing_enabled,
+        "routing_threshold": config.routing_threshold,
+        "fast_provider": config.fast_provider,
+        "fast_model": config.fast_model,
+        "fast_input_token_cost": config.fast_input_token_cost,
+        "fast_output_token_cost": config.fast_output_token_cost,
+        "prompt_cache": config.prompt_cache,
+        "prompt_cache_min_tokens": config.prompt_cache_min_tokens,
+        "glossary": config.glossary,
         "input_token_cost": config.input_token_cost,
-        "output_token_cost": config.output_token_cost
+        "output_token_cost": config.output_token_cost,
+        "cache_read_cost_ratio": config.cache_read_cost_ratio,
+        "cache_write_cost_ratio": config.cache_write_cost_ratio
     }
     
     try:
@@ -862,6 +5745,59 @@ def generate_default_config(config: SubtitleTranslationConfig):
         print(f"설정 파일 생성 중 오류: {e}")
         return False
 
+# 번역 요약에 표시할 모델 등급 이름
+TIER_LABELS = {"main": "기본 모델", "fast": "빠른 모델"}
+
+
+def print_estimate(stats: Dict, config: SubtitleTranslationConfig) -> None:
+    """
+    --estimate 예측 결과 출력
+    
+    Args:
+        stats: SubtitleTranslator.estimate_files의 결과
+        config: 번역 설정
+    """
+    logger = logging.getLogger(__name__)
+    logger.info(f"예상 결과 ({config.provider}/{config.model}, 요청 없이 추정):")
+    if stats['files_count'] > 1:
+        for input_file, file_stats in stats['files'].items():
+            logger.info(f"- {input_file}: 요청 {file_stats['batches_count']}개, ${file_stats['total_cost']:.4f}")
+    if stats['failed_files']:
+        logger.info(f"- 건너뛴 파일: {', '.join(stats['failed_files'])}")
+    logger.info(f"- 자막 수: {stats['subtitles_count']} (번역 {stats['translated_subtitles']}개, "
+                f"작업 기록/캐시 {stats['skipped_subtitles']}개, 중복 {stats['dedup_saved_subtitles']}개)")
+    logger.info(f"- 요청 수: {stats['requests_count']}")
+    logger.info(f"- 입력 토큰: 약 {stats['input_tokens']} (프롬프트 캐시 읽기 {stats['prompt_cache_read_tokens']}, "
+                f"쓰기 {stats['prompt_cache_write_tokens']})")
+    logger.info(f"- 출력 토큰: 약 {stats['output_tokens']}")
+    logger.info(f"- 예상 비용: ${stats['total_cost']:.4f}")
+    
+    def format_duration(total_seconds: float) -> str:
+        minutes, seconds = divmod(int(round(total_seconds)), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}시간 {minutes}분 {seconds}초"
+    
+    def format_speed(tier: Dict) -> str:
+        source = "이전 번역 기록" if tier['throughput_from_history'] else "모델 기본값"
+        return (f"동시 요청 {tier['concurrency']}개, 초당 출력 {tier['tokens_per_second']:.0f}토큰 + "
+                f"요청당 {tier['request_overhead']:.1f}초, {source}")
+    
+    if config.routing_enabled:
+        for name, tier in stats['tiers'].items():
+            line = (f"- {TIER_LABELS[name]}({tier['model']}): 요청 {tier['batches']}개, 자막 {tier['subtitles']}개, "
+                    f"${tier['total_cost']:.4f}, 요청당 약 {tier['mean_latency']:.1f}초")
+            if stats['wall_seconds'] is not None:
+                line += f", 약 {format_duration(tier['wall_seconds'])} ({format_speed(tier)})"
+            logger.info(line)
+    if stats['wall_seconds'] is None:
+        logger.info("- 예상 소요 시간: Batch API는 제공업체 처리 상황에 따라 최대 24시간")
+    elif config.routing_enabled or 'main' not in stats['tiers']:
+        # 모델 등급별 속도는 위에 표시 (등급마다 따로 처리하므로 가장 오래 걸리는 등급의 시간)
+        logger.info(f"- 예상 소요 시간: {format_duration(stats['wall_seconds'])}")
+    else:
+        logger.info(f"- 예상 소요 시간: {format_duration(stats['wall_seconds'])} ({format_speed(stats['tiers']['main'])})")
+
+
 def main():
     """메인 함수"""
     # 로깅 설정
@@ -878,29 +5814,92 @@ def main():
             success = generate_default_config(config)
             sys.exit(0 if success else 1)
         
-        # 입출력 파일 경로 설정
-        input_file = args.input_file
+        # 입출력 파일 경로 설정 (디렉토리와 glob 패턴은 파일 목록으로 확장)
+        file_handler = SubtitleFileHandler()
+        single_file = len(args.input_files) == 1 and os.path.isfile(args.input_files[0])
+        input_files = file_handler.find_srt_files(args.input_files)
+        if not input_files:
+            logger.error("번역할 SRT 파일을 찾을 수 없습니다.")
+            sys.exit(1)
         
-        if args.output:
-            output_file = args.output
+        if single_file and args.output:
+            file_pairs = [(input_files[0], args.output)]
         else:
-            # 출력 파일 이름 자동 생성
-            base, ext = os.path.splitext(os.path.basename(input_file))
-            output_file_name = f"{base}_ko{ext}"
-            output_dir = os.path.dirname(os.path.abspath(input_file))
-            output_file = os.path.join(output_dir, output_file_name)
+            # 출력 파일 이름 자동 생성 (여러 파일이면 -o는 출력 디렉토리)
+            file_pairs = [(input_file, file_handler.make_output_path(input_file, args.output))
+                          for input_file in input_files]
+            
+            output_files = {os.path.abspath(output_file) for _, output_file in file_pairs}
+            if len(output_files) != len(file_pairs):
+                logger.error("출력 파일 이름이 겹치는 입력 파일이 있습니다. -o 없이 실행하면 각 입력 파일 옆에 저장합니다.")
+                sys.exit(1)
         
         # 번역기 초기화 및 실행
-        translator = SubtitleTranslator(config)
-        stats = translator.translate(input_file, output_file)
+        # 예측만 할 때는 요청을 보내지 않으므로 API 키 없이 번역기를 만듦
+        translator = SubtitleTranslator(config, offline=args.estimate)
+        if args.estimate:
+            print_estimate(translator.estimate_files(file_pairs, batch_api=args.batch_api), config)
+            return
+        if args.range:
+            if not single_file:
+                logger.error("--range는 입력 파일을 하나만 지정할 때 쓸 수 있습니다.")
+                sys.exit(1)
+            stats = translator.translate_range(*file_pairs[0], args.range)
+        elif args.batch_api:
+            # Batch API는 파일마다 하나의 배치 작업으로 제출하고 모든 작업을 함께 기다림
+            if single_file:
+                stats = translator.translate_with_batch_api(*file_pairs[0])
+            else:
+                stats = translator.translate_files_with_batch_api(file_pairs)
+        elif single_file:
+            stats = translator.translate(*file_pairs[0])
+        else:
+            stats = translator.translate_files(file_pairs)
         
         # 결과 요약 출력
         logger.info("번역 완료 요약:")
+        if 'files_count' in stats:
+            for input_file, file_stats in stats['files'].items():
+                logger.info(f"- {input_file}: 자막 {file_stats['subtitles_count']}개, "
+                            f"배치 {file_stats['batches_count']}개, ${file_stats['total_cost']:.4f}")
+            logger.info(f"- 번역한 파일 수: {stats['files_count']}")
+            if stats['failed_files']:
+                logger.info(f"- 건너뛴 파일: {', '.join(stats['failed_files'])}")
+        if 'range' in stats:
+            logger.info(f"- 번역한 구간: 자막 {stats['range'][0]}~{stats['range'][1]}번째")
         logger.info(f"- 처리된 자막 수: {stats['subtitles_count']}")
         logger.info(f"- 배치 수: {stats['batches_count']}")
         logger.info(f"- 입력 토큰: {stats['input_tokens']}")
         logger.info(f"- 출력 토큰: {stats['output_tokens']}")
+        logger.info(f"- 프롬프트 캐시 읽기/쓰기 토큰: {stats['prompt_cache_read_tokens']}/"
+                    f"{stats['prompt_cache_write_tokens']} (적중률 {stats['prompt_cache_hit_ratio']:.1%})")
         logger.info(f"- 총 비용: ${stats['total_cost']:.4f}")
+        if config.routing_enabled:
+            for name, tier in stats['tiers'].items():
+                logger.info(f"- {TIER_LABELS[name]}({tier['model']}): 배치 {tier['batches']}개, 자막 {tier['subtitles']}개, "
+                            f"${tier['total_cost']:.4f}, 지연 평균 {tier['mean_latency']:.1f}초/p95 {tier['p95_latency']:.1f}초")
+        if config.cache_enabled:
+            logger.info(f"- 캐시 적중/미적중: {stats['cache_hits']}/{stats['cache_misses']}")
+        if stats['resumed_subtitles']:
+            logger.info(f"- 이전 작업에서 복구한 자막 수: {stats['resumed_subtitles']}")
+        if stats['repaired_subtitles'] or stats['restored_timestamps']:
+            logger.info(f"- 응답 검증: 누락 자막 {stats['repaired_subtitles']}개 재요청으로 복구, "
+                        f"시간 정보 {stats['restored_timestamps']}개 원본으로 복원")
+        if stats['adjusted_timestamps']:
+            logger.info(f"- 시간 중복 조정: {stats['adjusted_timestamps']}개")
+        if any(stats['retries'].values()):
+            logger.info("- 재시도: " + ", ".join(f"{error_class} {count}회"
+                                                for error_class, count in stats['retries'].items() if count))
+        if stats['bisected_batches']:
+            logger.info(f"- 응답 잘림/반복 실패로 나눠 번역한 배치 수: {stats['bisected_batches']}")
+        if stats['failed_subtitles']:
+            logger.info(f"- 번역하지 못한 자막 수: {stats['failed_subtitles']}")
+        if config.hedge_enabled:
+            logger.info(f"- 헤지 요청: {stats['hedged_requests']}건 ({stats['hedge_rate']:.1%}), "
+                        f"헤지 응답 채택 {stats['hedge_wins']}건, 추가 비용 약 ${stats['hedge_extra_cost']:.4f}")
+        if stats['dedup_saved_subtitles']:
+            logger.info(f"- 중복 제거: 자막 {stats['dedup_saved_subtitles']}개, "
+                        f"요청 {stats['dedup_saved_requests']}개, 토큰 약 {stats['dedup_saved_tokens']}개 절감")
         
     except KeyboardInterrupt:
         logger.info("사용자에 의해 프로그램이 중단되었습니다.")
@@ -0,0 +1,247 @@
+import asyncio
+
+import pytest
+
+from subtitle import (AdaptiveConcurrencyController, BatchTranslationError, SubtitleCue, SubtitleProcessor,
+                      SubtitleTranslationConfig, SubtitleTranslator, TokenBucketRateLimiter, TranslationJob,
+                      TruncatedResponseError, _current_job)
+
+
+class FakeApiError(Exception):
+    """API 클라이언트 예외처럼 status_code를 가진 오류"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def make_batch(count):
+    return [SubtitleCue(i + 1, i * 2000, i * 2000 + 1500, f"line {i + 1}") for i in range(count)]
+
+
+def translate(batch):
+    return SubtitleProcessor.format_srt(batch).replace("line", "줄"), 100, 50
+
+
+def make_translator(tmp_path, limit=4, ceiling=8, hedge=False):
+    config = SubtitleTranslationConfig()
+    config.cache_enabled = False
+    config.throughput_file = str(tmp_path / "throughput.json")
+    config.hedge_enabled = hedge
+    config.retry_base_delay = 0.01
+    config.retry_max_delay = 0.01
+    translator = SubtitleTranslator(config, offline=True)
+
+    tier = translator.tiers["main"]
+    tier.concurrency = AdaptiveConcurrencyController(limit, 1, ceiling)
+    tier.rate_limiter = TokenBucketRateLimiter({})
+    translator.concurrency = tier.concurrency
+    translator.rate_limiter = tier.rate_limiter
+    if hedge:
+        # 표본 없이도 바로 헤지 시점이 되도록 지연 시간을 고정
+        translator.hedge_policy.delay = lambda estimated_output: 0.05
+    return translator
+
+
+def run_with_job(coroutine_factory):
+    """번역 작업 통계를 모으는 작업 문맥에서 코루틴을 실행하고 (결과, 작업)을 반환"""
+    job = TranslationJob("input.srt", "output.srt")
+
+    async def runner():
+        _current_job.set(job)
+        return await coroutine_factory()
+
+    return asyncio.run(runner()), job
+
+
+def test_hedge_wins_and_primary_is_cancelled(tmp_path):
+    translator = make_translator(tmp_path, hedge=True)
+    batch = make_batch(3)
+    calls = []
+    cancelled = []
+
+    async def fake_translate(batch, start_number):
+        calls.append(start_number)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(start_number)
+                raise
+        return translate(batch)
+
+    translator.translator.translate_batch_async = fake_translate
+
+    async def scenario():
+        result = await translator._translate_batch_with_retry(batch, 1)
+        # 취소된 원래 요청이 정리될 때까지 한 번 양보
+        await asyncio.sleep(0)
+        return result
+
+    result, job = run_with_job(scenario)
+
+    assert result == translate(batch)
+    assert len(calls) == 2
+    assert cancelled == [1]
+    assert translator.concurrency.in_flight == 0
+    assert job.counters["hedged_requests"] == 1
+    assert job.counters["hedge_wins"] == 1
+
+
+def test_hedge_not_sent_when_primary_is_fast(tmp_path):
+    translator = make_translator(tmp_path, hedge=True)
+    batch = make_batch(2)
+    calls = []
+
+    async def fake_translate(batch, start_number):
+        calls.append(start_number)
+        return translate(batch)
+
+    translator.translator.translate_batch_async = fake_translate
+
+    result, job = run_with_job(lambda: translator._translate_batch_with_retry(batch, 1))
+
+    assert result == translate(batch)
+    assert calls == [1]
+    assert translator.concurrency.in_flight == 0
+    assert job.counters["hedged_requests"] == 0
+
+
+def test_hedge_both_requests_fail(tmp_path):
+    translator = make_translator(tmp_path, hedge=True)
+    translator.config.retry_budgets = {**translator.config.retry_budgets, "server": 0}
+    batch = make_batch(2)
+    calls = []
+
+    async def fake_translate(batch, start_number):
+        calls.append(start_number)
+        if len(calls) == 1:
+            await asyncio.sleep(0.2)
+        raise FakeApiError(500)
+
+    translator.translator.translate_batch_async = fake_translate
+
+    with pytest.raises(BatchTranslationError) as error:
+        run_with_job(lambda: translator._translate_batch_with_retry(batch, 1))
+
+    assert error.value.error_class == "server"
+    assert len(calls) == 2
+    assert translator.concurrency.in_flight == 0
+
+
+def test_truncated_batch_is_bisected(tmp_path):
+    translator = make_translator(tmp_path)
+    batch = make_batch(4)
+    sizes = []
+
+    async def fake_translate(batch, start_number):
+        sizes.append(len(batch))
+        if len(batch) > 1:
+            raise TruncatedResponseError("max_tokens", 10, 20)
+        return translate(batch)
+
+    translator.translator.translate_batch_async = fake_translate
+
+    (cues, input_tokens, output_tokens), job = run_with_job(lambda: translator._translate_with_bisection(batch, 1))
+
+    assert [cue.text for cue in cues] == ["줄 1", "줄 2", "줄 3", "줄 4"]
+    assert sorted(sizes) == [1, 1, 1, 1, 2, 2, 4]
+    # 잘린 응답도 청구되므로 토큰 수에 포함
+    assert (input_tokens, output_tokens) == (3 * 10 + 4 * 100, 3 * 20 + 4 * 50)
+    assert job.counters["bisected_batches"] == 3
+    assert translator.concurrency.in_flight == 0
+
+
+@pytest.mark.parametrize("status_code", [500, 429])
+def test_batch_size_independent_failures_are_not_bisected(tmp_path, status_code):
+    translator = make_translator(tmp_path)
+    translator.config.retry_budgets = {**translator.config.retry_budgets, "server": 0, "rate_limit": 0}
+    batch = make_batch(4)
+    sizes = []
+
+    async def fake_translate(batch, start_number):
+        sizes.append(len(batch))
+        raise FakeApiError(status_code)
+
+    translator.translator.translate_batch_async = fake_translate
+
+    (cues, _, _), job = run_with_job(lambda: translator._translate_with_bisection(batch, 1))
+
+    assert sizes == [4]
+    assert all(cue.text.startswith(SubtitleTranslator.FAILURE_MARKER) for cue in cues)
+    assert job.counters["bisected_batches"] == 0
+
+
+def test_client_error_is_not_retried_or_bisected(tmp_path):
+    translator = make_translator(tmp_path)
+    batch = make_batch(4)
+    sizes = []
+
+    async def fake_translate(batch, start_number):
+        sizes.append(len(batch))
+        raise FakeApiError(401)
+
+    translator.translator.translate_batch_async = fake_translate
+
+    with pytest.raises(FakeApiError):
+        run_with_job(lambda: translator._translate_with_bisection(batch, 1))
+
+    assert sizes == [4]
+    assert translator.concurrency.in_flight == 0
+
+
+def test_rate_limit_halves_concurrency(tmp_path):
+    translator = make_translator(tmp_path, limit=8, ceiling=8)
+    batch = make_batch(2)
+    calls = []
+
+    async def fake_translate(batch, start_number):
+        calls.append(start_number)
+        if len(calls) == 1:
+            raise FakeApiError(429)
+        return translate(batch)
+
+    translator.translator.translate_batch_async = fake_translate
+
+    result, job = run_with_job(lambda: translator._translate_batch_with_retry(batch, 1))
+
+    assert result == translate(batch)
+    assert translator.concurrency.limit == 4
+    assert job.retry_counts["rate_limit"] == 1
+
+
+def test_overload_decrease_once_per_cooldown():
+    async def scenario():
+        controller = AdaptiveConcurrencyController(8, 1, 16)
+        await controller.record_success(1.0)
+        await controller.record_overload()
+        # 같은 시점에 보낸 요청들의 연속 실패는 한 번만 반영
+        await controller.record_overload()
+        return controller.limit
+
+    assert asyncio.run(scenario()) == 4
+
+
+def test_overload_respects_floor():
+    async def scenario():
+        controller = AdaptiveConcurrencyController(3, 2, 16)
+        await controller.record_overload()
+        return controller.limit
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_waiters_wake_when_limit_grows():
+    async def scenario():
+        controller = AdaptiveConcurrencyController(1, 1, 4)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        # 한 라운드(현재 한도만큼)의 안정적인 성공으로 한도가 늘면 슬롯 반납 없이도 대기 요청이 깨어남
+        await controller.record_success(0.1)
+        await asyncio.wait_for(waiter, timeout=1)
+        return controller.limit, controller.in_flight
+
+    assert asyncio.run(scenario()) == (2, 2)
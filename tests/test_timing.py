@@ -0,0 +1,127 @@
+import random
+
+import numpy as np
+import pytest
+
+from subtitle import CueSequencer, SubtitleCue, SubtitleProcessor, TimingEngine
+
+
+GAP_MS = SubtitleProcessor.OVERLAP_GAP_MS
+MIN_DURATION_MS = SubtitleProcessor.MIN_DURATION_MS
+
+
+def make_cues(times):
+    return [SubtitleCue(i + 1, start, end, f"line {i + 1}") for i, (start, end) in enumerate(times)]
+
+
+def sequential_repair(cues):
+    """CueSequencer로 자막을 하나씩 조정한 결과 (시간 목록, 조정된 자막 수)"""
+    sequencer = CueSequencer(SubtitleProcessor())
+    times = [(cue.start_ms, cue.end_ms) for cue in map(sequencer.next, cues)]
+    return times, sequencer.adjusted_count
+
+
+def engine_repair(cues):
+    """TimingEngine.repair_overlaps로 한꺼번에 조정한 결과 (시간 목록, 조정된 자막 수)"""
+    engine = TimingEngine.from_cues(cues)
+    count = engine.repair_overlaps(GAP_MS, MIN_DURATION_MS)
+    return [(cue.start_ms, cue.end_ms) for cue in engine.apply(cues)], count
+
+
+def random_times(rng, count, spacing):
+    start = 0
+    times = []
+    for _ in range(count):
+        # 가끔 시간이 거꾸로 가거나 길이가 0 이하인 자막도 섞음
+        start = max(0, start + rng.randint(-spacing // 2, spacing * 2))
+        times.append((start, start + rng.randint(-200, spacing * 3)))
+    return times
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_repair_overlaps_matches_sequential(seed):
+    rng = random.Random(seed)
+    cues = make_cues(random_times(rng, rng.randint(0, 80), rng.choice([100, 500, 1000, 2000])))
+    assert engine_repair(cues) == sequential_repair(cues)
+
+
+@pytest.mark.parametrize("heads", [1, 3, 40, 100])
+def test_repair_overlaps_long_chains(heads):
+    # 1초마다 10ms짜리 자막이 있고, 머리 자막만 다음 자막과 겹치면 늘어난 종료 시간이 끝까지 연쇄됨
+    count = 5000
+    times = [(i * 1000, i * 1000 + 10) for i in range(count)]
+    for head in range(0, count, count // heads):
+        times[head] = (head * 1000, head * 1000 + 1500)
+    cues = make_cues(times)
+
+    times, adjusted = engine_repair(cues)
+    assert (times, adjusted) == sequential_repair(cues)
+    assert adjusted == count - 1
+
+
+def test_repair_overlaps_identical_cues():
+    cues = make_cues([(0, 1000)] * 50)
+    assert engine_repair(cues) == sequential_repair(cues)
+
+
+def test_repair_overlaps_keeps_non_overlapping_cues():
+    cues = make_cues([(0, 1000), (1000, 2000), (2500, 3000)])
+    engine = TimingEngine.from_cues(cues)
+    assert engine.repair_overlaps(GAP_MS, MIN_DURATION_MS) == 0
+    assert all(new is old for new, old in zip(engine.apply(cues), cues))
+
+
+@pytest.mark.parametrize("count", [0, 1])
+def test_repair_overlaps_short_input(count):
+    cues = make_cues([(500, 100)] * count)
+    assert engine_repair(cues) == sequential_repair(cues)
+
+
+def test_offset_clamps_to_zero():
+    engine = TimingEngine(np.array([100, 5000]), np.array([900, 6000]))
+    assert engine.offset(-1000) == 2
+    assert engine.starts.tolist() == [0, 4000]
+    assert engine.ends.tolist() == [0, 5000]
+    assert engine.offset(0) == 0
+
+
+def test_scale_rounds_to_milliseconds():
+    engine = TimingEngine(np.array([0, 1000, 60000]), np.array([500, 2001, 61000]))
+    assert engine.scale(25 / 23.976) == 3
+    assert engine.starts.tolist() == [0, round(1000 * 25 / 23.976), round(60000 * 25 / 23.976)]
+    assert engine.ends.tolist() == [round(500 * 25 / 23.976), round(2001 * 25 / 23.976), round(61000 * 25 / 23.976)]
+    assert engine.scale(1) == 0
+
+
+def test_scale_unchanged_zero_times():
+    engine = TimingEngine(np.array([0]), np.array([0]))
+    assert engine.scale(23.976 / 25) == 0
+
+
+def test_enforce_min_duration():
+    engine = TimingEngine(np.array([0, 1000, 1500, 5000]), np.array([200, 1100, 3000, 5100]))
+    assert engine.enforce_min_duration(1000, GAP_MS) == 3
+    # 다음 자막 시작 GAP_MS 전까지만 늘리고, 이미 긴 자막과 마지막 자막은 제한 없이 처리
+    assert engine.ends.tolist() == [1000 - GAP_MS, 1500 - GAP_MS, 3000, 6000]
+
+
+def test_enforce_min_duration_never_shortens():
+    # 다음 자막과 이미 겹친 짧은 자막도 종료 시간을 앞당기지 않음
+    engine = TimingEngine(np.array([0, 100]), np.array([300, 200]))
+    assert engine.enforce_min_duration(1000, GAP_MS) == 1
+    assert engine.ends.tolist() == [300, 1100]
+    assert engine.enforce_min_duration(0, GAP_MS) == 0
+
+
+def test_close_gaps():
+    engine = TimingEngine(np.array([0, 1100, 2000, 5000, 5500]), np.array([1000, 1900, 3000, 5600, 6000]))
+    assert engine.close_gaps(100) == 2
+    # 간격이 한도를 넘거나 이미 겹친 자막, 마지막 자막은 그대로 둠
+    assert engine.ends.tolist() == [1100, 2000, 3000, 5600, 6000]
+    assert engine.starts.tolist() == [0, 1100, 2000, 5000, 5500]
+
+
+def test_close_gaps_disabled():
+    engine = TimingEngine(np.array([0, 1010]), np.array([1000, 2000]))
+    assert engine.close_gaps(0) == 0
+    assert engine.ends.tolist() == [1000, 2000]